@@ -4,7 +4,7 @@ import random
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 
-from pet_mvp.access_codes.models import PetAccessCode
+from pet_mvp.access_codes.models import PetAccessCode, VetPetAccess
 
 
 def generate_access_code(pet):
@@ -35,3 +35,10 @@ def generate_access_code(pet):
         pet=pet,
         expires_at=expiration_time
     )
+
+
+def can_view_pet(user, pet):
+    """Whether the user owns the pet or is a vet with active access to it."""
+    return pet.owners.filter(pk=user.pk).exists() or VetPetAccess.objects.filter(
+        vet=user, pet=pet, expires_at__gt=timezone.now()
+    ).exists()
@@ -31,7 +31,8 @@ class StoreInline(admin.StackedInline):
 class AppUserAdmin(admin.ModelAdmin):
     list_display = ('email', 'is_owner', 'is_clinic', 'is_groomer', 'is_store', 'is_active', 'default_language')
     search_fields = ('email', 'phone_number', 'city', 'country')
-    list_filter = ('is_owner', 'is_clinic', 'is_groomer', 'is_store', 'is_active', 'default_language')
+    list_filter = ('is_owner', 'is_clinic', 'is_groomer', 'is_store', 'is_active', 'default_language',
+                   'reminder_delivery')
 
     def get_inline_instances(self, request, obj=None):
         if not obj:
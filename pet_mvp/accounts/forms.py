@@ -21,6 +21,10 @@ class CleanFieldsMixin:
             if "password1" in field_name:
                 continue
 
+            # choice values are stored as-is
+            elif isinstance(self.fields.get(field_name), forms.ChoiceField):
+                continue
+
             elif field_name == 'email':
                 cleaned_data[field_name] = value.lower()
 
@@ -85,7 +89,16 @@ class OwnerCreateForm(BaseOwnerForm, auth_forms.UserCreationForm):
 
 
 class OwnerEditForm(BaseOwnerForm):
-    pass
+    class Meta(BaseOwnerForm.Meta):
+        fields = ('email', 'phone_number', 'city', 'country', 'reminder_delivery')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['reminder_delivery'].required = False
+
+    def clean_reminder_delivery(self):
+        # keep the current preference if the field is not submitted
+        return self.cleaned_data.get('reminder_delivery') or self.instance.reminder_delivery
 
 
 class ClinicRegistrationForm(CleanFieldsMixin, auth_forms.UserCreationForm):
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_appuser_is_groomer_appuser_is_store_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appuser',
+            name='reminder_delivery',
+            field=models.CharField(choices=[('digest', 'One daily summary email'), ('single', 'A separate email for each reminder')], default='digest', help_text='How vaccination and treatment expiration reminders are delivered.', max_length=10, verbose_name='Reminder emails'),
+        ),
+    ]
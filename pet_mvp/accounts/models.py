@@ -17,6 +17,14 @@ class AppUser(AbstractBaseUser, PermissionsMixin, TimeStampMixin):
         ('en', 'EN')
     ]
 
+    REMINDER_DIGEST = 'digest'
+    REMINDER_SINGLE = 'single'
+
+    REMINDER_DELIVERY_CHOICES = [
+        (REMINDER_DIGEST, _('One daily summary email')),
+        (REMINDER_SINGLE, _('A separate email for each reminder')),
+    ]
+
     email = models.EmailField(
         unique=True,
         error_messages={"unique": _("A user with that email already exists.")},
@@ -92,6 +100,14 @@ class AppUser(AbstractBaseUser, PermissionsMixin, TimeStampMixin):
         verbose_name=_("Default language")
     )
 
+    reminder_delivery = models.CharField(
+        max_length=10,
+        default=REMINDER_DIGEST,
+        choices=REMINDER_DELIVERY_CHOICES,
+        verbose_name=_("Reminder emails"),
+        help_text=_("How vaccination and treatment expiration reminders are delivered."),
+    )
+
     objects = UserManager()
 
     def clean(self):
@@ -1,4 +1,7 @@
+from functools import partial
+
 from allauth.account.signals import user_signed_up
+from django.db import transaction
 from django.dispatch import receiver
 
 from pet_mvp.notifications.tasks import send_user_registration_email
@@ -7,4 +10,4 @@ from pet_mvp.notifications.tasks import send_user_registration_email
 @receiver(user_signed_up)
 def send_welcome_email_on_signup(request, user, **kwargs):
     # Only send once, when the user signs up (not on subsequent logins)
-    send_user_registration_email(user, user.default_language)
+    transaction.on_commit(partial(send_user_registration_email.delay, user.pk, user.default_language))
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from functools import partial
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
@@ -6,6 +7,7 @@ from django.contrib.auth import views as auth_views, login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.tokens import default_token_generator
 from django.core.signing import Signer
+from django.db import transaction
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
@@ -162,16 +164,19 @@ class ClinicRegistrationView(BaseUserRegisterView):
             reverse('approve-temp-clinic') + f'?clinic_id={user.id}&pet_id={pet.id}'
         )
         for owner in owners:
-            send_clinic_owner_access_request_email(
-                user_owner=owner,
-                user_clinic=user,
-                pet=pet,
+            transaction.on_commit(partial(
+                send_clinic_owner_access_request_email.delay,
+                owner_id=owner.pk,
+                clinic_id=user.pk,
+                pet_id=pet.pk,
                 url=approval_url,
                 lang=owner.default_language
-            )
+            ))
 
         # Send email to admin
-        send_clinic_admin_approval_request_email(user_clinic=user, pet=pet)
+        transaction.on_commit(partial(
+            send_clinic_admin_approval_request_email.delay, clinic_id=user.pk, pet_id=pet.pk
+        ))
 
         messages.success(self.request, _(
             "Your registration was successful. An approval request has been sent to the pet's owner."))
@@ -216,7 +221,7 @@ class RegisterOwnerView(BaseUserRegisterView):
         self.object = user
 
         lang = self.set_default_language()
-        send_user_registration_email(user, lang)
+        transaction.on_commit(partial(send_user_registration_email.delay, user.pk, lang))
 
         return redirect(self.get_success_url())
 
@@ -321,11 +326,12 @@ class AccessCodeEmailView(views.FormView):
             activation_url = self.request.build_absolute_uri(
                 reverse('password_reset_confirm', kwargs={'uidb64': uid, 'token': token})
             )
-            send_clinic_activation_email(
-                user=user,
+            transaction.on_commit(partial(
+                send_clinic_activation_email.delay,
+                user_id=user.pk,
                 lang=user.default_language,
                 url=activation_url,
-            )
+            ))
             messages.success(self.request, _(
                 "Activation email sent. Please check your inbox to confirm your clinic access."))
             return redirect('clinic-login')
@@ -340,13 +346,14 @@ class AccessCodeEmailView(views.FormView):
                 reverse('approve-temp-clinic') + f'?clinic_id={user.id}&pet_id={pet.id}')
 
             for owner in owners:
-                send_clinic_owner_access_request_email(
-                    user_owner=owner,
-                    user_clinic=user,
-                    pet=pet,
+                transaction.on_commit(partial(
+                    send_clinic_owner_access_request_email.delay,
+                    owner_id=owner.pk,
+                    clinic_id=user.pk,
+                    pet_id=pet.pk,
                     url=activation_url,
                     lang=owner.default_language
-                )
+                ))
 
             messages.info(self.request, _(
                 "This clinic is awaiting approval. An access request was sent to the pet's owner."))
@@ -1,10 +1,17 @@
 from django.urls import path
 
-from pet_mvp.api.views import verify_access_code, get_pet_events, get_venues_nearby, health_check
+from pet_mvp.api.views import verify_access_code, get_pet_events, get_venues_nearby, health_check, \
+    email_metrics, pet_timeline, pet_vitals, record_catalog, records_campaign, vaccine_recall
 
 urlpatterns = [
     path('access-code/', verify_access_code, name='verify-access-code'),
     path('calendar/', get_pet_events, name='get-pet-events'),
+    path('pets/<int:pet_id>/timeline/', pet_timeline, name='pet-timeline'),
+    path('pets/<int:pet_id>/vitals/<str:metric>/', pet_vitals, name='pet-vitals'),
+    path('catalog/<str:language>/<str:species>/<str:version>/', record_catalog, name='record-catalog'),
+    path('campaigns/', records_campaign, name='records-campaign'),
+    path('recalls/', vaccine_recall, name='vaccine-recall'),
     path('venues/nearby/', get_venues_nearby, name='venues-nearby'),
     path('health/', health_check, name='health-check'),
+    path('email-metrics/', email_metrics, name='email-metrics'),
 ]
\ No newline at end of file
@@ -1,18 +1,31 @@
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
+import json
 import requests
 
 from pet_mvp import settings
 from pet_mvp.common.utils import haversine
+from pet_mvp.drugs.catalog import catalog_payload
+from pet_mvp.notifications.outbox import email_metrics as get_email_metrics
 from pet_mvp.pets.models import Pet
+from pet_mvp.pets.photos import photo_url
 from pet_mvp.access_codes.models import VetPetAccess
+from pet_mvp.access_codes.utils import can_view_pet
 from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+from pet_mvp.records.campaigns import record_campaign, CampaignError
+from pet_mvp.records.exports import EXPORT_FORMATS
+from pet_mvp.records.recalls import recalled_records, recall_summary, recall_lines, recall_file_name, RecallError
+from pet_mvp.notifications.tasks import send_vaccine_recall_notifications
+from pet_mvp.records.timeline import timeline_page, InvalidCursor
+from pet_mvp.records.vitals import VITAL_METRICS, vitals_series
 from django.utils import timezone
 from django.db.models import Prefetch
 from django.contrib.auth.decorators import login_required, login_not_required
 from datetime import timedelta
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.utils import translation
+from django.utils.cache import patch_cache_control
 from django.views.decorators.http import require_GET
 from pet_mvp.accounts.models import Clinic, Store, Groomer
 
@@ -22,6 +35,171 @@ def health_check(request):
     return JsonResponse({"status": "ok"})
 
 
+@require_GET
+@login_required
+def email_metrics(request):
+    """Outbox queue depth and email rate limiter waits, for monitoring"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Not authorized'}, status=403)
+    return JsonResponse(get_email_metrics())
+
+
+@require_GET
+@login_required
+def record_catalog(request, language, species, version):
+    """
+    Vaccines and drugs of a species as compact JSON, used by the examination page to build its selects.
+    The URL carries the language and the shared catalog version, so the browser keeps it until the catalog changes.
+    """
+    if language not in dict(settings.LANGUAGES):
+        return JsonResponse({'error': 'Unknown language'}, status=404)
+
+    # the payloads are cached per species, so only the known ones are built
+    if species not in dict(Pet.SPECIES_CHOICE):
+        return JsonResponse({'error': 'Unknown species'}, status=404)
+
+    with translation.override(language):
+        current_version, body = catalog_payload(species)
+
+    response = HttpResponse(body, content_type='application/json')
+    if version == current_version:
+        patch_cache_control(response, private=True, max_age=settings.RECORD_CATALOG_MAX_AGE, immutable=True)
+    else:
+        # an outdated page gets the current catalog, which is not cached under the old version
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+@require_GET
+@login_required
+def pet_timeline(request, pet_id):
+    """
+    Medical timeline of a pet mixing vaccinations, treatments, examinations and lab tests, newest first.
+    Paginated with the opaque 'cursor' returned as 'next'; available to the owners and to vets with access.
+    """
+    pet = Pet.objects.filter(pk=pet_id).first()
+    if pet is None:
+        return JsonResponse({'error': 'Pet not found'}, status=404)
+
+    if not can_view_pet(request.user, pet):
+        return JsonResponse({'error': 'Not authorized'}, status=403)
+
+    try:
+        page_size = min(int(request.GET.get('limit', settings.TIMELINE_PAGE_SIZE)), settings.TIMELINE_MAX_PAGE_SIZE)
+        if page_size < 1:
+            raise ValueError
+        entries, next_cursor = timeline_page(pet.pk, request.GET.get('cursor'), page_size)
+    except (ValueError, InvalidCursor):
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+
+    return JsonResponse({
+        'results': [
+            {'type': entry.type, 'id': entry.id, 'date': entry.date, **entry.data}
+            for entry in entries
+        ],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+@login_required
+def pet_vitals(request, pet_id, metric):
+    """
+    Time series of one vital sign or blood test value of a pet, as columns for a chart.
+    The 'window' parameter sets the values of the rolling mean, 'points' the points returned at most;
+    longer histories are downsampled. Available to the owners and to vets with access.
+    """
+    if metric not in VITAL_METRICS:
+        return JsonResponse({'error': 'Unknown metric'}, status=404)
+
+    pet = Pet.objects.filter(pk=pet_id).first()
+    if pet is None:
+        return JsonResponse({'error': 'Pet not found'}, status=404)
+
+    if not can_view_pet(request.user, pet):
+        return JsonResponse({'error': 'Not authorized'}, status=403)
+
+    try:
+        window = int(request.GET.get('window', settings.VITALS_ROLLING_WINDOW))
+        points = min(int(request.GET.get('points', settings.VITALS_POINTS)), settings.VITALS_MAX_POINTS)
+        if window < 1 or points < 3:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'error': 'Invalid window or points'}, status=400)
+
+    return JsonResponse(vitals_series(pet, metric, window, points))
+
+
+@require_POST
+@login_required
+def records_campaign(request):
+    """
+    Add one vaccination or medication record to many pets, given by id or passport number, in one submission.
+    Body: {"record_type": "vaccination" or "medication", "pets": [12, "BG01VP123456", ...], "record": {...}}
+    where "record" holds the fields of the single record forms. Either all records are added or none.
+    """
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    pets = payload.get('pets') if isinstance(payload, dict) else None
+    if not isinstance(pets, list) or not 0 < len(pets) <= settings.CAMPAIGN_MAX_PETS:
+        return JsonResponse({'error': f'Between 1 and {settings.CAMPAIGN_MAX_PETS} pets are required'}, status=400)
+
+    try:
+        records = record_campaign(request.user, payload.get('record_type'), pets, payload.get('record') or {})
+    except CampaignError as error:
+        return JsonResponse({'error': error.message, **error.details}, status=error.status)
+
+    return JsonResponse({'created': len(records), 'records': [record.pk for record in records]}, status=201)
+
+
+@require_http_methods(['GET', 'POST'])
+@login_required
+def vaccine_recall(request):
+    """
+    Vaccine batch recall, matched on the batch number and optionally the manufacturer and the vaccine id.
+    GET ?batch_number=...&manufacturer=...&vaccine=...&format=csv|ndjson streams the report of the
+    affected pets and owners. POST with the same fields as JSON queues the notification of the owners
+    and returns the numbers of affected records, pets and owners.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Not authorized'}, status=403)
+
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    else:
+        payload = request.GET
+
+    batch_number = str(payload.get('batch_number') or '')
+    manufacturer = str(payload.get('manufacturer') or '') or None
+    file_format = payload.get('format') or 'csv'
+    try:
+        vaccine_id = int(payload.get('vaccine') or 0) or None
+        records = recalled_records([(batch_number, manufacturer)], vaccine_id)
+    except (TypeError, ValueError) as error:
+        message = str(error) if isinstance(error, RecallError) else 'Invalid vaccine'
+        return JsonResponse({'error': message}, status=400)
+
+    if request.method == 'GET':
+        if file_format not in EXPORT_FORMATS:
+            return JsonResponse({'error': 'Unknown format'}, status=400)
+        response = StreamingHttpResponse(recall_lines(records, file_format), content_type=EXPORT_FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{recall_file_name(batch_number, file_format)}"'
+        return response
+
+    summary = recall_summary(records)
+    if summary.owners:
+        send_vaccine_recall_notifications.delay([(batch_number, manufacturer)], vaccine_id)
+    return JsonResponse(summary._asdict(), status=202)
+
+
 @require_POST
 @login_required
 def verify_access_code(request):
@@ -47,7 +225,7 @@ def verify_access_code(request):
         'pet_id': pet.id,
         'species': pet.species,
         'age': pet.age,
-        'photo_url': pet.photo.url if pet.photo else '',
+        'photo_url': photo_url(pet, 'thumbnail'),
 
         'owners': [
             {
@@ -66,6 +244,8 @@ def get_pet_events(request):
     if not request.user.is_owner:
         return JsonResponse({'error': 'Not authorized'}, status=401)
 
+    # every due date of the last two years is plotted, expired ones included, so the records are read;
+    # the health summary only holds the next due date per pet
     today = timezone.now()
     two_years_ago = today - timedelta(days=730)
 
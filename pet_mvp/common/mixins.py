@@ -1,4 +1,8 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
+from django.utils import translation
 
 
 class TimeStampMixin(models.Model):
@@ -13,3 +17,77 @@ class TimeStampMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+# form widgets placeholder taken from the verbose name of the model field
+VERBOSE_NAME = object()
+
+
+class ConfiguredFieldsMixin:
+    """
+    The mixin class will set up the widgets of a model form once per form class and
+    language instead of on every instance; the forms then only copy the ready fields.
+
+    field_config maps a field name to the setup of that field: a 'widget' replacing
+    the default one, 'attrs' added to the widget, a 'placeholder' (VERBOSE_NAME for
+    the capitalized verbose name of the model field), a 'label', a 'help_text' and
+    'required'. Fields without config get the default_attrs and, if
+    verbose_name_placeholders is set, the verbose name placeholder.
+    """
+
+    field_config = {}
+    default_attrs = {}
+    verbose_name_placeholders = True
+
+    # (form class, language) -> configured fields
+    _configured_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        # the form deep copies its fields from base_fields
+        self.base_fields = self.configured_fields()
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def configured_fields(cls):
+        key = (cls, translation.get_language())
+        fields = cls._configured_fields.get(key)
+
+        if fields is None:
+            fields = copy.deepcopy(cls.base_fields)
+            for field_name, field in fields.items():
+                cls.configure_field(field_name, field)
+            cls._configured_fields[key] = fields
+
+        return fields
+
+    @classmethod
+    def configure_field(cls, field_name, field):
+        """Apply the setup of one field; override for fields matched by pattern."""
+        if field_name not in cls.field_config:
+            field.widget.attrs.update(cls.default_attrs)
+            if cls.verbose_name_placeholders:
+                cls.set_placeholder(field_name, field, VERBOSE_NAME)
+            return
+
+        config = cls.field_config[field_name]
+
+        if 'widget' in config:
+            field.widget = copy.deepcopy(config['widget'])
+
+        for attribute in ('label', 'help_text', 'required'):
+            if attribute in config:
+                setattr(field, attribute, config[attribute])
+
+        if 'placeholder' in config:
+            cls.set_placeholder(field_name, field, config['placeholder'])
+        field.widget.attrs.update(config.get('attrs', {}))
+
+    @classmethod
+    def set_placeholder(cls, field_name, field, placeholder):
+        if placeholder is VERBOSE_NAME:
+            try:
+                placeholder = str(cls._meta.model._meta.get_field(field_name).verbose_name).capitalize()
+            except FieldDoesNotExist:
+                return
+
+        field.widget.attrs['placeholder'] = placeholder
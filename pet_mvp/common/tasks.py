@@ -1,4 +1,3 @@
-from itertools import chain
 import requests
 from django.conf import settings
 from django.utils.timezone import now
@@ -6,21 +5,76 @@ from datetime import timedelta
 from celery import shared_task
 
 from pet_mvp.accounts.models import Clinic, Groomer, Store
+from pet_mvp.common.utils import id_ranges, dispatch_shards
+
+VENUE_MODELS = {
+    'clinic': Clinic,
+    'groomer': Groomer,
+    'store': Store,
+}
+
 
 @shared_task
 def geocode_venues_coordinates_task():
+    """
+    Weekly task geocoding the venues without coordinates or with recently updated addresses.
+    Each venue type is split by id range into shards which run in parallel across the workers.
+    """
+    shards = [
+        (venue_type, first, last)
+        for venue_type, model in VENUE_MODELS.items()
+        for first, last in id_ranges(model.objects.all(), settings.DAILY_JOB_SHARD_SIZE)
+    ]
+
+    result = dispatch_shards(geocode_venues_shard, shards, collect_geocode_shards.s())
+
+    if len(shards) > 1:
+        return {"shards": len(shards)}
+    return result
+
+
+def geocode_venue(venue, api_key):
+    """
+    Looks up the coordinates of a venue's address and saves them.
+
+    Raises:
+        ValueError: if the address is not found, with the status of the geocoding API
+    """
+    address = f"{venue.address}, {venue.user.city}, {venue.user.country}"
+    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    params = {"address": address, "key": api_key}
+
+    response = requests.get(url, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+
+    if data.get("status") != "OK":
+        raise ValueError(data.get("status"))
+
+    location = data["results"][0]["geometry"]["location"]
+    venue.latitude = location["lat"]
+    venue.longitude = location["lng"]
+    venue.save()
+
+
+@shared_task
+def geocode_venues_shard(venue_type, first_id, last_id):
+    """
+    Geocodes the venues of an id range. A venue which fails is reported in the failures
+    instead of raising, so the other venues and shards are still geocoded and aggregated.
+    """
     api_key = settings.GOOGLE_GEOCODING_API_KEY
     updated_count = 0
     failures = []
 
-    # Efficient lazy evaluation
-    all_venues = chain(
-        Clinic.objects.select_related("user"),
-        Groomer.objects.select_related("user"),
-        Store.objects.select_related("user"),
+    venues = (
+        VENUE_MODELS[venue_type].objects
+        .select_related("user")
+        .filter(pk__range=(first_id, last_id))
+        .iterator(chunk_size=500)
     )
 
-    for venue in all_venues:
+    for venue in venues:
         needs_geocoding = (
             venue.latitude is None or
             venue.longitude is None or
@@ -30,28 +84,24 @@ def geocode_venues_coordinates_task():
         if not needs_geocoding:
             continue
 
-        address = f"{venue.address}, {venue.user.city}, {venue.user.country}"
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
-        params = {"address": address, "key": api_key}
-
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            geocode_venue(venue, api_key)
         except Exception as e:
             failures.append((venue.id, str(e)))
             continue
 
-        if data.get("status") == "OK":
-            location = data["results"][0]["geometry"]["location"]
-            venue.latitude = location["lat"]
-            venue.longitude = location["lng"]
-            venue.save()
-            updated_count += 1
-        else:
-            failures.append((venue.id, data.get("status")))
+        updated_count += 1
 
     return {
         "updated": updated_count,
         "failures": failures,
     }
+
+
+@shared_task
+def collect_geocode_shards(results):
+    """Chord callback adding up the updated venues and failures of the geocoding shards"""
+    return {
+        "updated": sum(result["updated"] for result in results),
+        "failures": [failure for result in results for failure in result["failures"]],
+    }
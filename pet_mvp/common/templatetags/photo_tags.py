@@ -0,0 +1,24 @@
+from django import template
+
+from pet_mvp.pets.photos import fitting_rendition, photo_srcset, photo_url
+
+register = template.Library()
+
+
+@register.inclusion_tag('partials/pet_photo.html')
+def pet_photo(pet, size, css_class=''):
+    """
+    Renders the photo of a pet shown at size pixels, letting the browser pick
+    the WebP or JPEG rendition fitting the screen from the srcset.
+    Photos without renditions yet are shown as uploaded.
+    """
+    renditions = pet.photo_renditions or {}
+    return {
+        'pet': pet,
+        'size': size,
+        'css_class': css_class,
+        'has_renditions': bool(renditions.get('digest')),
+        'src': photo_url(pet, fitting_rendition(size)),
+        'webp_srcset': photo_srcset(renditions, 'webp'),
+        'jpeg_srcset': photo_srcset(renditions, 'jpeg'),
+    }
@@ -1,9 +1,15 @@
+import base64
+import binascii
+import json
 import os
 
 
 from math import radians, cos, sin, asin, sqrt
+from celery import chord
 from django.utils.translation import gettext as _
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Max, Min, Q
 from PIL import Image
 
 
@@ -88,4 +94,130 @@ def haversine(lat1, lon1, lat2, lon2):
     a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
     c = 2 * asin(sqrt(a))
 
-    return R * c
\ No newline at end of file
+    return R * c
+
+
+def id_ranges(queryset, shard_size):
+    """
+    Split the primary keys of a queryset into inclusive (first, last) ranges
+    spanning at most shard_size ids, used to shard the daily jobs.
+    """
+    bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return []
+
+    return [
+        (first, min(first + shard_size - 1, bounds['last']))
+        for first in range(bounds['first'], bounds['last'] + 1, shard_size)
+    ]
+
+
+def dispatch_shards(shard_task, shards, callback):
+    """
+    Run a shard task per argument tuple as a celery chord, with the callback aggregating
+    the shard results. A single shard runs in the current task, skipping the fan-out.
+
+    Args:
+        shard_task: celery task called with the arguments of each shard
+        shards (list): argument tuples, e.g. built from id_ranges
+        callback (Signature): task called with the list of shard results
+    Returns:
+        the callback result when run inline, otherwise None
+    """
+    if len(shards) <= 1:
+        return callback([shard_task(*shard) for shard in shards])
+
+    chord(shard_task.s(*shard) for shard in shards)(callback)
+
+
+def encode_cursor(values):
+    """Encode the ordering values of the last item of a page as an opaque url-safe cursor."""
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Returns the ordering values of a cursor, or None when the cursor is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def cursor_values(model, ordering, values):
+    """
+    Convert the decoded values of a cursor to the types of the ordering fields.
+
+    Returns:
+        list: values usable by keyset_filter, or None when they do not fit the ordering
+    """
+    if values is None or len(values) != len(ordering):
+        return None
+
+    fields = [
+        model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        for name in (field.lstrip('-') for field in ordering)
+    ]
+    try:
+        converted = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError, ValueError):
+        return None
+    # a null would make the seek condition skip every row
+    return converted if None not in converted else None
+
+
+def keyset_filter(ordering, values):
+    """
+    Filter for the rows after the given values in the ordering, i.e. the seek condition
+    of keyset pagination. The ordering must end with a unique field such as 'pk'.
+
+    Args:
+        ordering (list): order_by() fields, '-' prefixed when descending
+        values (list): values of the ordering fields of the last row seen
+    Returns:
+        Q: rows strictly after the last row seen
+    """
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {ordering_field.lstrip('-'): value for ordering_field, value in zip(ordering[:position], values)}
+        condition |= Q(**equal, **{f'{name}__{lookup}': values[position]})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor, page_size):
+    """
+    Order a queryset and limit it to the page after the cursor, plus one row telling
+    whether there is a next page. The rows are not fetched, so the result can be used
+    as the queryset of a Prefetch.
+
+    Args:
+        queryset (QuerySet): rows to paginate
+        ordering (list): order_by() fields ending with a unique field
+        cursor (str): cursor of the previous page; missing, malformed or mistyped cursors give the first page
+        page_size (int): rows per page
+    Returns:
+        QuerySet: at most page_size + 1 rows
+    """
+    values = cursor_values(queryset.model, ordering, decode_cursor(cursor))
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return queryset.order_by(*ordering)[:page_size + 1]
+
+
+def split_keyset_page(rows, ordering, page_size):
+    """
+    Split the rows fetched by keyset_page into the page and the cursor of the next page.
+
+    Returns:
+        tuple: list of at most page_size rows and the next cursor, or None on the last page
+    """
+    rows = list(rows)
+    if len(rows) <= page_size:
+        return rows, None
+    page = rows[:page_size]
+    return page, encode_cursor([getattr(page[-1], field.lstrip('-')) for field in ordering])
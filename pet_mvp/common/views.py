@@ -6,6 +6,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.utils.translation import gettext as _
 from django.views import generic as views
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.http import HttpResponse
 
@@ -65,7 +66,8 @@ class DashboardView(views.TemplateView):
         context['GOOGLE_MAPS_API_KEY'] = os.environ.get('GOOGLE_MAPS_API_KEY')
 
         user = self.request.user
-        pets = user.pets.all()
+        # the health summary of each pet is joined in, instead of scanning its records
+        pets = user.pets.select_related('health_summary')
         context['pets'] = pets
 
         return context
@@ -85,11 +87,15 @@ class ClinicDashboardView(views.TemplateView):
         context = super().get_context_data(**kwargs)
         vet = self.request.user
 
-        # Only include currently valid pet access
+        # Only include currently valid pet access; the health badges come from the summary row,
+        # so the page costs the same number of queries however many pets are listed
         accessible_pets = Pet.objects.filter(
             vetpetaccess__vet=vet,
             vetpetaccess__expires_at__gt=timezone.now()
-        ).distinct()
+        ).distinct().select_related('health_summary').prefetch_related(
+            # the owner names are read from the owner profiles
+            Prefetch('owners', queryset=UserModel.objects.select_related('owner'))
+        )
 
         context['accessible_pets'] = accessible_pets
         return context
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DrugsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pet_mvp.drugs'
+
+    def ready(self):
+        import pet_mvp.drugs.signals
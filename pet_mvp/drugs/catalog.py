@@ -0,0 +1,170 @@
+"""
+Per-process cache of the Vaccine and Drug catalog offered by the record forms.
+
+The vaccine and treatment forms offer the catalog of the pet's species, and a
+formset builds such a form per row and again for its empty form. The entries are
+therefore read once per model, species and language and shared by all forms.
+Saving or deleting a catalog entry bumps the shared CatalogVersion row; every
+process compares its copy to that row, at most every RECORD_CATALOG_SYNC_INTERVAL
+seconds, and drops its entries when the catalog changed elsewhere.
+The submitted choice is still validated against the database.
+
+The examination page does not render the options at all: it loads a compact JSON
+catalog of the species, whose URL carries the shared catalog version and a hash of
+its content, so the browser keeps it until the catalog changes. Once their sync
+interval has passed, all workers give out the same URL.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import translation
+
+from pet_mvp.drugs.models import Vaccine, Drug, CatalogVersion
+
+CatalogEntry = namedtuple(
+    'CatalogEntry', ['pk', 'name', 'name_en', 'notes', 'recommended_interval_days', 'is_antiparasite']
+)
+
+# (model label, species, language) -> tuple of CatalogEntry
+_entries = {}
+# (species, language) -> version and JSON body of the client-side catalog
+_payloads = {}
+# shared catalog version the cached entries belong to, and time.monotonic() of its last comparison
+_synced = {'version': None, 'checked_at': None}
+_lock = threading.Lock()
+
+
+def shared_version():
+    """Current version of the catalog shared by all processes, 0 before its first change."""
+    return CatalogVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_catalog_version():
+    """Mark the catalog as changed for every process."""
+    if not CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        _version, created = CatalogVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+        if not created:
+            CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1)
+
+
+def sync_catalog(max_age=0):
+    """
+    Drop the cached entries if the shared catalog version changed since they were read.
+
+    Args:
+        max_age (int): seconds during which the last comparison is trusted without a query
+    Returns:
+        int: shared catalog version the cached entries belong to
+    """
+    now = time.monotonic()
+    checked_at = _synced['checked_at']
+    if checked_at is not None and now - checked_at < max_age:
+        return _synced['version']
+
+    version = shared_version()
+    with _lock:
+        if version != _synced['version']:
+            _entries.clear()
+            _payloads.clear()
+            _synced['version'] = version
+        _synced['checked_at'] = now
+    return version
+
+
+def catalog_entries(model, species):
+    """
+    Catalog entries suitable for a species, labelled in the active language.
+
+    Args:
+        model (Model): Vaccine or Drug
+        species (str): species as stored in 'suitable_for', e.g. 'dog'
+    Returns:
+        tuple: CatalogEntry per entry, shared by all callers until the catalog changes
+    """
+    version = sync_catalog(settings.RECORD_CATALOG_SYNC_INTERVAL)
+    key = (model._meta.label, species, translation.get_language())
+    entries = _entries.get(key)
+
+    if entries is None:
+        entries = tuple(
+            CatalogEntry(
+                pk=item.pk,
+                name=item.name,
+                # English name used by the forms' scripts, present only with the translation fields
+                name_en=getattr(item, 'name_en', item.name),
+                notes=item.notes,
+                recommended_interval_days=item.recommended_interval_days,
+                is_antiparasite=getattr(item, 'is_antiparasite', False),
+            )
+            for item in model.objects.filter(suitable_for=species)
+        )
+        with _lock:
+            # entries read while another thread found a newer version are not kept
+            if _synced['version'] == version:
+                _entries[key] = entries
+
+    return entries
+
+
+def catalog_payload(species):
+    """
+    Compact JSON catalog of the vaccines and drugs suitable for a species, in the active language.
+
+    Args:
+        species (str): species as stored in 'suitable_for', e.g. 'dog'
+    Returns:
+        tuple: shared catalog version with a hash of the content, and the JSON body as bytes
+    """
+    version = sync_catalog(settings.RECORD_CATALOG_SYNC_INTERVAL)
+    key = (species, translation.get_language())
+    payload = _payloads.get(key)
+
+    if payload is None:
+        body = json.dumps(
+            {
+                'vaccines': [catalog_item(entry, species) for entry in catalog_entries(Vaccine, species)],
+                'drugs': [catalog_item(entry, species) for entry in catalog_entries(Drug, species)],
+            },
+            separators=(',', ':'),
+            ensure_ascii=False,
+        ).encode()
+        # '.' is left alone by escapejs, so the page prints the URL as is
+        payload = f'{version}.{hashlib.sha256(body).hexdigest()[:12]}', body
+        with _lock:
+            if _synced['version'] == version:
+                _payloads[key] = payload
+
+    return payload
+
+
+def catalog_item(entry, species):
+    item = {
+        'id': entry.pk,
+        'name': entry.name,
+        'species': species,
+        'recommended_interval_days': entry.recommended_interval_days,
+    }
+    # the page script recognizes e.g. the rabies vaccine by its English name
+    if entry.name_en != entry.name:
+        item['name_en'] = entry.name_en
+    return item
+
+
+def clear_catalog(model=None):
+    """Drop the cached entries of a model, or of all models if none is given."""
+    with _lock:
+        _payloads.clear()
+        # the next read compares the shared version again
+        _synced['checked_at'] = None
+        if model is None:
+            _entries.clear()
+            _synced['version'] = None
+            return
+
+        for key in [key for key in _entries if key[0] == model._meta.label]:
+            del _entries[key]
@@ -65,6 +65,18 @@ class Drug(BaseMedication):
     )
 
 
+class CatalogVersion(models.Model):
+    """
+    Single row counting the changes of the Vaccine and Drug catalog. The processes
+    caching the catalog compare their copy to it, see pet_mvp.drugs.catalog.
+    """
+
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name=_('Version'),
+    )
+
+
 class BaseTest(models.Model):
     class Meta:
         abstract = True
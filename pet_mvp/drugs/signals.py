@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from pet_mvp.drugs.catalog import bump_catalog_version, clear_catalog
+from pet_mvp.drugs.models import Vaccine, Drug
+
+
+@receiver(signal=post_save, sender=Vaccine)
+@receiver(signal=post_save, sender=Drug)
+@receiver(signal=post_delete, sender=Vaccine)
+@receiver(signal=post_delete, sender=Drug)
+def invalidate_catalog(sender, **kwargs):
+    """Signal handler to drop the cached form choices of every process when the catalog changes"""
+
+    bump_catalog_version()
+    clear_catalog(sender)
@@ -1,3 +1,62 @@
 from django.contrib import admin
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Register your models here.
+from pet_mvp.notifications.models import ReminderSchedule, Outbox, NotificationLedger
+
+
+@admin.register(ReminderSchedule)
+class ReminderScheduleAdmin(admin.ModelAdmin):
+    list_display = ('record', 'fire_date', 'offset_days', 'channel', 'sent', 'sent_at')
+    list_filter = ('channel', 'sent', 'fire_date')
+    raw_id_fields = ('vaccination_record', 'medication_record')
+    date_hierarchy = 'fire_date'
+    fieldsets = (
+        (_('Record'), {
+            'fields': ('vaccination_record', 'medication_record')
+        }),
+        (_('Schedule'), {
+            'fields': ('fire_date', 'offset_days', 'channel', 'sent', 'sent_at')
+        }),
+    )
+
+
+@admin.register(NotificationLedger)
+class NotificationLedgerAdmin(admin.ModelAdmin):
+    list_display = ('record_type', 'record_id', 'offset_days', 'recipient', 'fire_date', 'created_at')
+    list_filter = ('record_type', 'fire_date')
+    raw_id_fields = ('recipient',)
+    date_hierarchy = 'fire_date'
+    fieldsets = (
+        (_('Reminder'), {
+            'fields': ('record_type', 'record_id', 'offset_days', 'fire_date')
+        }),
+        (_('Delivery'), {
+            'fields': ('recipient', 'created_at')
+        }),
+    )
+    readonly_fields = ('created_at',)
+
+
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to_email')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    date_hierarchy = 'created_at'
+    actions = ('retry_emails',)
+    fieldsets = (
+        (_('Email'), {
+            'fields': ('subject', 'to_email', 'cc', 'from_email', 'html_content')
+        }),
+        (_('Delivery'), {
+            'fields': ('status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at')
+        }),
+    )
+
+    @admin.action(description=_('Retry selected emails'))
+    def retry_emails(self, request, queryset):
+        queryset.exclude(status=Outbox.STATUS_SENT).update(
+            status=Outbox.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
@@ -1,29 +1,30 @@
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.utils import translation
+from django.db import transaction
 from django.conf import settings
 from celery import shared_task
 
+from pet_mvp.notifications import render_cache
+from pet_mvp.notifications.models import Outbox
+
 
 class EmailService:
     """Service for handling email operations using Brevo"""
     @staticmethod
-    def send_email(subject, to_email, html_content, from_email=None, cc=None):
+    def build_email(subject, to_email, html_content, from_email=None, cc=None):
         """
-        Send an email immediately  
+        Build an email with a plain text alternative of the HTML content
         Args:
             subject (str): Email subject
             to_email (str or list): Recipient email address(es)
-            cc (str or list, optional): CC email address(es)
             html_content (str): HTML content of the email
             from_email (str, optional): Sender email address. Defaults to settings.DEFAULT_FROM_EMAIL.
+            cc (str or list, optional): CC email address(es)
         Returns:
-            bool: True if email was sent successfully
+            EmailMultiAlternatives: the email, not sent yet
         """
         if from_email is None:
             from_email = settings.DEFAULT_FROM_EMAIL
-        plain_text = strip_tags(html_content)
+        plain_text = render_cache.plain_text(html_content)
         email = EmailMultiAlternatives(
             subject=subject,
             body=plain_text,
@@ -32,6 +33,22 @@ class EmailService:
             to=[to_email] if isinstance(to_email, str) else to_email
         )
         email.attach_alternative(html_content, "text/html")
+        return email
+
+    @staticmethod
+    def send_email(subject, to_email, html_content, from_email=None, cc=None):
+        """
+        Send an email immediately  
+        Args:
+            subject (str): Email subject
+            to_email (str or list): Recipient email address(es)
+            cc (str or list, optional): CC email address(es)
+            html_content (str): HTML content of the email
+            from_email (str, optional): Sender email address. Defaults to settings.DEFAULT_FROM_EMAIL.
+        Returns:
+            bool: True if email was sent successfully
+        """
+        email = EmailService.build_email(subject, to_email, html_content, from_email, cc)
         return email.send() > 0
 
     @staticmethod
@@ -48,16 +65,84 @@ class EmailService:
         Returns:
             bool: True if email was sent successfully
         """
-        lang = context.get('lang', 'en')
-        with translation.override(lang):
-            html_content = render_to_string(template_name, context)
+        html_content = EmailService.render_template(template_name, context)
         return EmailService.send_email(subject, to_email, html_content, from_email, cc)
 
+    @staticmethod
+    def render_template(template_name, context):
+        """
+        Render an email template in the language given by context['lang'].
+        Repeated renders with an equal context are served from the render cache.
+        Args:
+            template_name (str): Name of the template to use
+            context (dict): Context data for the template
+        Returns:
+            str: HTML content of the email
+        """
+        return render_cache.render_template(template_name, context)
+
+    @staticmethod
+    def queue_emails(messages):
+        """
+        Write emails to the outbox within the caller's transaction.
+        The outbox is drained once the transaction commits.
+        Args:
+            messages (iterable): dicts with the keyword arguments of send_email
+        Returns:
+            int: Number of emails queued
+        """
+        def as_list(addresses):
+            return [] if addresses is None else [addresses] if isinstance(addresses, str) else list(addresses)
+
+        emails = []
+        for message in messages:
+            to_email = [address for address in as_list(message['to_email']) if address]
+            # nothing would be delivered, e.g. ADMIN_EMAIL is not configured
+            if not to_email:
+                continue
+            emails.append(Outbox(
+                subject=message['subject'],
+                to_email=to_email,
+                cc=as_list(message.get('cc')),
+                from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+                html_content=message['html_content'],
+            ))
+
+        if not emails:
+            return 0
+
+        Outbox.objects.bulk_create(emails)
+
+        from pet_mvp.notifications.tasks import drain_email_outbox
+        transaction.on_commit(drain_email_outbox.delay)
+
+        return len(emails)
+
+    @staticmethod
+    def queue_template_emails(messages):
+        """
+        Render templated emails and write them to the outbox
+        Args:
+            messages (iterable): dicts with the keyword arguments of send_template_email
+        Returns:
+            int: Number of emails queued
+        """
+        return EmailService.queue_emails(
+            {
+                'subject': message['subject'],
+                'to_email': message['to_email'],
+                'html_content': EmailService.render_template(message['template_name'], message['context']),
+                'from_email': message.get('from_email'),
+                'cc': message.get('cc'),
+            }
+            for message in messages
+        )
+
     @staticmethod
     @shared_task
     def send_email_async(subject, to_email, html_content, from_email=None):
         """
-        Send an email asynchronously using Celery
+        Send an email asynchronously using Celery, through the outbox
 
         Args:
             subject (str): Email subject
@@ -66,15 +151,20 @@ class EmailService:
             from_email (str, optional): Sender email address. Defaults to settings.DEFAULT_FROM_EMAIL.
 
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
         """
-        return EmailService.send_email(subject, to_email, html_content, from_email)
+        return EmailService.queue_emails([{
+            'subject': subject,
+            'to_email': to_email,
+            'html_content': html_content,
+            'from_email': from_email,
+        }]) > 0
 
     @staticmethod
     @shared_task
     def send_template_email_async(subject, to_email, template_name, context, from_email=None, cc=None):
         """
-        Send a templated email asynchronously using Celery
+        Send a templated email asynchronously using Celery, through the outbox
 
         Args:
             subject (str): Email subject
@@ -85,6 +175,27 @@ class EmailService:
             from_email (str, optional): Sender email address. Defaults to settings.DEFAULT_FROM_EMAIL.
 
         Returns:
-            bool: True if email was sent successfully
+            bool: True if email was queued successfully
+        """
+        return EmailService.queue_template_emails([{
+            'subject': subject,
+            'to_email': to_email,
+            'template_name': template_name,
+            'context': context,
+            'from_email': from_email,
+            'cc': cc,
+        }]) > 0
+
+    @staticmethod
+    @shared_task
+    def send_template_emails_async(messages):
+        """
+        Send a batch of templated emails asynchronously using Celery, through the outbox
+
+        Args:
+            messages (list): dicts with the keyword arguments of send_template_email
+
+        Returns:
+            int: Number of emails queued
         """
-        return EmailService.send_template_email(subject, to_email, template_name, context, from_email, cc)
+        return EmailService.queue_template_emails(messages)
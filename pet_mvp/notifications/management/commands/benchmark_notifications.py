@@ -0,0 +1,261 @@
+"""
+Throughput benchmark of the notification pipeline.
+
+Seeds owners, pets and expiring records with bulk inserts, runs the expiration
+tasks eagerly and drains the outbox into the configured sink backend (the locmem
+backend by default, or e.g. the SMTP backend pointed at a local sink). Everything
+seeded is rolled back afterwards, and the results are written as JSON.
+
+Usage:
+    python manage.py benchmark_notifications --pets 10000 100000 --output bench_notifications.json
+"""
+import json
+import platform
+import resource
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from pet_mvp.celery import app as celery_app
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.notifications import render_cache
+from pet_mvp.notifications.outbox import drain_outbox
+from pet_mvp.notifications.reminders import schedule_reminders
+from pet_mvp.notifications.tasks import send_vaccine_expiration_notifications, \
+    send_treatment_expiration_notifications, send_expiration_digest_notifications
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+# rows per INSERT while seeding
+SEED_BATCH_SIZE = 5000
+
+# days before expiration of the seeded records, a reminder offset of both record types
+SEED_EXPIRES_IN_DAYS = 7
+
+
+class BenchmarkRollback(Exception):
+    """Raised to roll back the data seeded for a run."""
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries without keeping their SQL."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class RenderCounter:
+    """Counts the templates actually rendered, i.e. the misses of the render cache."""
+
+    def __init__(self):
+        self.count = 0
+        self.render_to_string = render_cache.render_to_string
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.render_to_string(*args, **kwargs)
+
+    def __enter__(self):
+        render_cache.render_to_string = self
+        return self
+
+    def __exit__(self, *exc_info):
+        render_cache.render_to_string = self.render_to_string
+
+
+def peak_rss_kb():
+    """Peak resident set size of the process in KB (ru_maxrss is in bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if platform.system() == 'Darwin' else peak
+
+
+class Command(BaseCommand):
+    help = "Benchmark the expiration notification pipeline on seeded data and write the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pets', type=int, nargs='+', default=[10000],
+            help="Number of pets to seed, one run per value, e.g. --pets 10000 100000 1000000",
+        )
+        parser.add_argument(
+            '--pets-per-owner', type=int, default=2,
+            help="Pets sharing an owner, so digests group several reminders",
+        )
+        parser.add_argument(
+            '--output', default='bench_notifications.json',
+            help="Path of the JSON results file",
+        )
+        parser.add_argument(
+            '--email-backend', default='django.core.mail.backends.locmem.EmailBackend',
+            help="Backend the outbox is drained to",
+        )
+
+    def handle(self, *args, **options):
+        runs = []
+        for pets in options['pets']:
+            self.stdout.write(f"Benchmarking {pets} pets...")
+            run = self.benchmark(pets, options['pets_per_owner'], options['email_backend'])
+            runs.append(run)
+            self.stdout.write(
+                f"  {run['emails']} emails in {run['wall_seconds']:.2f}s, "
+                f"{run['queries_per_email']:.3f} queries/email, "
+                f"{run['renders_per_second']:.0f} renders/s, peak RSS {run['peak_rss_kb']} KB"
+            )
+
+        results = {
+            'benchmark': 'notifications',
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'email_backend': options['email_backend'],
+            'shard_size': settings.DAILY_JOB_SHARD_SIZE,
+            'runs': runs,
+        }
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def benchmark(self, pets, pets_per_owner, email_backend):
+        """
+        Seed the data of one run, time the pipeline and roll everything back.
+
+        Returns:
+            dict: measurements of the run
+        """
+        run = {}
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        render_cache.local_cache.clear()
+        mail.outbox = []
+
+        try:
+            with override_settings(EMAIL_BACKEND=email_backend), transaction.atomic():
+                started = time.perf_counter()
+                records = self.seed(pets, pets_per_owner)
+                run['seed_seconds'] = time.perf_counter() - started
+
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries), RenderCounter() as renders:
+                    started = time.perf_counter()
+                    send_vaccine_expiration_notifications()
+                    send_treatment_expiration_notifications()
+                    send_expiration_digest_notifications()
+                    run['enqueue_seconds'] = time.perf_counter() - started
+
+                    # the drain queued on commit never runs, as the run is rolled back
+                    started = time.perf_counter()
+                    emails = drain_outbox()
+                    run['drain_seconds'] = time.perf_counter() - started
+
+                wall_seconds = run['enqueue_seconds'] + run['drain_seconds']
+                run.update({
+                    'pets': pets,
+                    'records': records,
+                    'emails': emails,
+                    'wall_seconds': wall_seconds,
+                    'queries': queries.count,
+                    'queries_per_email': queries.count / emails if emails else 0,
+                    'renders': renders.count,
+                    'renders_per_second': renders.count / wall_seconds if wall_seconds else 0,
+                    'emails_per_second': emails / wall_seconds if wall_seconds else 0,
+                    'peak_rss_kb': peak_rss_kb(),
+                })
+                raise BenchmarkRollback
+        except BenchmarkRollback:
+            pass
+        finally:
+            celery_app.conf.task_always_eager = always_eager
+            mail.outbox = []
+
+        return run
+
+    def seed(self, pets, pets_per_owner):
+        """
+        Bulk insert owners, pets and a vaccination and a medication record per pet
+        expiring in SEED_EXPIRES_IN_DAYS days, together with their reminder schedule.
+        Half of the owners receive separate reminders, the other half the daily digest.
+
+        Returns:
+            int: number of records seeded
+        """
+        today = timezone.now().date()
+        password = make_password('benchmark')
+        owners_count = -(-pets // pets_per_owner)
+
+        vaccine = Vaccine.objects.create(name='Benchmark vaccine', notes='Benchmark', suitable_for='dog')
+        drug = Drug.objects.create(name='Benchmark drug', notes='Benchmark', suitable_for='dog')
+
+        owners = UserModel.objects.bulk_create(
+            (
+                UserModel(
+                    email=f'benchmark{i}@example.com',
+                    password=password,
+                    is_owner=True,
+                    reminder_delivery=UserModel.REMINDER_SINGLE if i % 2 else UserModel.REMINDER_DIGEST,
+                )
+                for i in range(owners_count)
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+
+        created_pets = Pet.objects.bulk_create(
+            (
+                Pet(
+                    name=f'Benchmark pet {i}',
+                    species='dog',
+                    breed='other',
+                    sex='male',
+                    date_of_birth=today - timedelta(days=365),
+                    color='Brown',
+                    features='Benchmark pet',
+                    current_weight=10,
+                )
+                for i in range(pets)
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+
+        PetOwner = Pet.owners.through
+        PetOwner.objects.bulk_create(
+            (
+                PetOwner(pet_id=pet.pk, appuser_id=owners[i // pets_per_owner].pk)
+                for i, pet in enumerate(created_pets)
+            ),
+            batch_size=SEED_BATCH_SIZE,
+        )
+
+        # dates the reminders of today fire for
+        valid_until = today + timedelta(days=SEED_EXPIRES_IN_DAYS)
+        record_sets = (
+            (VaccinationRecord, {'vaccine': vaccine}),
+            (MedicationRecord, {'medication': drug}),
+        )
+
+        for model, catalog_item in record_sets:
+            for start in range(0, pets, SEED_BATCH_SIZE):
+                records = model.objects.bulk_create([
+                    model(pet=pet, valid_until=valid_until, **catalog_item)
+                    for pet in created_pets[start:start + SEED_BATCH_SIZE]
+                ])
+                # bulk_create skips the post_save signal scheduling the reminders
+                schedule_reminders(records, today)
+
+        return 2 * pets
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('records', '0026_vaccinationrecord_is_editable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fire_date', models.DateField(verbose_name='Fire date')),
+                ('offset_days', models.PositiveIntegerField(verbose_name='Days before expiration')),
+                ('channel', models.CharField(choices=[('digest', 'One daily summary email'), ('single', 'A separate email for each reminder')], max_length=10, verbose_name='Channel')),
+                ('sent', models.BooleanField(default=False, verbose_name='Sent')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent at')),
+                ('medication_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='records.medicationrecord')),
+                ('vaccination_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='records.vaccinationrecord')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('sent', False)), fields=['channel', 'fire_date'], name='reminder_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vaccination_record', 'fire_date', 'channel'), name='unique_vaccination_reminder'), models.UniqueConstraint(fields=('medication_record', 'fire_date', 'channel'), name='unique_medication_reminder'), models.CheckConstraint(condition=models.Q(models.Q(('medication_record__isnull', True), ('vaccination_record__isnull', False)), models.Q(('medication_record__isnull', False), ('vaccination_record__isnull', True)), _connector='OR'), name='reminder_single_record')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+import datetime
+
+from django.conf import settings
+from django.db import migrations
+
+CHANNELS = ('digest', 'single')
+
+
+def backfill_reminder_schedule(apps, schema_editor):
+    ReminderSchedule = apps.get_model('notifications', 'ReminderSchedule')
+    VaccinationRecord = apps.get_model('records', 'VaccinationRecord')
+    MedicationRecord = apps.get_model('records', 'MedicationRecord')
+
+    today = datetime.date.today()
+
+    for model, record_field, offsets in (
+            (VaccinationRecord, 'vaccination_record_id', settings.VACCINE_REMINDER_OFFSETS),
+            (MedicationRecord, 'medication_record_id', settings.TREATMENT_REMINDER_OFFSETS),
+    ):
+        records = model.objects.filter(valid_until__gte=today).values_list('pk', 'valid_until')
+
+        reminders = []
+        for pk, valid_until in records.iterator(chunk_size=2000):
+            for days in offsets:
+                fire_date = valid_until - datetime.timedelta(days=days)
+                if fire_date < today:
+                    continue
+                for channel in CHANNELS:
+                    reminders.append(ReminderSchedule(
+                        **{record_field: pk},
+                        fire_date=fire_date,
+                        offset_days=days,
+                        channel=channel,
+                    ))
+
+            if len(reminders) >= 2000:
+                ReminderSchedule.objects.bulk_create(reminders, ignore_conflicts=True)
+                reminders = []
+
+        ReminderSchedule.objects.bulk_create(reminders, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reminder_schedule, migrations.RunPython.noop),
+    ]
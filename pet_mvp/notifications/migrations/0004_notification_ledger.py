@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 12:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('vaccination', 'Vaccination'), ('medication', 'Medication')], max_length=12, verbose_name='Record type')),
+                ('record_id', models.PositiveIntegerField(verbose_name='Record ID')),
+                ('offset_days', models.PositiveIntegerField(verbose_name='Days before expiration')),
+                ('fire_date', models.DateField(verbose_name='Fire date')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Recipient')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('record_type', 'record_id', 'offset_days', 'recipient', 'fire_date'), name='unique_notification_ledger')],
+            },
+        ),
+    ]
@@ -1,3 +1,260 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+
+UserModel = get_user_model()
+
+
+class ReminderSchedule(models.Model):
+    """
+    One row per (record, fire date, channel), precomputed when a record is written,
+    so the daily reminder jobs only scan what is due.
+    """
+    CHANNEL_CHOICES = UserModel.REMINDER_DELIVERY_CHOICES
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['channel', 'fire_date'],
+                condition=Q(sent=False),
+                name='reminder_due_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vaccination_record', 'fire_date', 'channel'],
+                name='unique_vaccination_reminder',
+            ),
+            models.UniqueConstraint(
+                fields=['medication_record', 'fire_date', 'channel'],
+                name='unique_medication_reminder',
+            ),
+            models.CheckConstraint(
+                condition=(
+                    Q(vaccination_record__isnull=False, medication_record__isnull=True) |
+                    Q(vaccination_record__isnull=True, medication_record__isnull=False)
+                ),
+                name='reminder_single_record',
+            ),
+        ]
+
+    vaccination_record = models.ForeignKey(
+        to=VaccinationRecord,
+        on_delete=models.CASCADE,
+        related_name='reminders',
+        null=True,
+        blank=True,
+    )
+
+    medication_record = models.ForeignKey(
+        to=MedicationRecord,
+        on_delete=models.CASCADE,
+        related_name='reminders',
+        null=True,
+        blank=True,
+    )
+
+    fire_date = models.DateField(
+        verbose_name=_('Fire date'),
+    )
+
+    offset_days = models.PositiveIntegerField(
+        verbose_name=_('Days before expiration'),
+    )
+
+    channel = models.CharField(
+        max_length=10,
+        choices=CHANNEL_CHOICES,
+        verbose_name=_('Channel'),
+    )
+
+    sent = models.BooleanField(
+        default=False,
+        verbose_name=_('Sent'),
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Sent at'),
+    )
+
+    @property
+    def record(self):
+        return self.vaccination_record or self.medication_record
+
+    def __str__(self):
+        return f"{self.record} - {self.fire_date} ({self.channel})"
+
+
+class NotificationLedger(models.Model):
+    """
+    One row per reminder handed to the outbox, claimed before the email is built,
+    so a re-run of a crashed or duplicated job skips the reminders already sent.
+    """
+    RECORD_VACCINATION = 'vaccination'
+    RECORD_MEDICATION = 'medication'
+
+    RECORD_TYPE_CHOICES = (
+        (RECORD_VACCINATION, _('Vaccination')),
+        (RECORD_MEDICATION, _('Medication')),
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['record_type', 'record_id', 'offset_days', 'recipient', 'fire_date'],
+                name='unique_notification_ledger',
+            ),
+        ]
+
+    record_type = models.CharField(
+        max_length=12,
+        choices=RECORD_TYPE_CHOICES,
+        verbose_name=_('Record type'),
+    )
+
+    # no foreign key, the ledger outlives edits and deletes of the record
+    record_id = models.PositiveIntegerField(
+        verbose_name=_('Record ID'),
+    )
+
+    offset_days = models.PositiveIntegerField(
+        verbose_name=_('Days before expiration'),
+    )
+
+    recipient = models.ForeignKey(
+        to=UserModel,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Recipient'),
+    )
+
+    fire_date = models.DateField(
+        verbose_name=_('Fire date'),
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Created at'),
+    )
+
+    def __str__(self):
+        return f"{self.record_type} {self.record_id} - {self.fire_date} ({self.offset_days})"
+
+
+class Outbox(models.Model):
+    """
+    Rendered email waiting to be sent. Rows are written in the caller's transaction
+    and drained in batches, so an email is not lost when a worker crashes.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_DEAD, _('Dead')),
+    )
+
+    class Meta:
+        verbose_name = _('Outbox email')
+        verbose_name_plural = _('Outbox')
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=Q(status='pending'),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    subject = models.CharField(
+        max_length=255,
+        verbose_name=_('Subject'),
+    )
+
+    to_email = models.JSONField(
+        verbose_name=_('To'),
+    )
+
+    cc = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_('CC'),
+    )
+
+    from_email = models.CharField(
+        max_length=254,
+        verbose_name=_('From'),
+    )
+
+    html_content = models.TextField(
+        verbose_name=_('HTML content'),
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name=_('Status'),
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name=_('Attempts'),
+    )
+
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_('Next attempt at'),
+    )
+
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_('Last error'),
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_('Created at'),
+    )
+
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_('Sent at'),
+    )
+
+    def mark_sent(self):
+        self.status = self.STATUS_SENT
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ''
+
+    def mark_failed(self, error, max_attempts, retry_delay, retry_after=None, permanent=False):
+        """
+        Schedules the next attempt with jittered exponential backoff, not earlier than
+        retry_after seconds, or dead-letters the email.
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+
+        if permanent or self.attempts >= max_attempts:
+            self.status = self.STATUS_DEAD
+        else:
+            # jitter spreads the retries of a failed batch instead of replaying it at once
+            backoff = retry_delay * 2 ** (self.attempts - 1)
+            delay = max(random.uniform(backoff / 2, backoff), retry_after or 0)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.subject} - {', '.join(self.to_email)} ({self.status})"
@@ -0,0 +1,199 @@
+"""
+Batched delivery of the email outbox.
+
+Pending rows are claimed a batch at a time and sent over a single email backend
+connection, so the SMTP handshake or the provider session is shared by the whole
+batch. A batch is claimed in a short transaction which moves the rows OUTBOX_LEASE
+seconds into the future, so no lock or transaction is held while the emails are
+sent, and the rows of a drain which crashed are picked up once the lease is over.
+Every row keeps its own retry state; after OUTBOX_MAX_ATTEMPTS failures it is
+dead-lettered and left for inspection in the admin.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.models import Outbox
+from pet_mvp.notifications.rate_limit import RateLimiter
+
+OUTBOX_UPDATE_FIELDS = ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+
+ERROR_THROTTLED = 'throttled'
+ERROR_PERMANENT = 'permanent'
+ERROR_TRANSIENT = 'transient'
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait, from the Retry-After header of an HTTP API error."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers['Retry-After'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+def classify_error(error):
+    """
+    Sort a send failure into throttled, permanent or transient.
+    HTTP APIs (Anymail) report 429 when throttled, other 4xx are permanent and 5xx are retried.
+    SMTP servers throttle with 421/451, other 4xx replies are retried and 5xx are permanent.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        if status_code == 429:
+            return ERROR_THROTTLED
+        if 400 <= status_code < 500:
+            return ERROR_PERMANENT
+        return ERROR_TRANSIENT
+
+    smtp_code = getattr(error, 'smtp_code', None)
+    if smtp_code in (421, 451):
+        return ERROR_THROTTLED
+    if smtp_code is not None and smtp_code >= 500:
+        return ERROR_PERMANENT
+    return ERROR_TRANSIENT
+
+
+def claim_outbox_batch(batch_size, now):
+    """
+    Claim the next due rows for one drain, in a short transaction.
+    Rows locked by a concurrent claim are skipped, and the claimed rows are leased
+    by moving their next attempt OUTBOX_LEASE seconds ahead.
+
+    Returns:
+        list: the claimed Outbox instances, with the next attempt they had before the lease
+    """
+    with transaction.atomic():
+        emails = list(
+            Outbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Outbox.STATUS_PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')[:batch_size]
+        )
+        if emails:
+            Outbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE)
+            )
+    return emails
+
+
+def send_outbox_batch(emails, limiter=None):
+    """
+    Send claimed outbox rows over one connection and record the outcome of each row.
+    When the provider throttles, the limiter is paused and the rest of the batch
+    is left pending for the next drain. When the connection cannot be opened no
+    email is attempted, and the whole batch is left pending without an attempt.
+    Rows not attempted get back the next attempt they had before they were claimed.
+
+    Args:
+        emails (list): Outbox instances, see claim_outbox_batch
+        limiter (RateLimiter, optional): rate limiter of the email backend
+    Returns:
+        int: number of emails sent, or None if the connection could not be opened
+    """
+    connection = get_connection()
+    failure_settings = (settings.OUTBOX_MAX_ATTEMPTS, settings.OUTBOX_RETRY_DELAY)
+
+    try:
+        connection.open()
+    except Exception:
+        # the backend is down, not the emails: release the lease and stop the drain
+        Outbox.objects.bulk_update(emails, ['next_attempt_at'])
+        return None
+    else:
+        try:
+            # one message per call, as send_messages() only reports how many were sent
+            for email in emails:
+                message = EmailService.build_email(
+                    email.subject, email.to_email, email.html_content, email.from_email, email.cc
+                )
+                if limiter is not None:
+                    limiter.acquire()
+                try:
+                    if connection.send_messages([message]):
+                        email.mark_sent()
+                    else:
+                        email.mark_failed('Rejected by the email backend', *failure_settings)
+                except Exception as error:
+                    kind = classify_error(error)
+                    email.mark_failed(
+                        error, *failure_settings,
+                        retry_after=retry_after(error),
+                        permanent=kind == ERROR_PERMANENT,
+                    )
+                    if kind == ERROR_THROTTLED:
+                        if limiter is not None:
+                            limiter.pause(retry_after(error) or settings.EMAIL_THROTTLE_PAUSE)
+                        break
+        finally:
+            connection.close()
+
+    Outbox.objects.bulk_update(emails, OUTBOX_UPDATE_FIELDS)
+
+    return sum(email.status == Outbox.STATUS_SENT for email in emails)
+
+
+def drain_outbox(batch_size=None):
+    """
+    Send every pending email which is due, one claimed batch per connection.
+    Rows claimed by a concurrent drain are skipped, so drains can overlap safely.
+    The drain stops when the connection cannot be opened, the rest waits for the next one.
+
+    Args:
+        batch_size (int, optional): emails per connection. Defaults to settings.OUTBOX_BATCH_SIZE.
+    Returns:
+        int: number of emails sent
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    limiter = RateLimiter.for_backend()
+    sent = 0
+
+    while True:
+        started_at = timezone.now()
+        emails = claim_outbox_batch(batch_size, started_at)
+        if not emails:
+            return sent
+
+        batch_sent = send_outbox_batch(emails, limiter)
+        if batch_sent is None:
+            return sent
+        sent += batch_sent
+
+        # failed rows move into the future, so a short batch means nothing is left
+        if len(emails) < batch_size:
+            return sent
+
+        # throttled by the provider, the rows not attempted wait for the next drain
+        if any(email.status == Outbox.STATUS_PENDING and email.next_attempt_at <= started_at for email in emails):
+            return sent
+
+
+def email_metrics():
+    """
+    Queue depth of the outbox and the time spent waiting on the rate limiter.
+
+    Returns:
+        dict: pending, due and dead emails, age of the oldest pending email in seconds
+        and the throttle waits of the configured email backend
+    """
+    now = timezone.now()
+    counts = Outbox.objects.aggregate(
+        pending=Count('pk', filter=Q(status=Outbox.STATUS_PENDING)),
+        due=Count('pk', filter=Q(status=Outbox.STATUS_PENDING, next_attempt_at__lte=now)),
+        dead=Count('pk', filter=Q(status=Outbox.STATUS_DEAD)),
+        oldest_pending=Min('created_at', filter=Q(status=Outbox.STATUS_PENDING)),
+    )
+    oldest_pending = counts.pop('oldest_pending')
+    limiter = RateLimiter.for_backend()
+
+    return {
+        **counts,
+        'oldest_pending_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0,
+        'backend': settings.EMAIL_BACKEND,
+        **(limiter.metrics() if limiter else {'throttle_waits': 0, 'throttle_wait_seconds': 0.0}),
+    }
@@ -0,0 +1,212 @@
+"""
+Token bucket limiting the rate of outbound emails per email backend.
+
+The bucket lives in Redis when EMAIL_RATE_LIMIT_REDIS_URL is set, so every worker
+draining the outbox shares the provider's allowance. Without Redis, or while it
+is unreachable, each process falls back to a local bucket; after a Redis error
+the local bucket is kept for EMAIL_RATE_LIMIT_REDIS_RETRY seconds, so the
+senders do not wait for the connect timeout on every token. When the provider
+throttles anyway, the bucket is paused for the time the provider asked for.
+"""
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+# refills the bucket and takes one token, returns the seconds to wait (0 when taken)
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local redis_time = redis.call('TIME')
+local now = tonumber(redis_time[1]) + tonumber(redis_time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at', 'paused_until')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+local paused_until = tonumber(state[3]) or 0
+
+if now < paused_until then
+    return tostring(paused_until - now)
+end
+
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+PAUSE_SCRIPT = """
+local redis_time = redis.call('TIME')
+local now = tonumber(redis_time[1]) + tonumber(redis_time[2]) / 1000000
+local paused_until = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0
+if paused_until > current then
+    redis.call('HSET', KEYS[1], 'paused_until', paused_until, 'tokens', 0, 'updated_at', paused_until)
+    redis.call('EXPIRE', KEYS[1], 3600)
+end
+return 1
+"""
+
+redis_clients = {}
+# Redis URL -> time.monotonic() of its last error
+redis_failures = {}
+
+
+def get_redis_client():
+    """Returns the Redis client of the shared buckets, or None without Redis or shortly after it failed."""
+    url = settings.EMAIL_RATE_LIMIT_REDIS_URL
+    if not url:
+        return None
+    failed_at = redis_failures.get(url)
+    if failed_at is not None and time.monotonic() - failed_at < settings.EMAIL_RATE_LIMIT_REDIS_RETRY:
+        return None
+    if url not in redis_clients:
+        redis_clients[url] = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+    return redis_clients[url]
+
+
+def redis_failed():
+    """Falls back to the local buckets for a while, see get_redis_client."""
+    redis_failures[settings.EMAIL_RATE_LIMIT_REDIS_URL] = time.monotonic()
+
+
+class LocalBucket:
+    """Process-local token bucket with the same semantics as the Redis script."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds):
+        with self.lock:
+            paused_until = time.monotonic() + seconds
+            if paused_until > self.paused_until:
+                self.paused_until = paused_until
+                self.tokens = 0
+                self.updated_at = paused_until
+
+
+local_buckets = {}
+local_metrics = {}
+
+
+class RateLimiter:
+    """
+    Rate limiter of one email backend.
+
+    Args:
+        backend (str): import path of the email backend, used as the bucket name
+        rate (float): sustained emails per second
+        capacity (int): emails which may be sent in a burst
+    """
+
+    def __init__(self, backend, rate, capacity):
+        self.backend = backend
+        self.rate = rate
+        self.capacity = capacity
+        self.key = f'email_rate_limit:{backend}'
+        self.metrics_key = f'email_rate_limit_metrics:{backend}'
+        self.local_bucket = local_buckets.setdefault((backend, rate, capacity), LocalBucket(rate, capacity))
+
+    @classmethod
+    def for_backend(cls, backend=None):
+        """Returns the limiter configured in EMAIL_RATE_LIMITS for the backend, or None when unlimited."""
+        backend = backend or settings.EMAIL_BACKEND
+        limit = settings.EMAIL_RATE_LIMITS.get(backend)
+        if not limit:
+            return None
+        rate, capacity = limit
+        return cls(backend, rate, capacity)
+
+    def take(self):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return float(client.eval(TAKE_TOKEN_SCRIPT, 1, self.key, self.rate, self.capacity))
+            except redis.RedisError:
+                redis_failed()
+        return self.local_bucket.take()
+
+    def acquire(self):
+        """
+        Block until a token is available.
+
+        Returns:
+            float: seconds spent waiting for the token
+        """
+        waited = 0
+        while True:
+            wait = self.take()
+            if not wait:
+                break
+            time.sleep(wait)
+            waited += wait
+
+        if waited:
+            self.record_wait(waited)
+        return waited
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the given seconds, e.g. after the provider throttled us."""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.eval(PAUSE_SCRIPT, 1, self.key, seconds)
+                return
+            except redis.RedisError:
+                redis_failed()
+        self.local_bucket.pause(seconds)
+
+    def record_wait(self, seconds):
+        client = get_redis_client()
+        if client is not None:
+            try:
+                pipeline = client.pipeline()
+                pipeline.hincrby(self.metrics_key, 'throttle_waits', 1)
+                pipeline.hincrbyfloat(self.metrics_key, 'throttle_wait_seconds', seconds)
+                pipeline.execute()
+                return
+            except redis.RedisError:
+                redis_failed()
+        metrics = local_metrics.setdefault(self.metrics_key, {'throttle_waits': 0, 'throttle_wait_seconds': 0.0})
+        metrics['throttle_waits'] += 1
+        metrics['throttle_wait_seconds'] += seconds
+
+    def metrics(self):
+        """Returns how often and for how long senders waited for a token."""
+        client = get_redis_client()
+        if client is not None:
+            try:
+                stored = client.hgetall(self.metrics_key)
+                return {
+                    'throttle_waits': int(stored.get(b'throttle_waits', 0)),
+                    'throttle_wait_seconds': float(stored.get(b'throttle_wait_seconds', 0)),
+                }
+            except redis.RedisError:
+                redis_failed()
+        return dict(local_metrics.get(self.metrics_key, {'throttle_waits': 0, 'throttle_wait_seconds': 0.0}))
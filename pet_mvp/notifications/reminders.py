@@ -0,0 +1,339 @@
+"""
+Reminder scheduling and set-based scanning of due expiration reminders.
+
+Reminder rows are precomputed per record in ReminderSchedule when the record is
+written. The daily jobs resolve everything due in a single query per record type
+which joins the pet, the catalog item (vaccine/medication) and the pet owners, so
+the number of queries does not depend on how many reminders are due.
+Every reminder handed to the outbox is claimed in the NotificationLedger first,
+so a job which crashed halfway or was fired twice does not send it again.
+"""
+import heapq
+from collections import namedtuple
+from datetime import timedelta
+from itertools import batched, groupby
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils import translation
+from django.utils.translation import gettext_noop, ngettext
+
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.models import ReminderSchedule, NotificationLedger
+from pet_mvp.records.models import VaccinationRecord
+
+# rows fetched from the database per round-trip while streaming
+REMINDER_CHUNK_SIZE = 2000
+
+# emails handed to a single celery message
+REMINDER_BATCH_SIZE = 100
+
+# days before 'valid_until' -> time left label, translated in the email template
+TIME_LEFT_LABELS = {
+    28: gettext_noop("in 4 weeks"),
+    14: gettext_noop("in 2 weeks"),
+    7: gettext_noop("in 1 week"),
+    1: gettext_noop("tomorrow"),
+}
+
+ExpiryReminder = namedtuple(
+    'ExpiryReminder',
+    ['record', 'owner_pk', 'owner_email', 'owner_language', 'time_left', 'offset_days', 'fire_date'],
+)
+
+
+def time_left_label(days, language=None):
+    """
+    Returns the time left label for a reminder sent the given days before expiration.
+    Other offsets than those of TIME_LEFT_LABELS have no fixed label for the template
+    to translate, so theirs is translated here into the owner's language.
+    """
+    if days in TIME_LEFT_LABELS:
+        return TIME_LEFT_LABELS[days]
+    with translation.override(language):
+        return ngettext("in %(days)d day", "in %(days)d days", days) % {'days': days}
+
+
+def schedule_reminders(records, today=None):
+    """
+    Rebuild the pending reminder schedule of vaccination or medication records.
+    Reminders already sent are kept, so an edit does not send them again.
+
+    Args:
+        records (list): VaccinationRecord or MedicationRecord instances of a single type
+        today (date, optional): reference date. Defaults to today.
+    """
+    if not records:
+        return
+
+    today = today or timezone.now().date()
+
+    if isinstance(records[0], VaccinationRecord):
+        record_field, offsets = 'vaccination_record', settings.VACCINE_REMINDER_OFFSETS
+    else:
+        record_field, offsets = 'medication_record', settings.TREATMENT_REMINDER_OFFSETS
+
+    ReminderSchedule.objects.filter(**{f'{record_field}__in': records}, sent=False).delete()
+
+    # values assigned in code may still be datetimes or strings until reloaded
+    valid_until_field = records[0]._meta.get_field('valid_until')
+
+    reminders = []
+    for record in records:
+        valid_until = valid_until_field.to_python(record.valid_until)
+        for days in offsets:
+            fire_date = valid_until - timedelta(days=days)
+            if fire_date < today:
+                continue
+            for channel, _ in ReminderSchedule.CHANNEL_CHOICES:
+                reminders.append(ReminderSchedule(
+                    **{record_field: record},
+                    fire_date=fire_date,
+                    offset_days=days,
+                    channel=channel,
+                ))
+
+    ReminderSchedule.objects.bulk_create(reminders, ignore_conflicts=True)
+
+
+def schedule_bound():
+    """Returns the last reminder scheduled so far, used to bound the scans of a run."""
+    return ReminderSchedule.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+
+class ReminderScan:
+    """
+    One pass over the reminders of a channel which are due today or were missed earlier.
+    The scan is bounded to the schedule rows existing when it started, so reminders
+    scheduled while it runs are left for the next run. Shards of a run share the
+    bound and scan the pets in their own id range.
+    """
+
+    def __init__(self, channel, today=None, max_pk=None, pet_ids=None):
+        self.channel = channel
+        self.today = today or timezone.now().date()
+        self.max_pk = schedule_bound() if max_pk is None else max_pk
+        self.pet_ids = pet_ids
+
+    def due(self, record_field):
+        reminders = ReminderSchedule.objects.filter(
+            channel=self.channel,
+            fire_date__lte=self.today,
+            sent=False,
+            pk__lte=self.max_pk,
+            **{f'{record_field}__isnull': False},
+        )
+        if self.pet_ids is not None:
+            first_pet_id, last_pet_id = self.pet_ids
+            reminders = reminders.filter(**{
+                f'{record_field}__pet__gte': first_pet_id,
+                f'{record_field}__pet__lte': last_pet_id,
+            })
+        return reminders
+
+    def iter_reminders(self, record_field, catalog_field, chunk_size=REMINDER_CHUNK_SIZE):
+        """
+        Stream one reminder per (record, owner) for every due record which has not expired yet.
+        Reminders are ordered by owner, so they can be grouped per owner without buffering.
+        When several reminders of a record were missed, only the latest one is sent.
+
+        Args:
+            record_field (str): 'vaccination_record' or 'medication_record'
+            catalog_field (str): FK name of the catalog item, i.e. 'vaccine' or 'medication'
+            chunk_size (int, optional): rows fetched per database round-trip
+        Yields:
+            ExpiryReminder: the record (with pet and catalog item loaded) and the owner details
+        """
+        owners = f'{record_field}__pet__owners'
+
+        schedules = (
+            self.due(record_field)
+            .filter(**{f'{record_field}__valid_until__gte': self.today})
+            .select_related(f'{record_field}__pet', f'{record_field}__{catalog_field}')
+            .annotate(
+                owner_pk=F(f'{owners}__pk'),
+                owner_email=F(f'{owners}__email'),
+                owner_language=F(f'{owners}__default_language'),
+                owner_delivery=F(f'{owners}__reminder_delivery'),
+            )
+            # owners who chose another channel and pets without owners drop out here
+            .filter(owner_delivery=self.channel)
+            # soonest expiring first; missed reminders of a record are adjacent, latest first
+            .order_by('owner_pk', f'{record_field}__valid_until', record_field, '-fire_date')
+        )
+
+        last_sent = None
+        for schedule in schedules.iterator(chunk_size=chunk_size):
+            key = (schedule.owner_pk, getattr(schedule, f'{record_field}_id'))
+            if key == last_sent:
+                continue
+            last_sent = key
+
+            yield ExpiryReminder(
+                record=getattr(schedule, record_field),
+                owner_pk=schedule.owner_pk,
+                owner_email=schedule.owner_email,
+                owner_language=schedule.owner_language,
+                time_left=time_left_label(schedule.offset_days, schedule.owner_language),
+                offset_days=schedule.offset_days,
+                fire_date=schedule.fire_date,
+            )
+
+    def mark_sent(self, *record_fields):
+        """Closes every due reminder of the scan, including the ones of expired records."""
+        for record_field in record_fields:
+            self.due(record_field).update(sent=True, sent_at=timezone.now())
+
+
+def group_reminders_by_owner(*streams):
+    """
+    Merge reminder streams ordered by owner and group them per owner.
+
+    Args:
+        *streams: iterables of ExpiryReminder as returned by ReminderScan.iter_reminders
+    Yields:
+        list: all reminders of a single owner
+    """
+    merged = heapq.merge(*streams, key=lambda reminder: reminder.owner_pk)
+    for _, owner_reminders in groupby(merged, key=lambda reminder: reminder.owner_pk):
+        yield list(owner_reminders)
+
+
+def enqueue_in_batches(messages, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Hand templated emails to celery in batches instead of one task per email.
+
+    Args:
+        messages (iterable): dicts with the keyword arguments of EmailService.send_template_email
+        batch_size (int, optional): emails per celery message
+    Returns:
+        int: number of emails enqueued
+    """
+    enqueued = 0
+    batch = []
+
+    for message in messages:
+        batch.append(message)
+        if len(batch) >= batch_size:
+            EmailService.send_template_emails_async.delay(batch)
+            enqueued += len(batch)
+            batch = []
+
+    if batch:
+        EmailService.send_template_emails_async.delay(batch)
+        enqueued += len(batch)
+
+    return enqueued
+
+
+def ledger_key(reminder):
+    """Returns the (record type, record id, interval, recipient, date) key of a reminder in the ledger."""
+    if isinstance(reminder.record, VaccinationRecord):
+        record_type = NotificationLedger.RECORD_VACCINATION
+    else:
+        record_type = NotificationLedger.RECORD_MEDICATION
+    return record_type, reminder.record.pk, reminder.offset_days, reminder.owner_pk, reminder.fire_date
+
+
+def sent_keys(keys):
+    """Returns the ledger keys which were already sent, looked up in a single query."""
+    if not keys:
+        return set()
+
+    entries = NotificationLedger.objects.filter(
+        record_id__in={key[1] for key in keys},
+        recipient__in={key[3] for key in keys},
+        fire_date__in={key[4] for key in keys},
+    ).values_list('record_type', 'record_id', 'offset_days', 'recipient', 'fire_date')
+
+    return keys.intersection(entries)
+
+
+def claim_reminders(reminders):
+    """
+    Write the ledger rows of the reminders which were not sent yet.
+    A concurrent run claiming some of them first makes the insert fail, in which
+    case the ledger is read again and only the rest is claimed.
+
+    Args:
+        reminders (list): ExpiryReminder instances
+    Returns:
+        tuple: the NotificationLedger rows written and the set of claimed keys
+    """
+    keys = {ledger_key(reminder) for reminder in reminders}
+
+    while True:
+        claimed = keys - sent_keys(keys)
+        if not claimed:
+            return [], claimed
+        try:
+            with transaction.atomic():
+                entries = NotificationLedger.objects.bulk_create(
+                    NotificationLedger(
+                        record_type=record_type,
+                        record_id=record_id,
+                        offset_days=offset_days,
+                        recipient_id=recipient_id,
+                        fire_date=fire_date,
+                    )
+                    for record_type, record_id, offset_days, recipient_id, fire_date in claimed
+                )
+            return entries, claimed
+        except IntegrityError:
+            continue
+
+
+def enqueue_once(groups, build_message, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Hand templated emails to celery in batches, skipping the reminders found in the ledger.
+    The reminders of a batch are claimed before their emails are built, so a re-run
+    of a job only sends what is left and a repeated run sends nothing.
+
+    Args:
+        groups (iterable): lists of ExpiryReminder sent in a single email
+        build_message (callable): returns the keyword arguments of EmailService.send_template_email
+            for the reminders of an email
+        batch_size (int, optional): emails per celery message
+    Returns:
+        int: number of emails enqueued
+    """
+    enqueued = 0
+
+    for batch in batched(groups, batch_size):
+        entries, claimed = claim_reminders([reminder for group in batch for reminder in group])
+
+        # a digest is sent with the reminders left, or not at all
+        messages = [
+            build_message(remaining)
+            for remaining in ([reminder for reminder in group if ledger_key(reminder) in claimed] for group in batch)
+            if remaining
+        ]
+        if not messages:
+            continue
+
+        try:
+            EmailService.send_template_emails_async.delay(messages)
+        except Exception:
+            # give the reminders back to the next run
+            NotificationLedger.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+            raise
+
+        enqueued += len(messages)
+
+    return enqueued
+
+
+def prune_ledger(today=None):
+    """
+    Delete the ledger rows which can no longer match a due reminder, i.e. whose records have expired.
+
+    Returns:
+        int: number of rows deleted
+    """
+    today = today or timezone.now().date()
+    max_offset = max(settings.VACCINE_REMINDER_OFFSETS + settings.TREATMENT_REMINDER_OFFSETS)
+
+    deleted, _ = NotificationLedger.objects.filter(fire_date__lt=today - timedelta(days=max_offset)).delete()
+    return deleted
@@ -0,0 +1,112 @@
+"""
+Cache of rendered email templates and their plain text alternatives.
+
+Renders are keyed on the template, the language and a stable hash of the context,
+so bulk runs sending the same text, or the same report to owners and clinic,
+render it once. Entries live in a per-process LRU and, when the 'email_render'
+cache is configured, in a shared Redis tier used by all workers.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.html import strip_tags
+
+SHARED_CACHE_ALIAS = 'email_render'
+
+
+class LRUCache:
+    """Thread-safe mapping which evicts the least recently used entry above maxsize."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+local_cache = LRUCache(settings.EMAIL_RENDER_CACHE_SIZE)
+
+
+def fingerprint(value):
+    """Stable hash of template context, i.e. equal dicts hash equally regardless of key order."""
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_or_render(key, render):
+    """
+    Look the key up in the local and the shared tier, rendering and storing it on a miss.
+    The shared tier is best effort: when Redis is unavailable the render is done locally.
+    """
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+
+    shared_cache = caches[SHARED_CACHE_ALIAS] if SHARED_CACHE_ALIAS in settings.CACHES else None
+
+    if shared_cache is not None:
+        try:
+            value = shared_cache.get(key)
+        except Exception:
+            shared_cache = None
+
+    if value is None:
+        value = render()
+        if shared_cache is not None:
+            try:
+                shared_cache.set(key, value, settings.EMAIL_RENDER_CACHE_TIMEOUT)
+            except Exception:
+                pass
+
+    local_cache.set(key, value)
+    return value
+
+
+def render_template(template_name, context):
+    """
+    Render an email template in the language given by context['lang'].
+
+    Args:
+        template_name (str): Name of the template to use
+        context (dict): Context data for the template
+    Returns:
+        str: HTML content of the email
+    """
+    lang = context.get('lang', 'en')
+
+    def render():
+        with translation.override(lang):
+            return render_to_string(template_name, context)
+
+    return get_or_render(f'html:{template_name}:{lang}:{fingerprint(context)}', render)
+
+
+def plain_text(html_content):
+    """Returns the plain text alternative of rendered HTML content."""
+    return get_or_render(f'text:{fingerprint(html_content)}', lambda: strip_tags(html_content))
@@ -1,19 +1,29 @@
 import os
+from datetime import date
 
 from celery import shared_task
-from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.outbox import drain_outbox
+from pet_mvp.common.utils import id_ranges, dispatch_shards
+from pet_mvp.notifications.reminders import ReminderScan, group_reminders_by_owner, enqueue_once, \
+    schedule_bound, prune_ledger, enqueue_in_batches
 
 
 UserModel = get_user_model()
 
 @shared_task
-def send_clinic_owner_access_request_email(user_owner, user_clinic, pet, url, lang):
+def send_clinic_owner_access_request_email(owner_id, clinic_id, pet_id, url, lang):
+    from pet_mvp.pets.models import Pet
+
+    user_owner = UserModel.objects.get(pk=owner_id)
+    user_clinic = UserModel.objects.select_related('clinic').get(pk=clinic_id)
+    pet = Pet.objects.get(pk=pet_id)
 
     context = {
         "owner_name": user_owner.get_full_name(),
@@ -40,7 +50,11 @@ def send_clinic_owner_access_request_email(user_owner, user_clinic, pet, url, la
 
 # sending email to the admin for review of the clinic and mark as approved
 @shared_task
-def send_clinic_admin_approval_request_email(user_clinic, pet):
+def send_clinic_admin_approval_request_email(clinic_id, pet_id):
+    from pet_mvp.pets.models import Pet
+
+    user_clinic = UserModel.objects.select_related('clinic').get(pk=clinic_id)
+    pet = Pet.objects.get(pk=pet_id)
 
     context = {
         "clinic_name": user_clinic.clinic.name,
@@ -62,46 +76,44 @@ def send_clinic_admin_approval_request_email(user_clinic, pet):
 def send_treatment_expiration_notifications():
     """
     Periodic task to send treatment expiration notifications.
-    Sends notifications 7 days and 1 day before the 'valid_until' date.
+    Sends notifications on the TREATMENT_REMINDER_OFFSETS days before the 'valid_until' date
+    (7 days and 1 day by default), catching up on reminders missed by earlier runs.
+    Only owners who opted out of the daily digest receive these.
+    The pets are split by id range into shards which run in parallel across the workers.
     """
-    from pet_mvp.records.models import MedicationRecord
+    return dispatch_reminder_shards(send_treatment_expiration_shard, 'treatment')
 
-    today = timezone.now().date()
 
-    intervals = {
-        'one_week': today + timedelta(days=7),
-        'one_day': today + timedelta(days=1),
-    }
-
-    notifications_sent = 0
+@shared_task
+def send_treatment_expiration_shard(first_pet_id, last_pet_id, max_pk, today):
+    """Sends the treatment expiration notifications of the pets in the id range"""
 
-    for interval_name, check_date in intervals.items():
-        expiring_treatments = MedicationRecord.objects.filter(
-            valid_until=check_date
+    def send():
+        scan = ReminderScan(
+            UserModel.REMINDER_SINGLE, date.fromisoformat(today), max_pk, (first_pet_id, last_pet_id)
         )
-
-        for record in expiring_treatments:
-            user_owners = record.pet.owners.all()
-
-            time_left = _("in 1 week") if interval_name == 'one_week' else _("tomorrow")
-            
-            for user in user_owners:
-                EmailService.send_template_email_async.delay(
-                    subject=_("Treatment Expiration Reminder for {}").format(
-                        record.pet.name),
-                    to_email=user.email,
-                    template_name="emails/treatment_expiration_notification.html",
-                    context={
-                        "pet_name": record.pet.name,
-                        "medication": record.medication.name,
-                        "expiration_date": record.valid_until,
-                        "time_left": time_left,
-                        "lang": user.default_language,
-                    }
-                )
-                notifications_sent += 1
-
-    return _("Processed {} treatment expiration notifications").format(notifications_sent)
+        reminders = scan.iter_reminders('medication_record', 'medication')
+
+        def build_message(owner_reminders):
+            reminder, = owner_reminders
+            return {
+                "subject": _("Treatment Expiration Reminder for {}").format(reminder.record.pet.name),
+                "to_email": reminder.owner_email,
+                "template_name": "emails/treatment_expiration_notification.html",
+                "context": {
+                    "pet_name": reminder.record.pet.name,
+                    "medication": reminder.record.medication.name,
+                    "expiration_date": reminder.record.valid_until,
+                    "time_left": reminder.time_left,
+                    "lang": reminder.owner_language,
+                },
+            }
+
+        notifications_sent = enqueue_once(([reminder] for reminder in reminders), build_message)
+        scan.mark_sent('medication_record')
+        return notifications_sent
+
+    return run_reminder_shard(send, first_pet_id, last_pet_id)
 
 @shared_task
 def send_wrong_vaccination_report(owner_id, vaccine_record_id, url):
@@ -134,44 +146,242 @@ def send_wrong_vaccination_report(owner_id, vaccine_record_id, url):
 def send_vaccine_expiration_notifications():
     """
     Periodic task to send vaccine expiration notifications.
-    Checks for vaccines expiring in 4 weeks, 2 weeks, 1 week, and 1 day before expiration.
+    Checks for vaccines expiring on the VACCINE_REMINDER_OFFSETS days before expiration
+    (4 weeks, 2 weeks, 1 week, and 1 day by default), catching up on reminders missed by earlier runs.
+    Only owners who opted out of the daily digest receive these.
+    The pets are split by id range into shards which run in parallel across the workers.
     Intended to be scheduled via Celery Beat.
     """
-    from pet_mvp.records.models import VaccinationRecord
+    return dispatch_reminder_shards(send_vaccine_expiration_shard, 'vaccine')
 
-    today = timezone.now().date()
 
-    intervals = {
-        'four_weeks': (today + timedelta(days=28), _("in 4 weeks")),
-        'two_weeks': (today + timedelta(days=14), _("in 2 weeks")),
-        'one_week': (today + timedelta(days=7), _("in 1 week")),
-        'one_day': (today + timedelta(days=1), _("tomorrow")),
-    }
+@shared_task
+def send_vaccine_expiration_shard(first_pet_id, last_pet_id, max_pk, today):
+    """Sends the vaccine expiration notifications of the pets in the id range"""
+
+    def send():
+        scan = ReminderScan(
+            UserModel.REMINDER_SINGLE, date.fromisoformat(today), max_pk, (first_pet_id, last_pet_id)
+        )
+        reminders = scan.iter_reminders('vaccination_record', 'vaccine')
+
+        def build_message(owner_reminders):
+            reminder, = owner_reminders
+            return {
+                "subject": _("Vaccine Expiration Notice for {}").format(reminder.record.pet.name),
+                "to_email": reminder.owner_email,
+                "template_name": "emails/vaccine_expiration_notification.html",
+                "context": {
+                    "pet_name": reminder.record.pet.name,
+                    "vaccine": reminder.record.vaccine.name,
+                    "expiration_date": reminder.record.valid_until,
+                    "time_left": reminder.time_left,
+                    "lang": reminder.owner_language,
+                },
+            }
+
+        notifications_sent = enqueue_once(([reminder] for reminder in reminders), build_message)
+        scan.mark_sent('vaccination_record')
+        return notifications_sent
+
+    return run_reminder_shard(send, first_pet_id, last_pet_id)
+
+
+def run_reminder_shard(send, first_pet_id, last_pet_id):
+    """
+    Runs a reminder shard, reporting a failure instead of raising so the other shards
+    are still aggregated. Reminders of a failed shard stay unsent and are caught up next run.
+    """
+    try:
+        return {"processed": send(), "failures": []}
+    except Exception as e:
+        return {"processed": 0, "failures": [[first_pet_id, last_pet_id, str(e)]]}
+
+
+def dispatch_reminder_shards(shard_task, reminder_type):
+    """Splits the pets into DAILY_JOB_SHARD_SIZE id ranges and sends their reminders in parallel"""
+    from pet_mvp.pets.models import Pet
+
+    # all shards share the day and the schedule bound of the run
+    max_pk, today = schedule_bound(), timezone.now().date().isoformat()
+    shards = [
+        (first, last, max_pk, today)
+        for first, last in id_ranges(Pet.objects.all(), settings.DAILY_JOB_SHARD_SIZE)
+    ]
 
-    notifications_sent = 0
+    result = dispatch_shards(shard_task, shards, collect_reminder_shards.s(reminder_type))
 
-    for label, (check_date, time_left) in intervals.items():
-        expiring_vaccinations = VaccinationRecord.objects.filter(
-            valid_until=check_date)
+    if len(shards) > 1:
+        return _("Dispatched {} reminder shards").format(len(shards))
+    return result
 
-        for record in expiring_vaccinations:
-            for user in record.pet.owners.all():
-                EmailService.send_template_email_async.delay(
-                    subject=_("Vaccine Expiration Notice for {}").format(
-                        record.pet.name),
-                    to_email=user.email,
-                    template_name="emails/vaccine_expiration_notification.html",
-                    context={
+
+@shared_task
+def collect_reminder_shards(results, reminder_type):
+    """Chord callback adding up the notifications and failures of the reminder shards"""
+    processed = sum(result["processed"] for result in results)
+    failures = [failure for result in results for failure in result["failures"]]
+
+    if reminder_type == 'vaccine':
+        message = _("Processed {} vaccine expiration notifications").format(processed)
+    else:
+        message = _("Processed {} treatment expiration notifications").format(processed)
+
+    if failures:
+        message += " " + _("({} shards failed: {})").format(
+            len(failures), "; ".join(f"pets {first}-{last}: {error}" for first, last, error in failures)
+        )
+
+    return message
+
+
+@shared_task
+def send_expiration_digest_notifications():
+    """
+    Periodic task to send one daily email per owner with all vaccines and treatments
+    due on the reminder intervals. Owners who prefer separate emails are skipped.
+    Intended to be scheduled via Celery Beat.
+    """
+    from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+    scan = ReminderScan(UserModel.REMINDER_DIGEST)
+    vaccine_reminders = scan.iter_reminders('vaccination_record', 'vaccine')
+    treatment_reminders = scan.iter_reminders('medication_record', 'medication')
+
+    def build_message(owner_reminders):
+        return {
+            "subject": _("Upcoming vaccinations and treatments for your pets"),
+            "to_email": owner_reminders[0].owner_email,
+            "template_name": "emails/expiration_digest_notification.html",
+            "context": {
+                "vaccines": [
+                    {
+                        "pet_name": reminder.record.pet.name,
+                        "name": reminder.record.vaccine.name,
+                        "expiration_date": reminder.record.valid_until,
+                        "time_left": reminder.time_left,
+                    }
+                    for reminder in owner_reminders if isinstance(reminder.record, VaccinationRecord)
+                ],
+                "treatments": [
+                    {
+                        "pet_name": reminder.record.pet.name,
+                        "name": reminder.record.medication.name,
+                        "expiration_date": reminder.record.valid_until,
+                        "time_left": reminder.time_left,
+                    }
+                    for reminder in owner_reminders if isinstance(reminder.record, MedicationRecord)
+                ],
+                "lang": owner_reminders[0].owner_language,
+            },
+        }
+
+    digests_sent = enqueue_once(group_reminders_by_owner(vaccine_reminders, treatment_reminders), build_message)
+    scan.mark_sent('vaccination_record', 'medication_record')
+
+    return _("Processed {} expiration digest notifications").format(digests_sent)
+
+
+@shared_task
+def send_campaign_notifications(record_type, record_ids):
+    """
+    Task to send one email per owner listing the records a vaccination or treatment campaign
+    added to their pets, all queued to the outbox in one batch.
+    """
+    from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+    model, catalog_field = {
+        'vaccination': (VaccinationRecord, 'vaccine'),
+        'medication': (MedicationRecord, 'medication'),
+    }[record_type]
+
+    records = (
+        model.objects.filter(pk__in=record_ids)
+        .select_related('pet', catalog_field)
+        .prefetch_related('pet__owners')
+    )
+
+    owner_records = {}
+    for record in records:
+        for owner in record.pet.owners.all():
+            owner_records.setdefault(owner, []).append(record)
+
+    messages = [
+        {
+            "subject": _("New vaccinations for your pets") if record_type == 'vaccination'
+            else _("New treatments for your pets"),
+            "to_email": owner.email,
+            "template_name": "emails/campaign_records_notification.html",
+            "context": {
+                "record_type": record_type,
+                "records": [
+                    {
                         "pet_name": record.pet.name,
-                        "vaccine": record.vaccine.name,
-                        "expiration_date": record.valid_until,
-                        "time_left": time_left,
-                        "lang": user.default_language,
+                        "name": getattr(record, catalog_field).name,
+                        "valid_until": record.valid_until,
                     }
-                )
-                notifications_sent += 1
+                    for record in records_of_owner
+                ],
+                "lang": owner.default_language,
+            },
+        }
+        for owner, records_of_owner in owner_records.items()
+    ]
+
+    emails_queued = EmailService.send_template_emails_async(messages) if messages else 0
 
-    return _("Processed {} vaccine expiration notifications").format(notifications_sent)
+    return _("Processed {} campaign notifications").format(emails_queued)
+
+
+@shared_task
+def send_vaccine_recall_notifications(lots, vaccine_id=None):
+    """
+    Task to send one email per owner listing their pets vaccinated from recalled batches,
+    given as (batch number, manufacturer) pairs. The owners are streamed from the database
+    and their emails handed to celery in batches.
+    """
+    from pet_mvp.records.recalls import recalled_records, recall_rows_by_owner
+
+    records = recalled_records(lots, vaccine_id)
+
+    messages = (
+        {
+            "subject": _("Vaccine recall affecting your pets"),
+            "to_email": email,
+            "template_name": "emails/vaccine_recall_notification.html",
+            "context": {
+                "records": owner_records,
+                "lang": lang,
+            },
+        }
+        for (email, lang), owner_records in recall_rows_by_owner(records)
+    )
+
+    emails_queued = enqueue_in_batches(messages)
+
+    return _("Processed {} vaccine recall notifications").format(emails_queued)
+
+
+@shared_task
+def prune_notification_ledger():
+    """
+    Periodic task to delete the ledger rows of reminders whose records have expired.
+    Intended to be scheduled via Celery Beat.
+    """
+    deleted = prune_ledger()
+
+    return _("Pruned {} notification ledger entries").format(deleted)
+
+
+@shared_task
+def drain_email_outbox():
+    """
+    Task to send the pending emails of the outbox in batches over one connection.
+    Triggered when emails are queued and scheduled via Celery Beat to pick up retries.
+    """
+    emails_sent = drain_outbox()
+
+    return _("Sent {} outbox emails").format(emails_sent)
 
 
 def test_to_dict(test_obj):
@@ -188,35 +398,26 @@ def test_to_dict(test_obj):
 
 
 @shared_task
-def send_medical_record_email(exam, lang):
+def send_medical_record_email(exam_id, lang):
     """task to send one-time notification on creation of a medical record to owners and the clinic"""
+    from pet_mvp.records.reports import load_exam_report
 
-    # get owners' details
-    owners_details = [user for user in exam.pet.owners.all()]
-
-    owner_details = [{
-        "first_name": user.owner.first_name,
-        "last_name": user.owner.last_name,
-        "email": user.email,
-        "phone_number": user.phone_number,
-        "city": user.city,
-        "country": user.country
-    } for user in owners_details]
+    report = load_exam_report(exam_id)
+    exam, clinic = report.exam, report.clinic
 
     # get the owners emails of the pet
-    owners_emails = [owner.email for owner in owners_details]
+    owners_emails = [owner.email for owner in report.owners]
 
-    user_clinic = exam.clinic
     context = {
-        "owners": owner_details,
-        "pet_name": exam.pet.name,
+        "owners": [owner._asdict() for owner in report.owners],
+        "pet_name": report.pet.name,
         "date_of_entry": exam.date_of_entry.strftime("%Y-%m-%d"),
         "doctor": exam.doctor,
-        "clinic_name": user_clinic.clinic.name,
-        "clinic_address": user_clinic.clinic.address,
-        "clinic_city": user_clinic.city,
-        "clinic_country": user_clinic.country,
-        "clinic_phone": user_clinic.phone_number,
+        "clinic_name": clinic.name,
+        "clinic_address": clinic.address,
+        "clinic_city": clinic.city,
+        "clinic_country": clinic.country,
+        "clinic_phone": clinic.phone_number,
         "reason_for_visit": exam.reason_for_visit,
         "general_health": exam.general_health or _("N/A"),
         "body_condition_score": exam.body_condition_score,
@@ -230,48 +431,49 @@ def send_medical_record_email(exam, lang):
         "vaccinations": [
             {"name": v.vaccine.name,
                 "date": v.date_of_vaccination.strftime("%Y-%m-%d")}
-            for v in exam.vaccinations.all()
+            for v in report.vaccinations
         ],
         "medications": [
             {"name": m.medication.name, "dosage": m.dosage}
-            for m in exam.medications.all()
+            for m in report.medications
         ],
         # Convert test objects to dictionaries for JSON serialization
-        'blood_test': test_to_dict(getattr(exam, 'blood_test', None)),
-        'urine_test': test_to_dict(getattr(exam, 'urine_test', None)),
-        'fecal_test': test_to_dict(getattr(exam, 'fecal_test', None)),
+        'blood_test': test_to_dict(report.blood_test),
+        'urine_test': test_to_dict(report.urine_test),
+        'fecal_test': test_to_dict(report.fecal_test),
         "lang": lang,
     }
 
     EmailService.send_template_email_async.delay(
-        subject=_("Medical Examination Report for {} - {}").format(exam.pet.name,
+        subject=_("Medical Examination Report for {} - {}").format(report.pet.name,
                                                                    exam.date_of_entry.strftime('%Y-%m-%d')),
         to_email=owners_emails,
         template_name='emails/medical_report_email.html',
         context=context
     )
 
-    if user_clinic.default_language != lang:
-        context['lang'] = user_clinic.default_language
+    if clinic.default_language != lang:
+        context['lang'] = clinic.default_language
 
     EmailService.send_template_email_async.delay(
-        subject=_("Medical Examination Report for {} - {}").format(exam.pet.name,
+        subject=_("Medical Examination Report for {} - {}").format(report.pet.name,
                                                                    exam.date_of_entry.strftime('%Y-%m-%d')),
-        to_email=user_clinic.email,
+        to_email=clinic.email,
         template_name='emails/medical_report_email.html',
         context=context
     )
 
-    return _("Processed one medical report for {}").format(exam.pet.name)
+    return _("Processed one medical report for {}").format(report.pet.name)
 
 
 @shared_task
-def send_user_registration_email(user, lang):
+def send_user_registration_email(user_id, lang):
     """
     Task to send a one-time notification on registration of a user.
     - For owners: sends a welcome email.
     - For clinics: sends a notification for registration email.
     """
+    user = UserModel.objects.select_related('owner', 'clinic').get(pk=user_id)
 
     user_email = user.email
 
@@ -311,8 +513,9 @@ def send_user_registration_email(user, lang):
     return _("Sent clinic notification email to {}").format(user_email)
 
 @shared_task
-def send_clinic_activation_email(user, lang, url):
+def send_clinic_activation_email(user_id, lang, url):
     # send clinic activation email
+    user = UserModel.objects.select_related('clinic').get(pk=user_id)
 
     user_email = user.email
         
@@ -337,7 +540,12 @@ def send_clinic_activation_email(user, lang, url):
 
 
 @shared_task
-def send_owner_pet_addition_request(existing_owner, new_owner, pet, approval_url):
+def send_owner_pet_addition_request(existing_owner_id, new_owner_id, pet_id, approval_url):
+    from pet_mvp.pets.models import Pet
+
+    existing_owner = UserModel.objects.get(pk=existing_owner_id)
+    new_owner = UserModel.objects.select_related('owner').get(pk=new_owner_id)
+    pet = Pet.objects.get(pk=pet_id)
 
     context = {
         "first_name": new_owner.owner.first_name,
@@ -3,6 +3,7 @@ from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from pet_mvp.pets.models import Pet, Transponder, Tattoo
+from pet_mvp.pets.photos import photo_url
 
 
 class TransponderInline(admin.TabularInline):
@@ -52,7 +53,7 @@ class PetAdmin(admin.ModelAdmin):
     def display_photo(self, obj):
         if obj.photo:
             return format_html('<img src="{}" width="50" height="50" style="object-fit: cover; border-radius: 4px;" />',
-                               obj.photo.url)
+                               photo_url(obj, 'thumbnail'))
         return _("No Photo")
 
     display_photo.short_description = _('Photo')
@@ -3,6 +3,7 @@ from django.utils.translation import gettext as _
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from pet_mvp.common.mixins import ConfiguredFieldsMixin
 from pet_mvp.pets.validators import validate_passport_number
 
 
@@ -12,7 +13,7 @@ class PetEditForm(forms.ModelForm):
         fields = ['passport_number', 'photo', 'current_weight']
 
 
-class PetAddForm(forms.ModelForm):
+class PetAddForm(ConfiguredFieldsMixin, forms.ModelForm):
 
     class Meta:
         model = Pet
@@ -23,6 +24,38 @@ class PetAddForm(forms.ModelForm):
             'name', 'color','features',
         ]
 
+    # Placeholder logic
+    field_config = {
+        'date_of_birth': {
+            'widget': forms.DateInput(attrs={'type': 'date'}),
+            'help_text': _('Date of birth'),
+        },
+        'passport_number': {
+            'placeholder': _('Passport Number in format BG01VPXXXXXX or leave blank'),
+            'attrs': {'required': False},
+        },
+        'current_weight': {
+            'placeholder': _('Current weight in kgs'),
+        },
+    }
+
+    # suffix of the translated fields and the language named in their placeholder
+    translated_field_languages = {
+        '_en': _('in English'),
+        '_bg': _('in Bulgarian'),
+    }
+
+    @classmethod
+    def configure_field(cls, field_name, field):
+        for suffix, language in cls.translated_field_languages.items():
+            if suffix in field_name:
+                base_verbose = cls._meta.model._meta.get_field(field_name.replace(suffix, '')).verbose_name
+                field.widget.attrs['placeholder'] = f"{base_verbose} ({language})"
+                field.widget.attrs['required'] = True
+                return
+
+        super().configure_field(field_name, field)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -39,29 +72,6 @@ class PetAddForm(forms.ModelForm):
         else:
             self.fields['breed'].widget = forms.Select(choices=[])
 
-        # Placeholder logic
-        for field_name, field in self.fields.items():
-            if field_name == 'date_of_birth':
-                field.widget = forms.DateInput(attrs={'type': 'date'})
-                field.help_text = _('Date of birth')
-            elif field_name == 'passport_number':
-                field.widget.attrs['placeholder'] = _('Passport Number in format BG01VPXXXXXX or leave blank')
-                field.widget.attrs['required'] = False
-            elif '_en' in field_name:
-                base_field_name = field_name.replace('_en', '')
-                base_verbose = self._meta.model._meta.get_field(base_field_name).verbose_name
-                field.widget.attrs['placeholder'] = f"{base_verbose} ({_('in English')})"
-                field.widget.attrs['required'] = True
-            elif '_bg' in field_name:
-                base_field_name = field_name.replace('_bg', '')
-                base_verbose = self._meta.model._meta.get_field(base_field_name).verbose_name
-                field.widget.attrs['placeholder'] = f"{base_verbose} ({_('in Bulgarian')})"
-                field.widget.attrs['required'] = True
-            elif field_name == 'current_weight':
-                field.widget.attrs['placeholder'] = _('Current weight in kgs')
-            else:
-                field.widget.attrs['placeholder'] = str(field.label).capitalize()
-
     def clean_passport_number(self):
         value = self.cleaned_data.get('passport_number')
         if value:
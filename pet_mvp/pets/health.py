@@ -0,0 +1,112 @@
+"""
+Incrementally maintained per-pet health summary.
+
+What is valid or due for a pet is worked out once when its records change and
+stored in PetHealthSummary, so the dashboards read a single row per pet instead
+of scanning the record tables with date filters. The pet details list the
+records themselves and use the row only to skip the lists it knows are empty;
+the calendar API plots every due date and still reads the records. Summaries
+are computed set-based: any number of pets costs one aggregate query per record
+type and one upsert. As records expire with the passing days, the nightly
+reconcile job recomputes every summary for the new day.
+"""
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.pets.models import Pet, PetHealthSummary
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+SUMMARY_FIELDS = [
+    'next_vaccine_due', 'next_treatment_due', 'valid_vaccines', 'last_exam_date',
+    'core_vaccines_missing', 'core_vaccines_covered', 'computed_on',
+]
+
+
+def compute_health_summaries(pet_ids, today=None):
+    """
+    Work out the health summaries of pets from their records.
+
+    Args:
+        pet_ids (iterable): primary keys of the pets; unknown ids are skipped
+        today (date, optional): day validity is computed for. Defaults to today.
+    Returns:
+        list: unsaved PetHealthSummary instances
+    """
+    today = today or timezone.now().date()
+    species = dict(Pet.objects.filter(pk__in=pet_ids).values_list('pk', 'species'))
+    if not species:
+        return []
+
+    core_totals = dict(
+        Vaccine.objects.filter(core=True)
+        .values('suitable_for')
+        .annotate(total=Count('pk'))
+        .values_list('suitable_for', 'total')
+    )
+    vaccines = {
+        row['pet']: row for row in
+        VaccinationRecord.objects.filter(pet__in=species, valid_until__gte=today)
+        .values('pet')
+        .annotate(
+            next_due=Min('valid_until'),
+            valid=Count('pk'),
+            core=Count('vaccine', filter=Q(vaccine__core=True), distinct=True),
+        )
+    }
+    treatments = dict(
+        MedicationRecord.objects.filter(pet__in=species, valid_until__gte=today)
+        .values('pet')
+        .annotate(next_due=Min('valid_until'))
+        .values_list('pet', 'next_due')
+    )
+    exams = dict(
+        MedicalExaminationRecord.objects.filter(pet__in=species)
+        .values('pet')
+        .annotate(last=Max('date_of_entry'))
+        .values_list('pet', 'last')
+    )
+
+    summaries = []
+    for pet_id, pet_species in species.items():
+        valid = vaccines.get(pet_id, {})
+        missing = max(core_totals.get(pet_species.lower(), 0) - valid.get('core', 0), 0)
+        summaries.append(PetHealthSummary(
+            pet_id=pet_id,
+            next_vaccine_due=valid.get('next_due'),
+            next_treatment_due=treatments.get(pet_id),
+            valid_vaccines=valid.get('valid', 0),
+            last_exam_date=exams.get(pet_id),
+            core_vaccines_missing=missing,
+            core_vaccines_covered=missing == 0,
+            computed_on=today,
+        ))
+    return summaries
+
+
+def refresh_health_summaries(pet_ids, today=None):
+    """
+    Recompute and store the health summaries of pets in a fixed number of queries.
+
+    Args:
+        pet_ids (iterable): primary keys of the pets; unknown ids are skipped
+        today (date, optional): day validity is computed for. Defaults to today.
+    Returns:
+        int: number of summaries stored
+    """
+    summaries = compute_health_summaries(set(pet_ids), today)
+    PetHealthSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['pet'],
+        update_fields=SUMMARY_FIELDS,
+    )
+    return len(summaries)
+
+
+def health_summary(pet):
+    """Returns the stored health summary of a pet, or None before it is first computed."""
+    try:
+        return pet.health_summary
+    except PetHealthSummary.DoesNotExist:
+        return None
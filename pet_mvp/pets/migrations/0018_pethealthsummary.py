@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 13:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0017_alter_pet_passport_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetHealthSummary',
+            fields=[
+                ('pet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='health_summary', serialize=False, to='pets.pet')),
+                ('next_vaccine_due', models.DateField(blank=True, null=True, verbose_name='Next vaccine due')),
+                ('next_treatment_due', models.DateField(blank=True, null=True, verbose_name='Next treatment due')),
+                ('valid_vaccines', models.PositiveIntegerField(default=0, verbose_name='Valid vaccines')),
+                ('last_exam_date', models.DateField(blank=True, null=True, verbose_name='Last examination')),
+                ('core_vaccines_missing', models.PositiveIntegerField(default=0, verbose_name='Missing core vaccines')),
+                ('core_vaccines_covered', models.BooleanField(default=False, verbose_name='Core vaccines covered')),
+                ('computed_on', models.DateField(verbose_name='Computed on')),
+            ],
+        ),
+    ]
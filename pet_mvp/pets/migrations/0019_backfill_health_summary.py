@@ -0,0 +1,71 @@
+import datetime
+
+from django.db import migrations
+from django.db.models import Count, Max, Min, Q
+
+CHUNK_SIZE = 2000
+
+
+def backfill_health_summary(apps, schema_editor):
+    Pet = apps.get_model('pets', 'Pet')
+    PetHealthSummary = apps.get_model('pets', 'PetHealthSummary')
+    Vaccine = apps.get_model('drugs', 'Vaccine')
+    VaccinationRecord = apps.get_model('records', 'VaccinationRecord')
+    MedicationRecord = apps.get_model('records', 'MedicationRecord')
+    MedicalExaminationRecord = apps.get_model('records', 'MedicalExaminationRecord')
+
+    today = datetime.date.today()
+    core_totals = dict(
+        Vaccine.objects.filter(core=True).values('suitable_for').annotate(total=Count('pk'))
+        .values_list('suitable_for', 'total')
+    )
+
+    pets = list(Pet.objects.order_by('pk').values_list('pk', 'species'))
+    for start in range(0, len(pets), CHUNK_SIZE):
+        species = dict(pets[start:start + CHUNK_SIZE])
+
+        vaccines = {
+            row['pet']: row for row in
+            VaccinationRecord.objects.filter(pet__in=species, valid_until__gte=today).values('pet').annotate(
+                next_due=Min('valid_until'),
+                valid=Count('pk'),
+                core=Count('vaccine', filter=Q(vaccine__core=True), distinct=True),
+            )
+        }
+        treatments = dict(
+            MedicationRecord.objects.filter(pet__in=species, valid_until__gte=today).values('pet')
+            .annotate(next_due=Min('valid_until')).values_list('pet', 'next_due')
+        )
+        exams = dict(
+            MedicalExaminationRecord.objects.filter(pet__in=species).values('pet')
+            .annotate(last=Max('date_of_entry')).values_list('pet', 'last')
+        )
+
+        summaries = []
+        for pet_id, pet_species in species.items():
+            valid = vaccines.get(pet_id, {})
+            missing = max(core_totals.get(pet_species.lower(), 0) - valid.get('core', 0), 0)
+            summaries.append(PetHealthSummary(
+                pet_id=pet_id,
+                next_vaccine_due=valid.get('next_due'),
+                next_treatment_due=treatments.get(pet_id),
+                valid_vaccines=valid.get('valid', 0),
+                last_exam_date=exams.get(pet_id),
+                core_vaccines_missing=missing,
+                core_vaccines_covered=missing == 0,
+                computed_on=today,
+            ))
+        PetHealthSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drugs', '0015_drug_is_antiparasite'),
+        ('pets', '0018_pethealthsummary'),
+        ('records', '0027_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_health_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 14:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0019_backfill_health_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetPassport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_format', models.CharField(choices=[('html', 'HTML'), ('pdf', 'PDF')], max_length=4, verbose_name='Format')),
+                ('language', models.CharField(max_length=10, verbose_name='Language')),
+                ('version', models.CharField(max_length=64, verbose_name='Version')),
+                ('file', models.FileField(max_length=255, upload_to='', verbose_name='File')),
+                ('generated_at', models.DateTimeField(auto_now=True, verbose_name='Generated at')),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='passports', to='pets.pet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pet', 'file_format', 'language'), name='unique_pet_passport')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0020_petpassport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Photo renditions'),
+        ),
+    ]
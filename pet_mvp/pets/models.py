@@ -1,13 +1,14 @@
 import os
+from functools import partial
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from pet_mvp.settings import MEDIA_ROOT
 from pet_mvp.common.mixins import TimeStampMixin
-from pet_mvp.common.utils import resize_image
+from pet_mvp.pets.photos import delete_renditions
 from pet_mvp.pets.utils import pet_directory_path, delete_pet_photo
 from pet_mvp.pets.validators import validate_transponder_code
 
@@ -121,6 +122,14 @@ class Pet(TimeStampMixin):
         verbose_name=_('Photo')
     )
 
+    # resized copies of the photo, see pet_mvp.pets.photos
+    photo_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name=_('Photo renditions'),
+    )
+
     current_weight = models.DecimalField(
         max_digits=3,
         decimal_places=1,
@@ -155,9 +164,27 @@ class Pet(TimeStampMixin):
         blank=True
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        pet = super().from_db(db, field_names, values)
+        # the stored photo, so saves which keep it do not queue the renditions again
+        pet._stored_photo = dict(zip(field_names, values)).get('photo')
+        return pet
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
 
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            # a new upload is not committed to the storage before the save
+            photo_changed = (
+                is_new
+                or not self.photo._committed
+                or self.photo.name != getattr(self, '_stored_photo', None)
+            )
+        else:
+            photo_changed = 'photo' in update_fields
+
         super(Pet, self).save(*args, **kwargs)
 
         # Rename only for newly created objects and only if a photo was uploaded
@@ -179,12 +206,18 @@ class Pet(TimeStampMixin):
                 # Save again to update file path in DB without triggering recursion
                 super(Pet, self).save(update_fields=['photo'])
 
-        # Resize after saving
-        if self.photo:
-            from django.db import transaction
-            transaction.on_commit(lambda: resize_image(self.photo.path, self.photo.path))
-        else:
+        # The renditions are made in the background once the upload is committed
+        if photo_changed and self.photo:
+            from pet_mvp.pets.tasks import process_pet_photo
+            transaction.on_commit(partial(process_pet_photo.delay, self.pk))
+        elif photo_changed:
             delete_pet_photo(self)
+            if self.photo_renditions:
+                delete_renditions(self.photo_renditions)
+                self.photo_renditions = {}
+                super(Pet, self).save(update_fields=['photo_renditions'])
+
+        self._stored_photo = self.photo.name
 
     @property
     def age(self):
@@ -276,3 +309,114 @@ class Tattoo(BaseMarking):
         max_length=BaseMarking.LOCATION_MAX_LENGTH,
         verbose_name=_('Location of the tattoo')
     )
+
+
+class PetHealthSummary(models.Model):
+    """
+    Denormalized health state of a pet, read by the dashboards in a single join
+    instead of scanning the record tables.
+    Rows are refreshed when the records of the pet change and reconciled nightly,
+    see pet_mvp.pets.health.
+    """
+
+    pet = models.OneToOneField(
+        to=Pet,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='health_summary',
+    )
+
+    next_vaccine_due = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Next vaccine due'),
+    )
+
+    next_treatment_due = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Next treatment due'),
+    )
+
+    valid_vaccines = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Valid vaccines'),
+    )
+
+    last_exam_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_('Last examination'),
+    )
+
+    # core vaccines of the species without a valid record
+    core_vaccines_missing = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Missing core vaccines'),
+    )
+
+    core_vaccines_covered = models.BooleanField(
+        default=False,
+        verbose_name=_('Core vaccines covered'),
+    )
+
+    # day the validity above was worked out for
+    computed_on = models.DateField(
+        verbose_name=_('Computed on'),
+    )
+
+    def __str__(self):
+        return f'{self.pet_id} - {self.computed_on}'
+
+
+class PetPassport(models.Model):
+    """
+    Latest rendered digital passport of a pet in a format and language.
+    The file is stored under the hash of its content; version is the hash of the pet's
+    record versions it was rendered from, see pet_mvp.pets.passport.
+    """
+
+    FORMAT_CHOICES = [
+        ('html', 'HTML'),
+        ('pdf', 'PDF'),
+    ]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pet', 'file_format', 'language'], name='unique_pet_passport'),
+        ]
+
+    pet = models.ForeignKey(
+        to=Pet,
+        on_delete=models.CASCADE,
+        related_name='passports',
+    )
+
+    file_format = models.CharField(
+        max_length=4,
+        choices=FORMAT_CHOICES,
+        verbose_name=_('Format'),
+    )
+
+    language = models.CharField(
+        max_length=10,
+        verbose_name=_('Language'),
+    )
+
+    version = models.CharField(
+        max_length=64,
+        verbose_name=_('Version'),
+    )
+
+    file = models.FileField(
+        max_length=255,
+        verbose_name=_('File'),
+    )
+
+    generated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_('Generated at'),
+    )
+
+    def __str__(self):
+        return f'{self.pet_id} - {self.file_format} - {self.language}'
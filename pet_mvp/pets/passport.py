@@ -0,0 +1,281 @@
+"""
+Digital pet passport, rendered as HTML or PDF in the background and served from storage.
+
+A passport gathers the pet, its marking and owners, every vaccination and
+treatment and the latest examinations, which is too slow to render inside a
+request. Its version is a hash of what it is rendered from: the pet row, the
+marking and owners, and the count and latest updated_at of each record type.
+Working out the version takes a few indexed aggregate queries; while it matches
+the stored passport the file is served as is, and only a changed record makes
+the render task run again. Rendered files are stored under the hash of their
+content, so rendering an unchanged passport again does not write a new file,
+and the files of replaced passports and of deleted pets are deleted.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.translation import gettext as _
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from pet_mvp.pets.models import Pet, PetPassport, Transponder, Tattoo
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+# format -> content type
+PASSPORT_FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+# bumped when the layout of the passport changes, so every stored passport is rendered again
+LAYOUT_VERSION = 1
+
+# latest examinations in a passport
+PASSPORT_EXAMINATIONS = 5
+
+MARKING_FIELDS = ('code', 'location', 'date_of_application', 'date_of_reading')
+OWNER_FIELDS = ('email', 'phone_number', 'owner__first_name', 'owner__last_name')
+
+
+def passport_markings(pet):
+    """Returns the (type, fields) of the transponder and the tattoo of the pet, in one query each."""
+    return [
+        (model.__name__, row)
+        for model in (Transponder, Tattoo)
+        for row in model.objects.filter(pet=pet).values(*MARKING_FIELDS)
+    ]
+
+
+def passport_owners(pet):
+    """Returns the contact fields of the owners of the pet, in one query."""
+    return list(pet.owners.order_by('pk').values(*OWNER_FIELDS))
+
+
+def passport_version(pet, language, markings=None, owners=None):
+    """
+    Hash of the pet's record versions a passport is rendered from.
+
+    Args:
+        pet (Pet): the pet
+        language (str): language of the passport
+        markings (list, optional): the markings of the pet, see passport_markings
+        owners (list, optional): the owners of the pet, see passport_owners
+    Returns:
+        str: hex SHA-256 of the versions
+    """
+    records = [
+        model.objects.filter(pet=pet).aggregate(count=Count('pk'), updated=Max('updated_at'))
+        for model in (VaccinationRecord, MedicationRecord, MedicalExaminationRecord)
+    ]
+    payload = [
+        LAYOUT_VERSION,
+        language,
+        pet.updated_at,
+        passport_markings(pet) if markings is None else markings,
+        passport_owners(pet) if owners is None else owners,
+        records,
+    ]
+    return hashlib.sha256(json.dumps(payload, cls=DjangoJSONEncoder).encode()).hexdigest()
+
+
+def passport_context(pet, markings, owners):
+    """Everything a passport shows, as plain values."""
+    return {
+        'pet': pet,
+        'details': [
+            (_('Name'), pet.name),
+            (_('Species'), pet.get_species_display()),
+            (_('Breed'), pet.get_breed_display()),
+            (_('Sex'), pet.get_sex_display()),
+            (_('Date of birth'), pet.date_of_birth),
+            (_('Color'), pet.color),
+            (_('Passport number'), pet.passport_number or ''),
+        ],
+        'markings': markings,
+        'owners': owners,
+        'vaccinations': list(
+            VaccinationRecord.objects.filter(pet=pet)
+            .order_by('date_of_vaccination', 'pk')
+            .values('date_of_vaccination', 'vaccine__name', 'manufacturer', 'batch_number', 'valid_from',
+                    'valid_until')
+        ),
+        'treatments': list(
+            MedicationRecord.objects.filter(pet=pet)
+            .order_by('date', 'pk')
+            .values('date', 'medication__name', 'manufacturer', 'dosage', 'valid_until')
+        ),
+        'examinations': list(
+            MedicalExaminationRecord.objects.filter(pet=pet)
+            .order_by('-date_of_entry', '-pk')
+            .values('date_of_entry', 'clinic__clinic__name', 'doctor', 'reason_for_visit', 'diagnosis')
+            [:PASSPORT_EXAMINATIONS]
+        ),
+    }
+
+
+def render_html(context):
+    return render_to_string('pet/passport.html', context).encode()
+
+
+@lru_cache
+def register_font(path):
+    """Registers a TrueType font once per process and returns its name, e.g. 'DejaVuSans'."""
+    name = Path(path).stem
+    pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+
+def render_pdf(context):
+    """Renders the passport as a PDF; the same context always gives the same bytes."""
+    styles = getSampleStyleSheet()
+    font = 'Helvetica'
+    if settings.PASSPORT_PDF_FONT:
+        # the built-in fonts have no Cyrillic
+        font = register_font(settings.PASSPORT_PDF_FONT)
+        for style in styles.byName.values():
+            style.fontName = font
+
+    def table(header, rows):
+        if not rows:
+            return Paragraph(_('No records'), styles['Normal'])
+        result = Table([header] + [['' if value is None else str(value) for value in row] for row in rows],
+                       repeatRows=1, hAlign='LEFT')
+        result.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ]))
+        return result
+
+    def section(title, content):
+        return [Spacer(1, 12), Paragraph(title, styles['Heading2']), content]
+
+    story = [Paragraph(_('Pet Passport'), styles['Title'])]
+    story += section(_('Details'), table([_('Field'), _('Value')], context['details']))
+    story += section(_('Marking'), table(
+        [_('Type'), _('Code'), _('Location'), _('Date of application'), _('Date of reading')],
+        [[kind, *[marking[field] for field in MARKING_FIELDS]] for kind, marking in context['markings']],
+    ))
+    story += section(_('Owners'), table(
+        [_('Email'), _('Phone number'), _('First name'), _('Last name')],
+        [[owner[field] for field in OWNER_FIELDS] for owner in context['owners']],
+    ))
+    story += section(_('Vaccinations'), table(
+        [_('Date'), _('Vaccine'), _('Manufacturer'), _('Batch number'), _('Valid from'), _('Valid until')],
+        [list(record.values()) for record in context['vaccinations']],
+    ))
+    story += section(_('Treatments'), table(
+        [_('Date'), _('Treatment'), _('Manufacturer'), _('Dosage'), _('Valid until')],
+        [list(record.values()) for record in context['treatments']],
+    ))
+    story += section(_('Latest examinations'), table(
+        [_('Date'), _('Clinic'), _('Doctor'), _('Reason for visit'), _('Diagnosis')],
+        [list(record.values()) for record in context['examinations']],
+    ))
+
+    buffer = BytesIO()
+    # invariant leaves the creation date and a random id out, so unchanged passports hash the same
+    document = SimpleDocTemplate(buffer, pagesize=A4, title=str(context['pet']), invariant=True)
+    document.build(story)
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    'html': render_html,
+    'pdf': render_pdf,
+}
+
+
+def store_content(content, file_format):
+    """
+    Store a rendered file under the hash of its content, unless a file with the same content is stored.
+
+    Returns:
+        str: storage name of the file
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    name = f'passports/{digest[:2]}/{digest}.{file_format}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name
+
+
+def delete_passport_file(name):
+    """Deletes a replaced passport file, unless another passport is stored with the same content."""
+    if not PetPassport.objects.filter(file=name).exists():
+        default_storage.delete(name)
+
+
+def passport_files(pet):
+    """Storage names of the passport files of a pet."""
+    return set(PetPassport.objects.filter(pet=pet).values_list('file', flat=True))
+
+
+def stored_passport(pet, file_format, language):
+    """
+    The stored passport of a pet while it is up to date.
+
+    Returns:
+        tuple: the PetPassport or None when it has to be rendered, and the current version
+    """
+    version = passport_version(pet, language)
+    passport = PetPassport.objects.filter(
+        pet=pet, file_format=file_format, language=language, version=version
+    ).first()
+    if passport is not None and not default_storage.exists(passport.file.name):
+        passport = None
+    return passport, version
+
+
+def generate_passport(pet_id, file_format, language):
+    """
+    Render and store the passport of a pet, unless the stored one is up to date.
+
+    Args:
+        pet_id (int): primary key of the pet
+        file_format (str): 'html' or 'pdf'
+        language (str): language of the passport
+    Returns:
+        PetPassport: the stored passport, or None if the pet no longer exists
+    """
+    pet = Pet.objects.filter(pk=pet_id).first()
+    if pet is None:
+        return None
+
+    markings, owners = passport_markings(pet), passport_owners(pet)
+    version = passport_version(pet, language, markings, owners)
+    previous = PetPassport.objects.filter(pet=pet, file_format=file_format, language=language).first()
+    if previous is not None and previous.version == version and default_storage.exists(previous.file.name):
+        return previous
+
+    with translation.override(language):
+        content = RENDERERS[file_format](passport_context(pet, markings, owners))
+
+    passport = PetPassport(
+        pet=pet, file_format=file_format, language=language, version=version,
+        file=store_content(content, file_format),
+    )
+    PetPassport.objects.bulk_create(
+        [passport],
+        update_conflicts=True,
+        unique_fields=['pet', 'file_format', 'language'],
+        update_fields=['version', 'file', 'generated_at'],
+    )
+    if previous is not None and previous.file.name != passport.file.name:
+        delete_passport_file(previous.file.name)
+    return passport
@@ -0,0 +1,168 @@
+"""
+Renditions of the pet photos, made in the background after an upload.
+
+A phone photo is several megapixels while the pages show it at 60 to 150 pixels,
+so every photo is stored in a few sizes, each as WebP and JPEG, and the pages
+pick one with srcset. The upload is decoded once, reduced while it is loaded
+(JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale), and the smaller sizes are
+resized from the largest. Rendition names carry a hash of the upload, so a new
+photo never reuses the URL a browser has cached for the old one.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# rendition -> longest side in pixels, smallest first
+PHOTO_RENDITIONS = {
+    'thumbnail': 128,
+    'card': 320,
+    'detail': 800,
+}
+
+# format -> Pillow format and save options, preferred format first
+PHOTO_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+# bytes of the upload hashed per read
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def photo_digest(photo):
+    """Returns the SHA-256 of an uploaded photo, read in chunks."""
+    digest = hashlib.sha256()
+    with photo.open('rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_reduced(file, size):
+    """
+    Decode an image for a box of size pixels, upright and in RGB.
+    JPEG files are decoded at the smallest scale still covering the box.
+    """
+    image = Image.open(file)
+    image.draft('RGB', (size, size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+    return image
+
+
+def render_renditions(photo):
+    """
+    Resize a photo to every rendition and format.
+
+    Args:
+        photo (FieldFile): the uploaded photo
+    Returns:
+        dict: rendition -> (width, height, {format: encoded bytes})
+    Raises:
+        OSError: if the photo cannot be read or decoded
+    """
+    with photo.open('rb') as file:
+        image = load_reduced(file, max(PHOTO_RENDITIONS.values()))
+
+    renditions = {}
+    # largest first, each resized from the one before
+    for rendition, size in sorted(PHOTO_RENDITIONS.items(), key=lambda item: item[1], reverse=True):
+        image = image.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        encoded = {}
+        for file_format, (pillow_format, options) in PHOTO_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, pillow_format, **options)
+            encoded[file_format] = buffer.getvalue()
+        renditions[rendition] = image.width, image.height, encoded
+    return renditions
+
+
+def rendition_name(pet_id, digest, rendition, file_format):
+    return f'pets/renditions/{pet_id}/{digest[:16]}_{rendition}.{file_format}'
+
+
+def store_renditions(pet_id, digest, renditions):
+    """
+    Store the renditions of a photo.
+
+    Returns:
+        dict: the stored renditions as kept in Pet.photo_renditions, i.e. the digest of the
+            upload and rendition -> {'width', 'height', and the storage name of each format}
+    """
+    stored = {'digest': digest}
+    for rendition, (width, height, encoded) in renditions.items():
+        stored[rendition] = {'width': width, 'height': height}
+        for file_format, content in encoded.items():
+            name = rendition_name(pet_id, digest, rendition, file_format)
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(content))
+            stored[rendition][file_format] = name
+    return stored
+
+
+def delete_renditions(renditions):
+    """Deletes the stored files of Pet.photo_renditions."""
+    for rendition in PHOTO_RENDITIONS:
+        for file_format in PHOTO_FORMATS:
+            name = renditions.get(rendition, {}).get(file_format)
+            if name:
+                default_storage.delete(name)
+
+
+def process_photo(pet):
+    """
+    Make the renditions of the photo of a pet, unless they are made from the same upload.
+
+    Args:
+        pet (Pet): the pet
+    Returns:
+        bool: whether renditions were made
+    Raises:
+        OSError: if the photo cannot be read or decoded
+    """
+    if not pet.photo:
+        return False
+
+    digest = photo_digest(pet.photo)
+    previous = pet.photo_renditions or {}
+    if previous.get('digest') == digest:
+        return False
+
+    stored = store_renditions(pet.pk, digest, render_renditions(pet.photo))
+    # update() does not call save(), which would queue the processing again
+    type(pet).objects.filter(pk=pet.pk).update(photo_renditions=stored)
+    pet.photo_renditions = stored
+    delete_renditions(previous)
+    return True
+
+
+def photo_srcset(renditions, file_format):
+    """Returns the srcset of the renditions in a format, e.g. '/media/....webp 128w, /media/....webp 320w'."""
+    return ', '.join(
+        f'{default_storage.url(renditions[rendition][file_format])} {renditions[rendition]["width"]}w'
+        for rendition in PHOTO_RENDITIONS
+        if file_format in renditions.get(rendition, {})
+    )
+
+
+def photo_url(pet, rendition, file_format='jpeg'):
+    """Returns the URL of a rendition of the pet's photo, the uploaded photo until it is made, or ''."""
+    name = (pet.photo_renditions or {}).get(rendition, {}).get(file_format)
+    if name:
+        return default_storage.url(name)
+    return pet.photo.url if pet.photo else ''
+
+
+def fitting_rendition(size):
+    """Returns the smallest rendition sharp at twice the size, for high density screens."""
+    for rendition, longest_side in PHOTO_RENDITIONS.items():
+        if longest_side >= size * 2:
+            return rendition
+    return rendition
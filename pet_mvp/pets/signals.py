@@ -1,12 +1,38 @@
-from django.db.models.signals import post_save, post_delete
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 
+from pet_mvp.pets.health import refresh_health_summaries
 from pet_mvp.pets.models import Pet
+from pet_mvp.pets.passport import delete_passport_file, passport_files
+from pet_mvp.pets.photos import delete_renditions
 from pet_mvp.pets.utils import delete_pet_photo
 
 
+@receiver(signal=pre_delete, sender=Pet)
+def collect_pet_files(sender, instance, **kwargs):
+    """Signal handler to note the passport files of a pet before its passports are deleted with it"""
+
+    instance.passport_files = passport_files(instance)
+
+
 @receiver(signal=post_delete, sender=Pet)
 def cleanup_pet_references(sender, instance, **kwargs):
     """Signal handler to clean up any references when a pet is deleted"""
 
     delete_pet_photo(instance)
+    delete_renditions(instance.photo_renditions)
+    for name in getattr(instance, 'passport_files', ()):
+        delete_passport_file(name)
+
+
+@receiver(signal=post_save, sender=Pet)
+def refresh_pet_health_summary(sender, instance, created, update_fields=None, **kwargs):
+    """Signal handler to store the health summary of a new pet, or of a pet whose species changed"""
+
+    if not created and update_fields is not None and 'species' not in update_fields:
+        return
+
+    transaction.on_commit(partial(refresh_health_summaries, [instance.pk]))
@@ -0,0 +1,72 @@
+from celery import shared_task
+from PIL import Image
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext_lazy as _
+
+from pet_mvp.common.utils import id_ranges, dispatch_shards
+from pet_mvp.pets.health import refresh_health_summaries
+from pet_mvp.pets.models import Pet
+from pet_mvp.pets.passport import generate_passport
+from pet_mvp.pets.photos import process_photo
+
+
+@shared_task
+def reconcile_health_summaries():
+    """
+    Nightly recompute of every pet's health summary for the new day, as records expire
+    without being saved. It also repairs summaries missed by bulk writes or catalog changes.
+    The pets are split by id range into shards which run in parallel across the workers.
+    """
+    today = timezone.now().date().isoformat()
+    shards = [
+        (first, last, today)
+        for first, last in id_ranges(Pet.objects.all(), settings.DAILY_JOB_SHARD_SIZE)
+    ]
+
+    result = dispatch_shards(reconcile_health_summary_shard, shards, collect_health_summary_shards.s())
+
+    if len(shards) > 1:
+        return _("Dispatched {} health summary shards").format(len(shards))
+    return result
+
+
+@shared_task
+def reconcile_health_summary_shard(first_pet_id, last_pet_id, today):
+    """Recomputes the health summaries of the pets in an id range"""
+    pet_ids = Pet.objects.filter(pk__gte=first_pet_id, pk__lte=last_pet_id).values_list('pk', flat=True)
+    return refresh_health_summaries(list(pet_ids), parse_date(today))
+
+
+@shared_task
+def collect_health_summary_shards(results):
+    """Chord callback adding up the summaries reconciled by the shards"""
+    return _("Reconciled {} health summaries").format(sum(results))
+
+
+@shared_task
+def render_pet_passport(pet_id, file_format, language):
+    """Renders and stores the passport of a pet, unless the stored one is still up to date"""
+    passport = generate_passport(pet_id, file_format, language)
+    if passport is None:
+        return _("Pet {} no longer exists").format(pet_id)
+    return _("Passport {} of pet {} is up to date").format(passport.version[:12], pet_id)
+
+
+@shared_task
+def process_pet_photo(pet_id):
+    """Makes the thumbnail, card and detail renditions of a pet's photo as WebP and JPEG"""
+    pet = Pet.objects.filter(pk=pet_id).first()
+    if pet is None:
+        return _("Pet {} no longer exists").format(pet_id)
+
+    try:
+        processed = process_photo(pet)
+    except (OSError, Image.DecompressionBombError) as error:
+        return _("Could not process the photo of pet {}: {}").format(pet_id, error)
+
+    if processed:
+        return _("Processed the photo of pet {}").format(pet_id)
+    return _("The photo of pet {} is up to date").format(pet_id)
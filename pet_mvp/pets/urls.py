@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_not_required
 
 from pet_mvp.pets.views import ApprovePetAdditionView, PetDetailView, PetEditView, PetAddView, PetDeleteView, \
     MarkingAddView, MarkingDetailsView, AddExistingPetView, GenerateShareTokenView, AcceptShareTokenView, \
-    PetAccessHistoryView
+    PetAccessHistoryView, PetPassportView
 
 urlpatterns = [
     path('add/', PetAddView.as_view(), name='pet-add'),
@@ -14,6 +14,7 @@ urlpatterns = [
     path('<int:pk>/',
          include([
              path('details/', PetDetailView.as_view(), name='pet-details'),
+             path('passport/<str:file_format>/', PetPassportView.as_view(), name='pet-passport'),
              path('access-history/', PetAccessHistoryView.as_view(), name='pet-access-history'),
              path('edit/', PetEditView.as_view(), name='pet-edit'),
              path('delete/', PetDeleteView.as_view(), name='pet-delete'),
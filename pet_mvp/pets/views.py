@@ -1,26 +1,35 @@
 from datetime import date
+from functools import partial
 import qrcode
 import base64
 from io import BytesIO
 from datetime import timedelta
+from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponseBadRequest, HttpResponseRedirect
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, FileResponse, Http404, \
+    HttpResponseForbidden
 from django.shortcuts import redirect, get_object_or_404, render
 from django.urls import reverse_lazy, reverse
 from django.views import generic as views
 from django.core.signing import Signer, BadSignature
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext as _, get_language
 from django.contrib import messages
 
 from pet_mvp.access_codes.models import QRShareToken, VetPetAccess
-from pet_mvp.access_codes.utils import generate_access_code
+from pet_mvp.access_codes.utils import generate_access_code, can_view_pet
 from pet_mvp.logs.mixins import PetAccessLoggingMixin
 from pet_mvp.logs.models import PetAccessLog
 from pet_mvp.notifications.tasks import send_owner_pet_addition_request
 from pet_mvp.pets.forms import AddExistingPetForm, PetAddForm, MarkingAddForm, PetEditForm
+from pet_mvp.pets.health import health_summary
 from pet_mvp.pets.models import Pet
+from pet_mvp.pets.passport import PASSPORT_FORMATS, stored_passport
+from pet_mvp.pets.tasks import render_pet_passport
 
 UserModel = get_user_model()
 signer = Signer()
@@ -35,15 +44,15 @@ class PetDetailView(PetAccessLoggingMixin, views.DetailView, ):
             self.access_log_method = 'clinic'
 
         response = super().get(request, *args, **kwargs)
-        pet = self.get_object()
-        self.log_pet_access_once_per_session(request, pet)
+        self.log_pet_access_once_per_session(request, self.object)
         return response
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('health_summary')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        # get the pet
-        pet = Pet.objects.get(pk=self.kwargs['pk'])
+        pet = self.object
 
         # generate code
         user = self.request.user
@@ -51,16 +60,59 @@ class PetDetailView(PetAccessLoggingMixin, views.DetailView, ):
             access_code = generate_access_code(pet)
             context['access_code'] = access_code.code
 
-        context['valid_vaccinations'] = pet.vaccine_records.filter(valid_until__gte=date.today()).order_by(
-            '-valid_until')
-        context['valid_treatments'] = pet.medication_records.filter(valid_until__gte=date.today()).order_by(
-            '-created_at')
-        context['last_examinations'] = pet.examination_records.all().order_by(
-            '-created_at')[:3]
+        # the page lists the records themselves, which the summary does not hold; it only
+        # tells which of the lists are empty, so those are not queried
+        summary = health_summary(pet)
+        context['health_summary'] = summary
+
+        vaccinations = pet.vaccine_records.filter(valid_until__gte=date.today()).order_by('-valid_until')
+        treatments = pet.medication_records.filter(valid_until__gte=date.today()).order_by('-created_at')
+        examinations = pet.examination_records.all().order_by('-created_at')
+        if summary is not None and summary.computed_on == date.today():
+            if not summary.valid_vaccines:
+                vaccinations = vaccinations.none()
+            if summary.next_treatment_due is None:
+                treatments = treatments.none()
+            if summary.last_exam_date is None:
+                examinations = examinations.none()
+
+        context['valid_vaccinations'] = vaccinations
+        context['valid_treatments'] = treatments
+        context['last_examinations'] = examinations[:3]
 
         return context
 
 
+class PetPassportView(views.View):
+    """
+    Serves the passport of a pet as HTML or PDF straight from storage while it is up to date.
+    Otherwise it is rendered in the background and a page refreshing until it is ready is shown.
+    """
+
+    def get(self, request, pk, file_format):
+        if file_format not in PASSPORT_FORMATS:
+            raise Http404(_("No such format"))
+
+        pet = get_object_or_404(Pet, pk=pk)
+        if not can_view_pet(request.user, pet):
+            return HttpResponseForbidden(_("You do not have access to this pet"))
+
+        language = get_language()
+        passport, version = stored_passport(pet, file_format, language)
+        if passport is not None:
+            return FileResponse(
+                default_storage.open(passport.file.name),
+                as_attachment=file_format == 'pdf',
+                filename=f'passport_{pet.pk}.{file_format}',
+                content_type=PASSPORT_FORMATS[file_format],
+            )
+
+        # polling while the passport renders does not queue it again
+        if cache.add(f'passport:{pet.pk}:{file_format}:{language}:{version}', True, settings.PASSPORT_RENDER_LOCK):
+            render_pet_passport.delay(pet.pk, file_format, language)
+        return render(request, 'pet/passport_pending.html', {'pet': pet}, status=202)
+
+
 class PetEditView(views.UpdateView):
     model = Pet
     template_name = "pet/pet_edit.html"
@@ -111,12 +163,13 @@ class AddExistingPetView(views.FormView):
             reverse('approve-pet-addition', args=[token])
         )
 
-        send_owner_pet_addition_request(
-            existing_owner=existing_owner,
-            new_owner=self.request.user,
-            pet=pet,
+        transaction.on_commit(partial(
+            send_owner_pet_addition_request.delay,
+            existing_owner_id=existing_owner.pk,
+            new_owner_id=self.request.user.pk,
+            pet_id=pet.pk,
             approval_url=approval_url
-        )
+        ))
 
         pet.pending_owners.add(self.request.user)
         messages.success(self.request, _(
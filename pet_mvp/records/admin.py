@@ -1,6 +1,19 @@
-from django.contrib import admin
+import io
+import tempfile
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.translation import gettext_lazy as _
 
+from pet_mvp.notifications.tasks import send_vaccine_recall_notifications
+from pet_mvp.records.exports import EXPORT_FORMATS
+from pet_mvp.records.forms import RecordImportForm
+from pet_mvp.records.imports import file_format, import_records
+from pet_mvp.records.recalls import recalled_records, recall_summary, recall_lines, recall_file_name, RecallError
 from pet_mvp.records.models import (
     VaccinationRecord,
     MedicationRecord,
@@ -8,12 +21,79 @@ from pet_mvp.records.models import (
 )
 
 
+class RecordImportMixin:
+    """
+    Adds an upload page importing the historical records of a clinic export to the changelist.
+    When rows fail, the per-row error report is returned as a CSV download.
+    """
+    import_record_type = None
+    change_list_template = 'admin/records/import_change_list.html'
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name=f'{opts.app_label}_{opts.model_name}_import',
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = RecordImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            # the report is spooled to disk as it is written, however many rows fail
+            report = io.TextIOWrapper(tempfile.TemporaryFile(), encoding='utf-8', newline='')
+
+            try:
+                result = import_records(
+                    io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+                    self.import_record_type,
+                    file_format(upload.name),
+                    report=report,
+                )
+            except ValueError as error:
+                report.close()
+                form.add_error('file', str(error))
+            else:
+                self.message_user(
+                    request,
+                    _('Imported %(created)s records, %(failed)s rows failed.') % result._asdict(),
+                    messages.WARNING if result.failed else messages.SUCCESS,
+                )
+                if not result.failed:
+                    report.close()
+                    opts = self.model._meta
+                    return redirect(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+
+                report.flush()
+                report_file = report.detach()
+                report_file.seek(0)
+                return FileResponse(
+                    report_file, as_attachment=True, filename=f'{self.import_record_type}_import_errors.csv'
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _('Import %(name)s') % {'name': self.model._meta.verbose_name_plural},
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/records/import_records.html', context)
+
+
 @admin.register(VaccinationRecord)
-class VaccinationRecordAdmin(admin.ModelAdmin):
+class VaccinationRecordAdmin(RecordImportMixin, admin.ModelAdmin):
+    import_record_type = 'vaccination'
     list_display = ('vaccine', 'pet', 'date_of_vaccination', 'valid_until', 'batch_number', 'manufacturer')
     list_filter = ('vaccine', 'pet', 'date_of_vaccination')
     search_fields = ('vaccine__name', 'pet__name', 'batch_number', 'manufacturer')
     date_hierarchy = 'date_of_vaccination'
+    actions = ['download_recall_report', 'notify_recall_owners']
     fieldsets = (
         (_('Vaccination Details'), {
             'fields': ('vaccine', 'pet', 'date_of_vaccination', 'valid_from', 'valid_until')
@@ -23,9 +103,46 @@ class VaccinationRecordAdmin(admin.ModelAdmin):
         }),
     )
 
+    @staticmethod
+    def recalled_lots(queryset):
+        """The distinct (batch number, manufacturer) lots of the selected records."""
+        return list(queryset.exclude(batch_number='').values_list('batch_number', 'manufacturer').distinct())
+
+    @admin.action(description=_('Download the recall report of the selected batches'))
+    def download_recall_report(self, request, queryset):
+        lots = self.recalled_lots(queryset)
+        try:
+            records = recalled_records(lots)
+        except RecallError:
+            self.message_user(request, _('The selected records have no batch number.'), messages.ERROR)
+            return None
+
+        response = StreamingHttpResponse(recall_lines(records, 'csv'), content_type=EXPORT_FORMATS['csv'])
+        batch_number = lots[0][0] if len(lots) == 1 else 'batches'
+        response['Content-Disposition'] = f'attachment; filename="{recall_file_name(batch_number, "csv")}"'
+        return response
+
+    @admin.action(description=_('Notify the owners of pets vaccinated from the selected batches'))
+    def notify_recall_owners(self, request, queryset):
+        lots = self.recalled_lots(queryset)
+        try:
+            summary = recall_summary(recalled_records(lots))
+        except RecallError:
+            self.message_user(request, _('The selected records have no batch number.'), messages.ERROR)
+            return
+
+        send_vaccine_recall_notifications.delay(lots)
+        self.message_user(
+            request,
+            _('Notifying %(owners)s owners of %(pets)s pets about %(records)s recalled vaccinations.')
+            % summary._asdict(),
+            messages.SUCCESS,
+        )
+
 
 @admin.register(MedicationRecord)
-class MedicationRecordAdmin(admin.ModelAdmin):
+class MedicationRecordAdmin(RecordImportMixin, admin.ModelAdmin):
+    import_record_type = 'medication'
     list_display = ('medication', 'pet', 'date', 'dosage', 'valid_until', 'manufacturer')
     list_filter = ('medication', 'pet', 'date')
     search_fields = ('medication__name', 'pet__name', 'dosage', 'manufacturer')
@@ -0,0 +1,156 @@
+"""
+Campaign mode: one vaccination or medication entered for many pets in one submission.
+
+Shelters and vaccination drives give the same vaccine and batch number to dozens
+or hundreds of animals. The pets of a campaign are resolved by id or passport
+number and their access is checked in a fixed number of queries, the records are
+bulk inserted with their reminder schedule, and the owners are notified by one
+batched job once the campaign is committed.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from pet_mvp.access_codes.models import VetPetAccess
+from pet_mvp.notifications.reminders import schedule_reminders
+from pet_mvp.notifications.tasks import send_campaign_notifications
+from pet_mvp.pets.health import refresh_health_summaries
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.forms import VaccinationRecordForm, MedicationRecordBaseForm
+
+# record type -> form validating the record template and its catalog field
+CAMPAIGN_TYPES = {
+    'vaccination': (VaccinationRecordForm, 'vaccine'),
+    'medication': (MedicationRecordBaseForm, 'medication'),
+}
+
+# flags set later on by the owners and the admin, never by a campaign
+MANAGED_FIELDS = {'is_wrong', 'is_editable'}
+
+
+class CampaignError(ValueError):
+    """
+    Raised when a campaign cannot be recorded; nothing is saved then.
+
+    Args:
+        message (str): reason, returned to the client
+        status (int): HTTP status of the response
+        details (dict, optional): e.g. the offending pets or the form errors
+    """
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details or {}
+
+
+def resolve_pets(references):
+    """
+    Load the pets of a campaign given by id or passport number, in one query.
+
+    Args:
+        references (list): pet ids (int) or passport numbers (str)
+    Returns:
+        list: the pets, without duplicates, in the order given
+    Raises:
+        CampaignError: if a reference is not an id or a passport number, or does not match a pet
+    """
+    # booleans are ints to python, and lists or objects cannot be looked up
+    invalid = [
+        reference for reference in references
+        if isinstance(reference, bool) or not isinstance(reference, (int, str))
+    ]
+    if invalid:
+        raise CampaignError('Invalid pets', details={'pets': invalid})
+
+    ids = {reference for reference in references if isinstance(reference, int)}
+    passports = {reference for reference in references if isinstance(reference, str)}
+
+    pets = Pet.objects.filter(Q(pk__in=ids) | Q(passport_number__in=passports))
+    by_reference = {}
+    for pet in pets:
+        by_reference[pet.pk] = pet
+        if pet.passport_number:
+            by_reference[pet.passport_number] = pet
+
+    unknown = [reference for reference in references if reference not in by_reference]
+    if unknown:
+        raise CampaignError('Unknown pets', details={'pets': unknown})
+
+    return list({pet.pk: pet for pet in (by_reference[reference] for reference in references)}.values())
+
+
+def inaccessible_pets(user, pets, record_type):
+    """
+    Pets the user may not add the records of a campaign to, checked in two queries.
+    Owners may add records to their pets, vaccinations only while the pet allows it;
+    vets may add records to the pets they have active access to.
+    """
+    pet_ids = [pet.pk for pet in pets]
+    owned = set(user.pets.filter(pk__in=pet_ids).values_list('pk', flat=True))
+    granted = set(
+        VetPetAccess.objects.filter(vet=user, pet_id__in=pet_ids, expires_at__gt=timezone.now())
+        .values_list('pet_id', flat=True)
+    )
+
+    def can_add(pet):
+        if pet.pk in granted:
+            return True
+        return pet.pk in owned and (record_type != 'vaccination' or pet.can_add_vaccines)
+
+    return [pet for pet in pets if not can_add(pet)]
+
+
+def record_campaign(user, record_type, pet_references, template):
+    """
+    Add the same vaccination or medication record to many pets.
+
+    Args:
+        user (UserModel): the owner or vet entering the campaign
+        record_type (str): 'vaccination' or 'medication'
+        pet_references (list): pet ids (int) or passport numbers (str)
+        template (dict): the record fields, as submitted to the single record forms
+    Returns:
+        list: the created VaccinationRecord or MedicationRecord instances
+    Raises:
+        CampaignError: if the template is invalid, or a pet is unknown, not accessible
+            or of a species the vaccine or medication is not suitable for
+    """
+    if record_type not in CAMPAIGN_TYPES:
+        raise CampaignError('Unknown record type')
+    form_class, catalog_field = CAMPAIGN_TYPES[record_type]
+
+    form = form_class(data=template)
+    if not form.is_valid():
+        raise CampaignError('Invalid record', details={'errors': form.errors.get_json_data()})
+
+    pets = resolve_pets(pet_references)
+
+    forbidden = inaccessible_pets(user, pets, record_type)
+    if forbidden:
+        raise CampaignError('Not authorized', status=403, details={'pets': [pet.pk for pet in forbidden]})
+
+    suitable_for = form.cleaned_data[catalog_field].suitable_for
+    unsuitable = [pet.pk for pet in pets if pet.species.lower() != suitable_for]
+    if unsuitable:
+        raise CampaignError('Not suitable for the species', details={'pets': unsuitable})
+
+    model = form_class._meta.model
+    record_fields = {field.name for field in model._meta.concrete_fields} - MANAGED_FIELDS
+    fields = {name: value for name, value in form.cleaned_data.items() if name in record_fields}
+
+    with transaction.atomic():
+        records = model.objects.bulk_create([model(pet=pet, **fields) for pet in pets])
+
+        # bulk_create skips the post_save signals scheduling the reminders and refreshing the summaries
+        schedule_reminders(records)
+        transaction.on_commit(partial(refresh_health_summaries, [pet.pk for pet in pets]))
+
+        transaction.on_commit(partial(
+            send_campaign_notifications.delay, record_type, [record.pk for record in records]
+        ))
+
+    return records
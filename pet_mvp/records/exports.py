@@ -0,0 +1,156 @@
+"""
+Streaming exports of the records of a clinic or an owner, as CSV or NDJSON.
+
+A clinic exports every examination it recorded, an owner every record of their
+pets. Each record type is read as a values() projection, joining the pet, the
+catalog item and the clinic in the same query, and streamed in chunks with
+iterator(), so memory use does not depend on the size of the history and the
+first line is sent before the whole export is read.
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+# format -> content type
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# type -> model, date field and the exported columns as {column: lookup}
+EXPORT_SOURCES = {
+    'vaccination': (VaccinationRecord, 'date_of_vaccination', {
+        'id': 'pk',
+        'date': 'date_of_vaccination',
+        'pet': 'pet__name',
+        'passport_number': 'pet__passport_number',
+        'name': 'vaccine__name',
+        'valid_from': 'valid_from',
+        'valid_until': 'valid_until',
+        'batch_number': 'batch_number',
+        'manufacturer': 'manufacturer',
+    }),
+    'treatment': (MedicationRecord, 'date', {
+        'id': 'pk',
+        'date': 'date',
+        'pet': 'pet__name',
+        'passport_number': 'pet__passport_number',
+        'name': 'medication__name',
+        'dosage': 'dosage',
+        'valid_until': 'valid_until',
+        'manufacturer': 'manufacturer',
+    }),
+    'examination': (MedicalExaminationRecord, 'date_of_entry', {
+        'id': 'pk',
+        'date': 'date_of_entry',
+        'pet': 'pet__name',
+        'passport_number': 'pet__passport_number',
+        'exam_type': 'exam_type',
+        'clinic': 'clinic__clinic__name',
+        'doctor': 'doctor',
+        'reason_for_visit': 'reason_for_visit',
+        'general_health': 'general_health',
+        'body_condition_score': 'body_condition_score',
+        'temperature': 'temperature',
+        'heart_rate': 'heart_rate',
+        'respiratory_rate': 'respiratory_rate',
+        'treatment_performed': 'treatment_performed',
+        'diagnosis': 'diagnosis',
+        'follow_up': 'follow_up',
+        'notes': 'notes',
+    }),
+}
+
+# scope -> (type, path from the record to the exporting user) of the exported record types
+EXPORT_SCOPES = {
+    'clinic': (
+        ('examination', 'clinic'),
+    ),
+    'owner': (
+        ('vaccination', 'pet__owners'),
+        ('treatment', 'pet__owners'),
+        ('examination', 'pet__owners'),
+    ),
+}
+
+
+class Echo:
+    """File-like object returning what is written, so csv.writer produces lines to stream."""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(scope):
+    """Returns the columns of an export: the record type, then the columns of its record types in order."""
+    columns = {'type': None}
+    for entry_type, _ in EXPORT_SCOPES[scope]:
+        columns.update(dict.fromkeys(EXPORT_SOURCES[entry_type][2]))
+    return list(columns)
+
+
+def export_rows(scope, user, chunk_size=None):
+    """
+    Stream the records of a clinic or an owner, one record type after the other, oldest first.
+
+    Args:
+        scope (str): 'clinic' or 'owner'
+        user (UserModel): the clinic or owner exporting their records
+        chunk_size (int, optional): rows fetched per database round-trip.
+            Defaults to settings.RECORD_EXPORT_CHUNK_SIZE.
+    Yields:
+        dict: the type and the columns of one record
+    """
+    chunk_size = chunk_size or settings.RECORD_EXPORT_CHUNK_SIZE
+
+    for entry_type, user_path in EXPORT_SCOPES[scope]:
+        model, date_field, columns = EXPORT_SOURCES[entry_type]
+        rows = (
+            model.objects.filter(**{user_path: user})
+            .order_by(date_field, 'pk')
+            .values(*columns.values())
+        )
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield {'type': entry_type, **{column: row[lookup] for column, lookup in columns.items()}}
+
+
+def csv_lines(rows, columns):
+    """Yields the header and then one CSV line per row; columns a row does not have are left empty."""
+    writer = csv.DictWriter(Echo(), fieldnames=columns, restval='')
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    """Yields one JSON document per row and line."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_lines(scope, user, file_format, chunk_size=None):
+    """
+    Lines of the export of a clinic or an owner, produced while the records are read.
+
+    Args:
+        scope (str): 'clinic' or 'owner'
+        user (UserModel): the clinic or owner exporting their records
+        file_format (str): 'csv' or 'ndjson'
+        chunk_size (int, optional): rows fetched per database round-trip
+    Returns:
+        iterator: the lines of the export, as str
+    """
+    rows = export_rows(scope, user, chunk_size)
+    if file_format == 'csv':
+        return csv_lines(rows, export_columns(scope))
+    return ndjson_lines(rows)
+
+
+def export_file_name(scope, file_format):
+    """Returns the download file name of an export, e.g. 'clinic_records_2025-01-31.csv'."""
+    return f'{scope}_records_{timezone.now().date().isoformat()}.{file_format}'
@@ -1,54 +1,108 @@
 from datetime import timedelta
 
+from pet_mvp.common.mixins import ConfiguredFieldsMixin, VERBOSE_NAME
+from pet_mvp.drugs.catalog import catalog_entries
 from pet_mvp.drugs.models import Vaccine, Drug, FecalTest, UrineTest, BloodTest
 from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
 
 from django import forms
+from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.forms.models import BaseModelFormSet
-from django.core.exceptions import FieldDoesNotExist
 
 
-class VaccinationRecordForm(forms.ModelForm):
+def limit_to_catalog(form, field_name, model, pet):
+    """
+    Offer the catalog entries suitable for the pet's species in a choice field.
+    The entries come from the per-process catalog cache and are exposed to the
+    templates as form.catalog; the submitted choice is validated by the queryset.
+
+    Args:
+        form (Form): form owning the field
+        field_name (str): name of the Vaccine or Drug choice field
+        model (Model): Vaccine or Drug
+        pet (Pet or str): pet, or its species; no entries are offered without one
+    """
+    field = form.fields[field_name]
+    form.catalog_field = field_name
+
+    if pet:
+        species = (pet.species if hasattr(pet, 'species') else pet).lower()
+        field.queryset = model.objects.filter(suitable_for=species)
+        form.catalog = catalog_entries(model, species)
+    else:
+        field.queryset = model.objects.none()
+        form.catalog = ()
+
+    # set after the queryset, so rendering the widget does not query the catalog either
+    empty_choice = [('', field.empty_label)] if field.empty_label is not None else []
+    field.choices = empty_choice + [(entry.pk, entry.name) for entry in form.catalog]
+
+
+class CatalogChoiceField(forms.ModelChoiceField):
+    """
+    Choice of a Vaccine or Drug. A formset loads the chosen items of all its forms in
+    one query and hands them to the fields as 'loaded'; a single form looks its
+    choice up in the queryset as usual.
+    """
+
+    loaded = None
+
+    def to_python(self, value):
+        if self.loaded is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.loaded[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value}
+            )
+
+
+class CatalogFormMixin:
+    """
+    Form whose catalog field is limited by limit_to_catalog. The choice field already
+    read the chosen item from the database, so the model validation skips its check.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.add(self.catalog_field)
+        return exclude
+
+
+class VaccinationRecordForm(ConfiguredFieldsMixin, forms.ModelForm):
     class Meta:
         model = VaccinationRecord
         exclude = ['pet']
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        # Style all fields and set help texts
-        for field_name in self.fields:
-            field = self.fields[field_name]
-
-            if field_name in ['date_of_vaccination']:
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-                field.help_text = _('Date of vaccination')
-            elif field_name == 'valid_until':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-                field.help_text = _('Valid until date')
-            elif field_name == 'manufacture_date':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-                field.help_text = _('Manufacture date')
-            elif field_name == 'valid_from':
-                field.widget = forms.DateInput(attrs={
-                    'type': 'date',
-                    'class': 'form-control',
-                    'readonly': 'readonly',
-                    'style': 'background-color: #e9ecef; cursor: not-allowed;',
-                })
-                field.help_text = _(
-                    'This field is automatically filled for Rabies vaccine (21 days after vaccination).')
-            elif field_name != 'vaccine':
-                placeholder = self._meta.model._meta.get_field(
-                    field_name).verbose_name
-                field.widget.attrs.update({
-                    'class': 'form-control',
-                    'placeholder': str(placeholder).capitalize()
-                })
+        field_classes = {'vaccine': CatalogChoiceField}
+
+    # Style all fields and set help texts
+    field_config = {
+        'vaccine': {},
+        'date_of_vaccination': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'help_text': _('Date of vaccination'),
+        },
+        'valid_until': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'help_text': _('Valid until date'),
+        },
+        'manufacture_date': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'help_text': _('Manufacture date'),
+        },
+        'valid_from': {
+            'widget': forms.DateInput(attrs={
+                'type': 'date',
+                'class': 'form-control',
+                'readonly': 'readonly',
+                'style': 'background-color: #e9ecef; cursor: not-allowed;',
+            }),
+            'help_text': _('This field is automatically filled for Rabies vaccine (21 days after vaccination).'),
+        },
+    }
+    default_attrs = {'class': 'form-control'}
 
     def clean(self):
         cleaned_data = super().clean()
@@ -62,32 +116,27 @@ class VaccinationRecordForm(forms.ModelForm):
         return cleaned_data
 
 
-class VaccinationRecordAddForm(VaccinationRecordForm):
+class VaccinationRecordAddForm(CatalogFormMixin, VaccinationRecordForm):
+    field_config = {
+        **VaccinationRecordForm.field_config,
+        'vaccine': {
+            'label': _('Select Vaccine'),
+            'attrs': {'class': 'form-control', 'id': 'id_vaccine'},
+        },
+    }
 
     def __init__(self, pet=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         # Filter vaccines by species if pet is given
-        if pet:
-            species = pet.species if hasattr(pet, 'species') else pet
-            self.fields['vaccine'].queryset = Vaccine.objects.filter(
-                suitable_for=species.lower()
-            )
-        else:
-            self.fields['vaccine'].queryset = Vaccine.objects.none()
-
-        self.fields['vaccine'].label = _('Select Vaccine')
-        self.fields['vaccine'].widget.attrs.update({
-            'class': 'form-control',
-            'id': 'id_vaccine',
-        })
+        limit_to_catalog(self, 'vaccine', Vaccine, pet)
 
 
 class VaccinationRecordEditForm(VaccinationRecordForm):
     pass
 
 
-class MedicationRecordBaseForm(forms.ModelForm):
+class MedicationRecordBaseForm(ConfiguredFieldsMixin, forms.ModelForm):
     custom_is_antiparasite = forms.BooleanField(
         required=False,
         label=_('Is antiparasite medication?'),
@@ -97,37 +146,27 @@ class MedicationRecordBaseForm(forms.ModelForm):
     class Meta:
         model = MedicationRecord
         exclude = ['pet']
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        for field_name in self.fields:
-            field = self.fields[field_name]
-
-            if field_name == 'date':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-                field.help_text = _('Date of intake')
-            elif field_name == 'valid_until':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-                field.help_text = _('Valid until date')
-            elif field_name == 'time':
-                field.widget = forms.TimeInput(
-                    attrs={'type': 'time', 'class': 'form-control'})
-                field.help_text = _('Time of intake')
-                field.required = False  # Make time optional for antiparasitic medications
-            elif field_name == 'dosage':
-                field.required = False  # Make dosage optional for antiparasitic medications
-                field.widget.attrs['placeholder'] = _('Dosage')
-            else:
-                try:
-                    model_field = self._meta.model._meta.get_field(field_name)
-                    placeholder = model_field.verbose_name
-                    field.widget.attrs['placeholder'] = str(
-                        placeholder).capitalize()
-                except FieldDoesNotExist:
-                    pass
+        field_classes = {'medication': CatalogChoiceField}
+
+    field_config = {
+        'date': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'help_text': _('Date of intake'),
+        },
+        'valid_until': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+            'help_text': _('Valid until date'),
+        },
+        'time': {
+            'widget': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}),
+            'help_text': _('Time of intake'),
+            'required': False,  # Make time optional for antiparasitic medications
+        },
+        'dosage': {
+            'required': False,  # Make dosage optional for antiparasitic medications
+            'placeholder': _('Dosage'),
+        },
+    }
 
     def clean(self):
         cleaned_data = super().clean()
@@ -141,51 +180,40 @@ class MedicationRecordBaseForm(forms.ModelForm):
         return cleaned_data
 
 
-class MedicationRecordAddForm(MedicationRecordBaseForm):
+class MedicationRecordAddForm(CatalogFormMixin, MedicationRecordBaseForm):
+    field_config = {
+        **MedicationRecordBaseForm.field_config,
+        'medication': {
+            'label': _('Select Medication/Treatment'),
+            'attrs': {'class': 'form-control', 'id': 'id_medication'},
+            'placeholder': VERBOSE_NAME,
+        },
+    }
 
     def __init__(self, *args, pet=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        if pet:
-            species = pet.species if hasattr(pet, 'species') else pet
-            self.fields['medication'].queryset = Drug.objects.filter(
-                suitable_for=species.lower())
-        else:
-            self.fields['medication'].queryset = Drug.objects.none()
-
-        self.fields['medication'].label = _('Select Medication/Treatment')
-        self.fields['medication'].widget.attrs.update(
-            {'class': 'form-control', 'id': 'id_medication'})
+        limit_to_catalog(self, 'medication', Drug, pet)
 
 
 class MedicationRecordEditForm(MedicationRecordBaseForm):
     pass
 
 
-class BaseTestForm(forms.ModelForm):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        for field_name in self.fields:
-            field = self.fields[field_name]
-            placeholder = self._meta.model._meta.get_field(
-                field_name).verbose_name
-
-            if field_name == 'result':
-                field.widget = forms.TextInput(attrs={'class': 'form-control'})
-                field.widget.attrs['placeholder'] = str(
-                    placeholder).capitalize()
-            elif field_name == 'date_conducted':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-            elif field_name == 'additional_notes':
-                field.widget = forms.Textarea(attrs={'rows': 2})
-                field.widget.attrs['placeholder'] = str(
-                    placeholder).capitalize()
-            else:
-                field.widget.attrs['placeholder'] = str(
-                    placeholder).capitalize()
+class BaseTestForm(ConfiguredFieldsMixin, forms.ModelForm):
+    field_config = {
+        'result': {
+            'widget': forms.TextInput(attrs={'class': 'form-control'}),
+            'placeholder': VERBOSE_NAME,
+        },
+        'date_conducted': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+        },
+        'additional_notes': {
+            'widget': forms.Textarea(attrs={'rows': 2}),
+            'placeholder': VERBOSE_NAME,
+        },
+    }
 
 
 class BloodTestForm(BaseTestForm):
@@ -211,29 +239,28 @@ class FecalTestForm(BaseTestForm):
 
     boolean_select_fields = ['parasites_detected', 'blood_presence']
 
+    field_config = {
+        **BaseTestForm.field_config,
+        **{
+            field_name: {
+                'widget': forms.Select(
+                    choices=[('true', _('Yes')), ('false', _('No'))],
+                    attrs={'class': 'form-control'}
+                ),
+            }
+            for field_name in boolean_select_fields
+        },
+        'parasite_type': {
+            'widget': forms.TextInput(attrs={'readonly': 'readonly', 'class': 'form-control d-none'}),
+            'placeholder': VERBOSE_NAME,
+        },
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        for field_name in self.fields:
-            field = self.fields[field_name]
-            placeholder = self._meta.model._meta.get_field(
-                field_name).verbose_name
-
-            if field_name in self.boolean_select_fields:
-                field.widget = forms.Select(
-                    choices=[('true', _('Yes')), ('false', _('No'))],
-                    attrs={'class': 'form-control'}
-                )
-                self.initial[field_name] = 'false'
-
-            elif field_name == 'parasite_type':
-                field.widget = forms.TextInput(
-                    attrs={
-                        'readonly': 'readonly',
-                        'class': 'form-control d-none',
-                        'placeholder': str(placeholder).capitalize()
-                    }
-                )
+        for field_name in self.boolean_select_fields:
+            self.initial[field_name] = 'false'
 
     def clean_parasites_detected(self):
         return self.cleaned_data.get('parasites_detected') == 'true'
@@ -247,31 +274,28 @@ class FecalTestForm(BaseTestForm):
         return None
 
 
-class MedicalExaminationRecordForm(forms.ModelForm):
+class MedicalExaminationRecordForm(ConfiguredFieldsMixin, forms.ModelForm):
     class Meta:
         model = MedicalExaminationRecord
         exclude = ['pet', 'clinic', 'vaccinations', 'medications',
                    'blood_test', 'urine_test', 'fecal_test']
 
+    field_config = {
+        'date_of_entry': {
+            'widget': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+        },
+        'follow_up': {
+            'widget': forms.Select(
+                choices=[('true', _('Yes')), ('false', _('No'))],
+                attrs={'class': 'form-select'}
+            ),
+        },
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        for field_name in self.fields:
-            field = self.fields[field_name]
-            if field_name == 'date_of_entry':
-                field.widget = forms.DateInput(
-                    attrs={'type': 'date', 'class': 'form-control'})
-            elif field_name == 'follow_up':
-                field.widget = forms.Select(
-                    choices=[('true', _('Yes')), ('false', _('No'))],
-                    attrs={'class': 'form-select'}
-                )
-                self.initial['follow_up'] = 'false'
-            else:
-                placeholder = self._meta.model._meta.get_field(
-                    field_name).verbose_name
-                field.widget.attrs['placeholder'] = str(
-                    placeholder).capitalize()
+        self.initial['follow_up'] = 'false'
 
     def clean_follow_up(self):
         value = self.cleaned_data.get('follow_up')
@@ -291,6 +315,22 @@ class BaseFormSet(BaseModelFormSet):
         kwargs['pet'] = self.pet
         return super()._construct_form(i, **kwargs)
 
+    def full_clean(self):
+        # the chosen catalog items of all forms are loaded in one query instead of one per form
+        forms_with_catalog = [form for form in self.forms if hasattr(form, 'catalog_field')]
+        if self.is_bound and forms_with_catalog:
+            name = forms_with_catalog[0].catalog_field
+            pks = set()
+            for form in forms_with_catalog:
+                try:
+                    pks.add(int(form[name].data))
+                except (TypeError, ValueError):
+                    pass
+            loaded = forms_with_catalog[0].fields[name].queryset.in_bulk(pks)
+            for form in forms_with_catalog:
+                form.fields[name].loaded = loaded
+        super().full_clean()
+
     @property
     def empty_form(self):
         form = self.form(
@@ -319,3 +359,10 @@ TreatmentFormSet = forms.modelformset_factory(
     can_delete=True,
     formset=BaseFormSet,
 )
+
+
+class RecordImportForm(forms.Form):
+    file = forms.FileField(
+        label=_('Export file'),
+        help_text=_('CSV file with a header row, or JSON array of records'),
+    )
@@ -0,0 +1,315 @@
+"""
+Streaming bulk import of historical vaccination and medication records.
+
+Clinics moving to the platform bring their past records as CSV or JSON exports.
+The rows are read one at a time, so memory use does not depend on the size of
+the file: they are validated and inserted in chunks, the vaccines, drugs and
+pets they refer to are resolved through in-memory lookup maps (the catalog once
+per import, the pets once per chunk), and every rejected row is written to the
+error report instead of being kept.
+"""
+import csv
+import json
+import os
+import re
+from collections import namedtuple
+from datetime import timedelta
+from itertools import batched
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.notifications.reminders import schedule_reminders
+from pet_mvp.pets.health import refresh_health_summaries
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+# characters read from a JSON file per read
+JSON_READ_SIZE = 64 * 1024
+
+# characters of the longest JSON token, a \uXXXX escape; a decode error this close
+# to the end of the buffer may come from a token cut by the read
+JSON_TOKEN_SIZE = 6
+
+WHITESPACE = re.compile(r'\s*')
+
+# column with the passport number of the pet, shared by all record types
+PET_COLUMN = 'passport_number'
+
+# record type -> model, catalog model, catalog column, date column and the other record columns of a row
+IMPORT_TYPES = {
+    'vaccination': (VaccinationRecord, Vaccine, 'vaccine', 'date_of_vaccination', (
+        'valid_from', 'valid_until', 'manufacturer', 'manufacture_date', 'batch_number',
+    )),
+    'medication': (MedicationRecord, Drug, 'medication', 'date', (
+        'time', 'dosage', 'valid_until', 'manufacturer',
+    )),
+}
+
+FILE_FORMATS = ('csv', 'json')
+
+ImportResult = namedtuple('ImportResult', ['created', 'failed'])
+
+
+class RowError(ValueError):
+    """Raised when a row cannot be imported; errors maps the column to its messages."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def file_format(file_name):
+    """Returns the format of an export from its file name, 'csv' unless it is a .json file."""
+    return 'json' if os.path.splitext(file_name)[1].lower() == '.json' else 'csv'
+
+
+def read_csv(stream):
+    """Yields (line number, row) for every data row of a CSV file with a header row."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_json(stream, read_size=JSON_READ_SIZE):
+    """
+    Yields (position, item) for every item of a JSON array, decoding one item at a time.
+
+    Raises:
+        ValueError: if the file is not a JSON array or an item is malformed
+    """
+    decoder = json.JSONDecoder()
+    buffer, index = '', 0
+    expect_item = True
+    position = 0
+
+    def next_char():
+        """Skips whitespace and returns the next character, reading more of the file when needed."""
+        nonlocal buffer, index
+        while True:
+            index = WHITESPACE.match(buffer, index).end()
+            if index < len(buffer):
+                return buffer[index]
+            more = stream.read(read_size)
+            if not more:
+                raise ValueError('Unexpected end of the JSON file')
+            buffer, index = more, 0
+
+    if next_char() != '[':
+        raise ValueError('The JSON file must hold an array of records')
+    index += 1
+
+    while True:
+        char = next_char()
+        if char == ']':
+            return
+        if not expect_item:
+            if char != ',':
+                raise ValueError(f'Expected "," after record {position} of the JSON file')
+            index += 1
+            expect_item = True
+            continue
+
+        try:
+            item, index = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError as error:
+            # only a string without its closing quote or an error at the end of the buffer
+            # may be an item continuing past the buffer, anything else is malformed
+            incomplete = (
+                error.msg.startswith('Unterminated string')
+                or error.pos >= len(buffer) - JSON_TOKEN_SIZE
+            )
+            more = stream.read(read_size) if incomplete else ''
+            if not more:
+                raise ValueError(f'Invalid record {position + 1} of the JSON file')
+            # keep only the start of the item
+            buffer, index = buffer[index:] + more, 0
+            continue
+
+        position += 1
+        expect_item = False
+        yield position, item
+
+
+def read_rows(stream, file_format):
+    """Yields (row number, row) of a CSV or JSON export."""
+    if file_format == 'json':
+        return read_json(stream)
+    return read_csv(stream)
+
+
+def catalog_lookup(catalog_model):
+    """
+    Map of every name and id of the catalog items to their {species: (pk, name)}.
+    Items of different species may share a name, the species of the pet picks one.
+    """
+    name_fields = [field.name for field in catalog_model._meta.fields if field.name.startswith('name')]
+
+    lookup = {}
+    for item in catalog_model.objects.values('pk', 'suitable_for', *name_fields):
+        entry = item['pk'], item['name']
+        for key in [str(item['pk'])] + [item[name] for name in name_fields]:
+            if key:
+                lookup.setdefault(key.strip().lower(), {})[item['suitable_for']] = entry
+    return lookup
+
+
+def pet_lookup(chunk):
+    """Map of the passport numbers of a chunk of rows to their (pet id, species), in one query."""
+    numbers = {
+        str(row.get(PET_COLUMN) or '').strip()
+        for _, row in chunk
+        if isinstance(row, dict)
+    }
+    return {
+        passport_number: (pk, species.lower())
+        for passport_number, pk, species in
+        Pet.objects.filter(passport_number__in=numbers - {''}).values_list('passport_number', 'pk', 'species')
+    }
+
+
+def clean_value(field, value, required=False):
+    """
+    Converts a raw CSV or JSON value with the model field; empty values take the field default.
+
+    Raises:
+        ValidationError: if the value is invalid, or missing while required
+    """
+    if isinstance(value, str):
+        value = value.strip()
+
+    if value in (None, ''):
+        if required:
+            raise ValidationError(field.error_messages['blank'], code='blank')
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+        if field.blank:
+            return ''
+        raise ValidationError(field.error_messages['blank'], code='blank')
+
+    try:
+        return field.clean(value, None)
+    except (TypeError, ValueError):
+        # e.g. a JSON number given for a date
+        raise ValidationError(
+            field.error_messages.get('invalid', 'Invalid value'), code='invalid', params={'value': value}
+        )
+
+
+def build_record(record_type, row, catalog, pets):
+    """
+    Builds the unsaved record of one row.
+
+    Args:
+        record_type (str): 'vaccination' or 'medication'
+        row (dict): the row, by column
+        catalog (dict): lookup map of the catalog items, see catalog_lookup
+        pets (dict): lookup map of the pets of the chunk, see pet_lookup
+    Returns:
+        VaccinationRecord or MedicationRecord: the record, not saved
+    Raises:
+        RowError: if the row is invalid
+    """
+    model, catalog_model, catalog_column, date_column, columns = IMPORT_TYPES[record_type]
+
+    if not isinstance(row, dict):
+        raise RowError({'': ['A record must be an object']})
+
+    errors = {}
+    values = {}
+    # the date is what places a past record in the history, so it is never defaulted
+    for column, required in [(date_column, True)] + [(column, False) for column in columns]:
+        try:
+            values[column] = clean_value(model._meta.get_field(column), row.get(column), required)
+        except ValidationError as error:
+            errors[column] = error.messages
+
+    passport_number = str(row.get(PET_COLUMN) or '').strip()
+    pet = pets.get(passport_number)
+    if pet is None:
+        errors[PET_COLUMN] = [f'Unknown pet "{passport_number}"']
+
+    catalog_name = str(row.get(catalog_column) or '').strip()
+    items = catalog.get(catalog_name.lower())
+    if not items:
+        errors[catalog_column] = [f'Unknown {catalog_model._meta.model_name} "{catalog_name}"']
+    elif pet is not None and pet[1] not in items:
+        errors[catalog_column] = [f'"{catalog_name}" is not suitable for a {pet[1]}']
+
+    if errors:
+        raise RowError(errors)
+
+    pet_id, species = pet
+    item_id, item_name = items[species]
+
+    # valid from the vaccination, or 21 days after it for rabies as in the vaccination form,
+    # unless the export has the date
+    if record_type == 'vaccination' and not str(row.get('valid_from') or '').strip():
+        delay = timedelta(days=21) if 'rabies' in item_name.lower() else timedelta()
+        values['valid_from'] = values['date_of_vaccination'] + delay
+
+    return model(pet_id=pet_id, **{f'{catalog_column}_id': item_id}, **values)
+
+
+def import_records(stream, record_type, file_format='csv', batch_size=None, report=None):
+    """
+    Import the vaccination or medication records of a clinic export.
+
+    Rows are validated and inserted in chunks of batch_size, each chunk in its own
+    transaction together with the reminders of its records. Rows failing validation
+    are skipped and written to the report, the other rows are still imported.
+
+    Args:
+        stream (file): text stream of the export
+        record_type (str): 'vaccination' or 'medication'
+        file_format (str, optional): 'csv' or 'json'
+        batch_size (int, optional): rows per chunk. Defaults to settings.RECORD_IMPORT_BATCH_SIZE.
+        report (file, optional): text stream the per-row error report is written to as CSV
+    Returns:
+        ImportResult: numbers of the created records and the failed rows
+    Raises:
+        ValueError: if the record type or the format is unknown, or the file is not a JSON array
+    """
+    if record_type not in IMPORT_TYPES:
+        raise ValueError(f'Unknown record type "{record_type}"')
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'Unknown format "{file_format}"')
+
+    model, catalog_model = IMPORT_TYPES[record_type][:2]
+    batch_size = batch_size or settings.RECORD_IMPORT_BATCH_SIZE
+    catalog = catalog_lookup(catalog_model)
+
+    writer = None
+    if report is not None:
+        writer = csv.writer(report)
+        writer.writerow(['row', 'column', 'error'])
+
+    created = failed = 0
+    for chunk in batched(read_rows(stream, file_format), batch_size):
+        pets = pet_lookup(chunk)
+
+        records = []
+        for row_number, row in chunk:
+            try:
+                records.append(build_record(record_type, row, catalog, pets))
+            except RowError as error:
+                failed += 1
+                if writer is not None:
+                    for column, messages in error.errors.items():
+                        for message in messages:
+                            writer.writerow([row_number, column, message])
+
+        with transaction.atomic():
+            model.objects.bulk_create(records)
+
+            # bulk_create skips the post_save signals scheduling the reminders and refreshing the summaries
+            schedule_reminders(records)
+            refresh_health_summaries({record.pet_id for record in records})
+
+        created += len(records)
+
+    return ImportResult(created=created, failed=failed)
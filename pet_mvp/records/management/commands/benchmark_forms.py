@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of constructing the forms of the examination and pet pages.
+
+An exam page builds the report form, the three test forms and a vaccine and a
+treatment form per formset row, plus the empty form of each formset. Each form
+class is instantiated repeatedly in the active language and the best time per
+instance is reported, with the results written as JSON.
+
+Usage:
+    python manage.py benchmark_forms --iterations 2000 --output bench_forms.json
+"""
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone, translation
+
+from pet_mvp.pets.forms import PetAddForm
+from pet_mvp.records.forms import VaccinationRecordAddForm, MedicationRecordAddForm, BloodTestForm, \
+    UrineTestForm, FecalTestForm, MedicalExaminationRecordForm
+
+# form class and the keyword arguments it is built with on the pages
+BENCHMARKED_FORMS = (
+    (MedicalExaminationRecordForm, {}),
+    (VaccinationRecordAddForm, {'pet': 'dog'}),
+    (MedicationRecordAddForm, {'pet': 'dog'}),
+    (BloodTestForm, {}),
+    (UrineTestForm, {}),
+    (FecalTestForm, {}),
+    (PetAddForm, {}),
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark constructing the record and pet forms"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=2000,
+            help="Instances built per form class and repeat",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Timed repeats per form class, the best one is reported",
+        )
+        parser.add_argument(
+            '--language', default='en',
+            help="Language the forms are built in",
+        )
+        parser.add_argument(
+            '--output', default='bench_forms.json',
+            help="Path of the JSON results file",
+        )
+
+    def handle(self, *args, **options):
+        runs = []
+        with translation.override(options['language']):
+            for form_class, kwargs in BENCHMARKED_FORMS:
+                run = self.benchmark(form_class, kwargs, options['iterations'], options['repeat'])
+                runs.append(run)
+                self.stdout.write(f"  {run['form']}: {run['microseconds_per_form']:.1f} µs/form")
+
+        results = {
+            'benchmark': 'forms',
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'language': options['language'],
+            'iterations': options['iterations'],
+            'runs': runs,
+        }
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def benchmark(self, form_class, kwargs, iterations, repeat):
+        """
+        Time building instances of one form class; the first instance is built
+        untimed, so any per-process setup is excluded.
+
+        Returns:
+            dict: measurements of the form class
+        """
+        form_class(**kwargs)
+
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                form_class(**kwargs)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        return {
+            'form': form_class.__name__,
+            'fields': len(form_class.base_fields),
+            'microseconds_per_form': best / iterations * 1_000_000,
+        }
@@ -0,0 +1,51 @@
+"""
+Streaming export of the examinations of a clinic or the records of an owner's pets.
+
+The records are read in chunks and written line by line, so the export runs in
+constant memory however long the history is.
+
+Usage:
+    python manage.py export_records --clinic clinic@example.com --format csv --output clinic.csv
+    python manage.py export_records --owner owner@example.com --format ndjson
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from pet_mvp.records.exports import EXPORT_FORMATS, export_lines
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Export the examinations of a clinic or the records of an owner's pets as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        user = parser.add_mutually_exclusive_group(required=True)
+        user.add_argument('--clinic', help="Email of the clinic whose examinations are exported")
+        user.add_argument('--owner', help="Email of the owner whose pets' records are exported")
+        parser.add_argument('--format', dest='file_format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--chunk-size', type=int, help="Rows fetched per database round-trip")
+        parser.add_argument('--output', default='-', help="Path of the export, '-' for standard output")
+
+    def handle(self, *args, **options):
+        scope = 'clinic' if options['clinic'] else 'owner'
+        email = options[scope]
+
+        try:
+            user = UserModel.objects.get(email=email)
+        except UserModel.DoesNotExist:
+            raise CommandError(f"No user with email {email}")
+        if scope == 'clinic' and not user.is_clinic:
+            raise CommandError(f"{email} is not a clinic")
+
+        lines = export_lines(scope, user, options['file_format'], options['chunk_size'])
+
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
+        self.stderr.write(self.style.SUCCESS(f"Export written to {options['output']}"))
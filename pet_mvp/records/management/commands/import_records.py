@@ -0,0 +1,57 @@
+"""
+Bulk import of historical vaccination or medication records from a clinic export.
+
+The export is streamed, so files of any size are imported with flat memory use.
+Rows failing validation are skipped and written to the error report.
+
+Usage:
+    python manage.py import_records exports/vaccines.csv --type vaccination --errors vaccine_errors.csv
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from pet_mvp.records.imports import IMPORT_TYPES, FILE_FORMATS, file_format, import_records
+
+
+class Command(BaseCommand):
+    help = "Import historical vaccination or medication records from a CSV or JSON export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path of the CSV or JSON export")
+        parser.add_argument(
+            '--type', dest='record_type', choices=list(IMPORT_TYPES), required=True,
+            help="Type of the records in the export",
+        )
+        parser.add_argument(
+            '--format', dest='file_format', choices=FILE_FORMATS,
+            help="Format of the export, taken from the file extension by default",
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help="Rows validated and inserted per chunk, settings.RECORD_IMPORT_BATCH_SIZE by default",
+        )
+        parser.add_argument(
+            '--errors', default='import_errors.csv',
+            help="Path of the per-row error report",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream, \
+                    open(options['errors'], 'w', newline='') as report:
+                result = import_records(
+                    stream,
+                    options['record_type'],
+                    options['file_format'] or file_format(path),
+                    batch_size=options['batch_size'],
+                    report=report,
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} records from {path}"))
+        if result.failed:
+            self.stdout.write(self.style.WARNING(
+                f"{result.failed} rows failed, see the error report {options['errors']}"
+            ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 13:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drugs', '0015_drug_is_antiparasite'),
+        ('pets', '0017_alter_pet_passport_number'),
+        ('records', '0026_vaccinationrecord_is_editable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicalexaminationrecord',
+            index=models.Index(fields=['pet', 'date_of_entry'], name='examination_pet_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationrecord',
+            index=models.Index(fields=['pet', 'date'], name='medication_pet_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccinationrecord',
+            index=models.Index(fields=['pet', 'date_of_vaccination'], name='vaccination_pet_date_idx'),
+        ),
+    ]
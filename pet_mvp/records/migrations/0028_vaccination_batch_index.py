@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-18 14:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drugs', '0015_drug_is_antiparasite'),
+        ('pets', '0019_backfill_health_summary'),
+        ('records', '0027_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vaccinationrecord',
+            index=models.Index(django.db.models.functions.text.Upper('batch_number'), name='vaccination_batch_idx'),
+        ),
+    ]
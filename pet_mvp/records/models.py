@@ -1,6 +1,7 @@
 import datetime
 
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
@@ -13,6 +14,13 @@ UserModel = get_user_model()
 
 
 class VaccinationRecord(TimeStampMixin):
+    class Meta:
+        indexes = [
+            # date ordered history of a pet, e.g. the medical timeline
+            models.Index(fields=['pet', 'date_of_vaccination'], name='vaccination_pet_date_idx'),
+            # case-insensitive lookup of the vaccinations of a lot, e.g. a batch recall
+            models.Index(Upper('batch_number'), name='vaccination_batch_idx'),
+        ]
 
     date_of_vaccination = models.DateField(
         verbose_name=_('Date of vaccination'),
@@ -81,6 +89,11 @@ class VaccinationRecord(TimeStampMixin):
 
 
 class MedicationRecord(TimeStampMixin):
+    class Meta:
+        indexes = [
+            # date ordered history of a pet, e.g. the medical timeline
+            models.Index(fields=['pet', 'date'], name='medication_pet_date_idx'),
+        ]
 
     date = models.DateField(
         verbose_name=_('Date of intake'),
@@ -135,6 +148,12 @@ class MedicalExaminationRecord(TimeStampMixin):
         ('follow_up', _('Follow-up Examination')),
     ]
 
+    class Meta:
+        indexes = [
+            # date ordered history of a pet, e.g. the medical timeline
+            models.Index(fields=['pet', 'date_of_entry'], name='examination_pet_date_idx'),
+        ]
+
     exam_type = models.CharField(
         max_length=20,
         choices=EXAM_TYPE_CHOICES,
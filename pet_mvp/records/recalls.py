@@ -0,0 +1,151 @@
+"""
+Vaccine batch recalls: the pets vaccinated from a recalled lot and their owners.
+
+A lot is matched on the upper-cased batch number, which is indexed, so a recall
+reads only the records of the lot however many vaccinations are stored; the
+manufacturer and the vaccine narrow it down further. Affected records, pets and
+owners are resolved in bulk with joined values() projections, and streamed in
+chunks for the report and the owner notifications.
+"""
+from collections import namedtuple
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.text import slugify
+
+from pet_mvp.records.exports import csv_lines, ndjson_lines
+from pet_mvp.records.models import VaccinationRecord
+
+RecallSummary = namedtuple('RecallSummary', ['records', 'pets', 'owners'])
+
+# report column -> lookup from the vaccination record, one row per record and owner
+RECALL_COLUMNS = {
+    'record': 'pk',
+    'date_of_vaccination': 'date_of_vaccination',
+    'vaccine': 'vaccine__name',
+    'batch_number': 'batch_number',
+    'manufacturer': 'manufacturer',
+    'pet': 'pet__name',
+    'passport_number': 'pet__passport_number',
+    'owner_email': 'pet__owners__email',
+    'owner_phone_number': 'pet__owners__phone_number',
+}
+
+
+class RecallError(ValueError):
+    pass
+
+
+def normalize_batch_number(batch_number):
+    """Returns the batch number as matched by the recall index, i.e. trimmed and upper-cased."""
+    return (batch_number or '').strip().upper()
+
+
+def recalled_records(lots, vaccine_id=None):
+    """
+    Vaccinations from one or more recalled lots.
+
+    Args:
+        lots (iterable): (batch number, manufacturer) pairs, both matched case-insensitively;
+            a lot without a manufacturer matches on the batch number only
+        vaccine_id (int, optional): primary key of the recalled vaccine
+    Returns:
+        QuerySet: the VaccinationRecord of the lots
+    Raises:
+        RecallError: if no lot has a batch number
+    """
+    condition = Q()
+    for batch_number, manufacturer in lots:
+        batch_number = normalize_batch_number(batch_number)
+        if not batch_number:
+            continue
+        lot = Q(batch=batch_number)
+        if manufacturer:
+            lot &= Q(manufacturer__iexact=manufacturer.strip())
+        condition |= lot
+
+    if not condition:
+        raise RecallError('A batch number is required')
+
+    # the same expression as the vaccination_batch_idx index
+    records = VaccinationRecord.objects.alias(batch=Upper('batch_number')).filter(condition)
+    if vaccine_id:
+        records = records.filter(vaccine_id=vaccine_id)
+    return records
+
+
+def recall_summary(records):
+    """Counts the records, pets and owners affected by a recall, in one query."""
+    counts = records.aggregate(
+        records=Count('pk', distinct=True),
+        pets=Count('pet', distinct=True),
+        owners=Count('pet__owners', distinct=True),
+    )
+    return RecallSummary(**counts)
+
+
+def recall_rows(records, chunk_size=None):
+    """
+    Stream one row per recalled record and owner of its pet, pets without owners included.
+
+    Args:
+        records (QuerySet): the recalled VaccinationRecord, see recalled_records
+        chunk_size (int, optional): rows fetched per database round-trip.
+            Defaults to settings.RECORD_EXPORT_CHUNK_SIZE.
+    Yields:
+        dict: the RECALL_COLUMNS of the row
+    """
+    rows = (
+        records.order_by('pk', 'pet__owners')
+        .values(*RECALL_COLUMNS.values())
+        .iterator(chunk_size=chunk_size or settings.RECORD_EXPORT_CHUNK_SIZE)
+    )
+    for row in rows:
+        yield {column: row[lookup] for column, lookup in RECALL_COLUMNS.items()}
+
+
+def recall_lines(records, file_format, chunk_size=None):
+    """Lines of the recall report as 'csv' or 'ndjson', produced while the records are read."""
+    rows = recall_rows(records, chunk_size)
+    if file_format == 'csv':
+        return csv_lines(rows, list(RECALL_COLUMNS))
+    return ndjson_lines(rows)
+
+
+def recall_file_name(batch_number, file_format):
+    """Returns the download file name of a recall report, e.g. 'recall_ab1234_2025-01-31.csv'."""
+    return f'recall_{slugify(batch_number)}_{timezone.now().date().isoformat()}.{file_format}'
+
+
+def recall_rows_by_owner(records, chunk_size=None):
+    """
+    Stream the recalled records grouped by the owner of the pet, without buffering more than one owner.
+
+    Yields:
+        tuple: the owner's (email, language) and the list of their records as dicts
+            with the pet name, vaccine name, batch number and date of vaccination
+    """
+    rows = (
+        records.filter(pet__owners__isnull=False)
+        .order_by('pet__owners', 'pk')
+        .values(
+            'pet__owners', 'pet__owners__email', 'pet__owners__default_language',
+            'pet__name', 'vaccine__name', 'batch_number', 'date_of_vaccination',
+        )
+        .iterator(chunk_size=chunk_size or settings.RECORD_EXPORT_CHUNK_SIZE)
+    )
+    for _, owner_rows in groupby(rows, key=lambda row: row['pet__owners']):
+        owner_rows = list(owner_rows)
+        owner = owner_rows[0]['pet__owners__email'], owner_rows[0]['pet__owners__default_language']
+        yield owner, [
+            {
+                'pet_name': row['pet__name'],
+                'name': row['vaccine__name'],
+                'batch_number': row['batch_number'],
+                'date_of_vaccination': row['date_of_vaccination'],
+            }
+            for row in owner_rows
+        ]
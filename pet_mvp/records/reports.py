@@ -0,0 +1,88 @@
+"""
+Examination report loaded with everything it shows in a fixed number of queries.
+
+The report is shared by the medical record email, the examination details page
+and the exports, so none of them walks the relations of the exam on its own:
+one query for the exam with its pet, clinic and lab tests, and one each for the
+pet owners, the vaccinations and the medications.
+"""
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+
+from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+ExamReport = namedtuple(
+    'ExamReport',
+    ['exam', 'pet', 'owners', 'clinic', 'vaccinations', 'medications', 'blood_test', 'urine_test', 'fecal_test'],
+)
+
+ReportOwner = namedtuple(
+    'ReportOwner', ['first_name', 'last_name', 'email', 'phone_number', 'city', 'country']
+)
+
+ReportClinic = namedtuple(
+    'ReportClinic', ['name', 'address', 'email', 'phone_number', 'city', 'country', 'default_language']
+)
+
+
+def exam_report_queryset():
+    """Examinations with the relations of the report joined or prefetched."""
+    return (
+        MedicalExaminationRecord.objects
+        .select_related('pet', 'clinic__clinic', 'blood_test', 'urine_test', 'fecal_test')
+        .prefetch_related(
+            Prefetch('pet__owners', queryset=UserModel.objects.select_related('owner')),
+            Prefetch('vaccinations', queryset=VaccinationRecord.objects.select_related('vaccine')),
+            Prefetch('medications', queryset=MedicationRecord.objects.select_related('medication')),
+        )
+    )
+
+
+def load_exam_report(exam_id):
+    """
+    Load an examination with its pet, owners, clinic and related records.
+
+    Args:
+        exam_id (int): primary key of the MedicalExaminationRecord
+    Returns:
+        ExamReport: the exam and its relations; records are loaded model instances in tuples
+    Raises:
+        MedicalExaminationRecord.DoesNotExist: if there is no such exam
+    """
+    exam = exam_report_queryset().get(pk=exam_id)
+    clinic_user = exam.clinic
+    clinic = getattr(clinic_user, 'clinic', None)
+
+    return ExamReport(
+        exam=exam,
+        pet=exam.pet,
+        owners=tuple(
+            ReportOwner(
+                first_name=user.owner.first_name,
+                last_name=user.owner.last_name,
+                email=user.email,
+                phone_number=user.phone_number,
+                city=user.city,
+                country=user.country,
+            )
+            for user in exam.pet.owners.all()
+        ),
+        clinic=ReportClinic(
+            name=clinic.name if clinic else '',
+            address=clinic.address if clinic else '',
+            email=clinic_user.email,
+            phone_number=clinic_user.phone_number,
+            city=clinic_user.city,
+            country=clinic_user.country,
+            default_language=clinic_user.default_language,
+        ),
+        vaccinations=tuple(exam.vaccinations.all()),
+        medications=tuple(exam.medications.all()),
+        blood_test=exam.blood_test,
+        urine_test=exam.urine_test,
+        fecal_test=exam.fecal_test,
+    )
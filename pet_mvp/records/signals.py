@@ -0,0 +1,40 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from pet_mvp.notifications.reminders import schedule_reminders
+from pet_mvp.pets.health import refresh_health_summaries
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+# fields a health summary is worked out from
+HEALTH_SUMMARY_FIELDS = {'pet', 'vaccine', 'valid_until', 'date_of_entry'}
+
+
+@receiver(signal=post_save, sender=VaccinationRecord)
+@receiver(signal=post_save, sender=MedicationRecord)
+def update_reminder_schedule(sender, instance, update_fields=None, **kwargs):
+    """Signal handler to keep the expiration reminders in line with the record's 'valid_until'"""
+
+    # partial saves, e.g. flagging a record as wrong, do not move the reminders
+    if update_fields is not None and 'valid_until' not in update_fields:
+        return
+
+    schedule_reminders([instance])
+
+
+@receiver(signal=post_save, sender=VaccinationRecord)
+@receiver(signal=post_save, sender=MedicationRecord)
+@receiver(signal=post_save, sender=MedicalExaminationRecord)
+@receiver(signal=post_delete, sender=VaccinationRecord)
+@receiver(signal=post_delete, sender=MedicationRecord)
+@receiver(signal=post_delete, sender=MedicalExaminationRecord)
+def update_health_summary(sender, instance, update_fields=None, **kwargs):
+    """Signal handler to refresh the health summary of the record's pet once the change is committed"""
+
+    if update_fields is not None and not HEALTH_SUMMARY_FIELDS.intersection(update_fields):
+        return
+
+    # after the commit, so a pet deleted together with its records gets no summary back
+    transaction.on_commit(partial(refresh_health_summaries, [instance.pet_id]))
@@ -0,0 +1,140 @@
+"""
+Chronological medical timeline of a pet, newest first.
+
+Vaccinations, treatments, examinations and lab tests are read as separate
+date-ordered querysets, each limited to one page after the cursor, and merged
+lazily with a k-way merge. A page therefore reads at most one page of rows per
+source, however long the history of the pet is. Entries are ordered by
+(date, type, id), which is also the opaque cursor of the next page.
+"""
+import heapq
+from collections import namedtuple
+from datetime import date
+from itertools import islice
+
+from django.db.models import Q
+
+from pet_mvp.common.utils import encode_cursor, decode_cursor
+from pet_mvp.drugs.models import BloodTest, UrineTest, FecalTest
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+TimelineEntry = namedtuple('TimelineEntry', ['date', 'type', 'id', 'data'])
+
+# type -> model, path from the model to the pet, date field and the fields returned as {key: lookup}
+TIMELINE_SOURCES = {
+    'vaccination': (VaccinationRecord, 'pet', 'date_of_vaccination', {
+        'name': 'vaccine__name',
+        'valid_until': 'valid_until',
+        'batch_number': 'batch_number',
+    }),
+    'treatment': (MedicationRecord, 'pet', 'date', {
+        'name': 'medication__name',
+        'dosage': 'dosage',
+        'valid_until': 'valid_until',
+    }),
+    'examination': (MedicalExaminationRecord, 'pet', 'date_of_entry', {
+        'exam_type': 'exam_type',
+        'doctor': 'doctor',
+        'reason_for_visit': 'reason_for_visit',
+        'diagnosis': 'diagnosis',
+    }),
+    'blood_test': (BloodTest, 'medicalexaminationrecord__pet', 'date_conducted', {
+        'result': 'result',
+    }),
+    'urine_test': (UrineTest, 'medicalexaminationrecord__pet', 'date_conducted', {
+        'result': 'result',
+    }),
+    'fecal_test': (FecalTest, 'medicalexaminationrecord__pet', 'date_conducted', {
+        'result': 'result',
+    }),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_cursor(cursor):
+    """
+    Returns the (date, type, id) position encoded in a cursor, or None for the first page.
+
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    if not cursor:
+        return None
+
+    values = decode_cursor(cursor)
+    try:
+        entry_date, entry_type, entry_id = values
+        position = date.fromisoformat(entry_date), entry_type, int(entry_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+    # checked for a string first, a list or an object cannot be looked up
+    if not isinstance(entry_type, str) or entry_type not in TIMELINE_SOURCES:
+        raise InvalidCursor(cursor)
+    return position
+
+
+def after(entry_type, date_field, position):
+    """Seek condition of one source for the entries after the position in (date, type, id) descending order."""
+    position_date, position_type, position_id = position
+    if entry_type < position_type:
+        return Q(**{f'{date_field}__lte': position_date})
+    if entry_type > position_type:
+        return Q(**{f'{date_field}__lt': position_date})
+    return Q(**{f'{date_field}__lt': position_date}) | Q(**{date_field: position_date, 'pk__lt': position_id})
+
+
+def source_entries(pet_id, entry_type, position, limit):
+    """Stream at most limit entries of one source after the position, newest first."""
+    model, pet_path, date_field, fields = TIMELINE_SOURCES[entry_type]
+
+    rows = model.objects.filter(**{pet_path: pet_id})
+    if position is not None:
+        rows = rows.filter(after(entry_type, date_field, position))
+
+    rows = (
+        rows.distinct()
+        .order_by(f'-{date_field}', '-pk')
+        .values('pk', date_field, *fields.values())[:limit]
+    )
+
+    for row in rows.iterator(chunk_size=limit):
+        yield TimelineEntry(
+            date=row[date_field],
+            type=entry_type,
+            id=row['pk'],
+            # sparse: empty values are left out
+            data={key: row[lookup] for key, lookup in fields.items() if row[lookup] not in (None, '')},
+        )
+
+
+def timeline_page(pet_id, cursor=None, page_size=20):
+    """
+    One page of the medical timeline of a pet.
+
+    Args:
+        pet_id (int): primary key of the pet
+        cursor (str, optional): cursor returned with the previous page
+        page_size (int, optional): entries per page
+    Returns:
+        tuple: list of TimelineEntry, newest first, and the cursor of the next page or None
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    position = parse_cursor(cursor)
+
+    streams = [
+        source_entries(pet_id, entry_type, position, page_size + 1)
+        for entry_type in TIMELINE_SOURCES
+    ]
+    merged = heapq.merge(*streams, key=lambda entry: (entry.date, entry.type, entry.id), reverse=True)
+    entries = list(islice(merged, page_size + 1))
+
+    if len(entries) <= page_size:
+        return entries, None
+
+    last = entries[page_size - 1]
+    return entries[:page_size], encode_cursor([last.date, last.type, last.id])
@@ -2,7 +2,7 @@ from django.urls import path, include
 
 from pet_mvp.records.views import RecordListView, ExaminationDetailsView, VaccineRecordAddView, \
     StopVaccineAdditionsView, TreatmentRecordAddView, MedicalExaminationReportCreateView, VaccineRecordEditView, \
-    TreatmentRecordEditView, VaccineWrongReportView, VaccineResetView
+    TreatmentRecordEditView, VaccineWrongReportView, VaccineResetView, RecordExportView
 
 urlpatterns = [
     path('', RecordListView.as_view(), name='record-list'),
@@ -25,4 +25,5 @@ urlpatterns = [
         path('<int:pk>/', ExaminationDetailsView.as_view(), name='exam-details'),
         path('add/', MedicalExaminationReportCreateView.as_view(), name='exam-add'),
     ])),
+    path('export/<str:scope>/<str:file_format>/', RecordExportView.as_view(), name='record-export'),
 ]
@@ -1,18 +1,25 @@
 from abc import ABC, abstractmethod
 from datetime import timedelta
+from functools import partial
 
+from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
-from django.http import HttpResponseForbidden, HttpResponseRedirect
+from django.db.models import Prefetch
+from django.http import HttpResponseForbidden, HttpResponseRedirect, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.views import generic as views
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.tokens import default_token_generator
 
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode, url_has_allowed_host_and_scheme
 
+from pet_mvp.common.utils import keyset_page, split_keyset_page
+from pet_mvp.drugs.catalog import catalog_payload
+from pet_mvp.notifications.reminders import schedule_reminders
 from pet_mvp.notifications.tasks import send_medical_record_email, send_wrong_vaccination_report
 from pet_mvp.pets.models import Pet
 from pet_mvp.records.forms import FecalTestForm, UrineTestForm, \
@@ -20,28 +27,62 @@ from pet_mvp.records.forms import FecalTestForm, UrineTestForm, \
     TreatmentFormSet, \
     MedicalExaminationRecordForm, MedicationRecordEditForm
 from pet_mvp.records.models import VaccinationRecord, MedicalExaminationRecord, MedicationRecord
+from pet_mvp.records.exports import EXPORT_FORMATS, EXPORT_SCOPES, export_lines, export_file_name
+from pet_mvp.records.reports import load_exam_report
 
 
 class RecordListView(views.ListView):
     template_name = 'records/record_list.html'
 
+    # context name, related name, model, keyset ordering and the relations shown in the list
+    RECORD_PAGES = (
+        ('vaccines', 'vaccine_records', VaccinationRecord, ['-valid_until', '-pk'], ['vaccine']),
+        ('treatments', 'medication_records', MedicationRecord, ['-valid_until', '-pk'], ['medication']),
+        ('examinations', 'examination_records', MedicalExaminationRecord, ['-date_of_entry', '-pk'], []),
+    )
+
     def get_queryset(self):
         pet_pk = self.request.GET.get('pk')
-        return Pet.objects.filter(pk=pet_pk).prefetch_related('vaccine_records', 'medication_records',
-                                                              'examination_records')
+        page_size = settings.RECORD_LIST_PAGE_SIZE
+
+        # one page per record type, the cost of the page does not grow with the history of the pet
+        return Pet.objects.filter(pk=pet_pk).prefetch_related(*(
+            Prefetch(
+                related_name,
+                queryset=keyset_page(
+                    model.objects.select_related(*related), ordering, self.request.GET.get(f'{name}_after'), page_size
+                ),
+                to_attr=f'{name}_page',
+            )
+            for name, related_name, model, ordering, related in self.RECORD_PAGES
+        ))
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
+        if not context['pet_list']:
+            raise Http404(_("No pet found matching the query"))
+
         pet = context['pet_list'][0]
-        context['vaccines'] = pet.vaccine_records.all().order_by('-valid_until')
-        context['treatments'] = pet.medication_records.all().order_by(
-            '-valid_until')
-        context['examinations'] = pet.examination_records.all().order_by(
-            '-date_of_entry')
+        for name, related_name, model, ordering, related in self.RECORD_PAGES:
+            page, next_cursor = split_keyset_page(
+                getattr(pet, f'{name}_page'), ordering, settings.RECORD_LIST_PAGE_SIZE
+            )
+            context[name] = page
+            context[f'{name}_older'] = self.page_query(f'{name}_after', next_cursor) if next_cursor else ''
+            context[f'{name}_newest'] = self.page_query(f'{name}_after') if f'{name}_after' in self.request.GET else ''
+
         context['id'] = pet.pk
         context['source'] = self.request.GET.get('source', '')
         return context
 
+    def page_query(self, parameter, cursor=None):
+        """Returns the query string of the current page with the cursor of one record type replaced"""
+        query = self.request.GET.copy()
+        query.pop(parameter, None)
+        if cursor:
+            query[parameter] = cursor
+        return query.urlencode()
+
 
 class BaseRecordAddView(views.CreateView, ABC):
 
@@ -258,20 +299,56 @@ class ExaminationDetailsView(views.DetailView):
     model = MedicalExaminationRecord
     template_name = 'records/examination_details.html'
 
+    def get_object(self, queryset=None):
+        try:
+            self.report = load_exam_report(self.kwargs['pk'])
+        except MedicalExaminationRecord.DoesNotExist:
+            raise Http404(_("No examination found matching the query"))
+        return self.report.exam
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        pet = context['object'].pet
-        context['clinic'] = self.object.clinic
+        pet = self.report.pet
+        context['report'] = self.report
+        context['clinic'] = self.report.clinic
         context['pet_pk'] = pet.pk
         context['source'] = self.request.GET.get('source')
         context['id'] = pet.id
         return context
 
 
+class RecordExportView(views.View):
+    """
+    Streams the examinations a clinic recorded, or the records of the user's pets,
+    as a CSV or NDJSON download.
+    """
+
+    def get(self, request, scope, file_format):
+        if scope not in EXPORT_SCOPES or file_format not in EXPORT_FORMATS:
+            raise Http404(_("No such export"))
+
+        if scope == 'clinic' and not request.user.is_clinic:
+            return HttpResponseForbidden(_("Only clinics can export their examinations"))
+
+        response = StreamingHttpResponse(
+            export_lines(scope, request.user, file_format),
+            content_type=EXPORT_FORMATS[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_file_name(scope, file_format)}"'
+        return response
+
+
 class MedicalExaminationReportCreateView(views.FormView):
     template_name = 'records/examination_add.html'
     form_class = MedicalExaminationRecordForm
 
+    # request flag, report field, form and the message shown when the form is invalid
+    TEST_FORMS = (
+        ('has_blood_test', 'blood_test', BloodTestForm, _("Blood test form contains errors.")),
+        ('has_urine_test', 'urine_test', UrineTestForm, _("Urine test form contains errors.")),
+        ('has_fecal_test', 'fecal_test', FecalTestForm, _("Fecal test form contains errors.")),
+    )
+
     def get_pet(self, pet_id=None, ):
         if pet_id:
             return get_object_or_404(Pet, pk=pet_id)
@@ -291,6 +368,13 @@ class MedicalExaminationReportCreateView(views.FormView):
         context['id'] = pet.pk
         context['source'] = self.request.GET.get('source')
 
+        # the vaccine and treatment selects are built by the page from the versioned catalog
+        species = pet.species.lower()
+        version, _body = catalog_payload(species)
+        context['catalog_url'] = reverse('record-catalog', kwargs={
+            'language': translation.get_language(), 'species': species, 'version': version,
+        })
+
         post_data = self.request.POST or None
 
         context['report_form'] = MedicalExaminationRecordForm(post_data)
@@ -344,35 +428,25 @@ class MedicalExaminationReportCreateView(views.FormView):
                 self.request, _("Treatment information contains errors."))
             all_valid = False
 
-        # Check optional test forms if they're included
-        if request_data.get('has_blood_test'):
-            blood_test_form = BloodTestForm(request_data)
-            if not blood_test_form.is_valid():
-                messages.error(
-                    self.request, _("Blood test form contains errors."))
-                all_valid = False
-
-        if request_data.get('has_urine_test'):
-            urine_test_form = UrineTestForm(request_data)
-            if not urine_test_form.is_valid():
-                messages.error(
-                    self.request, _("Urine test form contains errors."))
-                all_valid = False
-
-        if request_data.get('has_fecal_test'):
-            fecal_test_form = FecalTestForm(request_data)
-            if not fecal_test_form.is_valid():
-                messages.error(
-                    self.request, _("Fecal test form contains errors."))
-                all_valid = False
+        # Check optional test forms if they're included, keeping the validated forms for saving
+        test_forms = {}
+        for flag, field, form_class, error in self.TEST_FORMS:
+            if request_data.get(flag):
+                test_forms[field] = form_class(request_data)
+                if not test_forms[field].is_valid():
+                    messages.error(self.request, error)
+                    all_valid = False
 
         # If any form is invalid, return to the same page with form data preserved
         if not all_valid:
             return self.form_invalid(form)
 
-        # If all forms are valid, proceed with saving
+        # If all forms are valid, proceed with saving in a fixed number of statements
         with transaction.atomic():
-            # Set foreign keys early
+            # the tests go first, so the report is inserted once with all its foreign keys
+            for field, test_form in test_forms.items():
+                setattr(form.instance, field, test_form.save())
+
             form.instance.pet = pet
             form.instance.clinic = self.request.user
             report = form.save()
@@ -383,33 +457,33 @@ class MedicalExaminationReportCreateView(views.FormView):
                 vaccine.pet = pet
                 if vaccine.vaccine.name in ['Rabies', ]:
                     vaccine.valid_from += timedelta(days=7)
-                vaccine.save()
-            report.vaccinations.set(vaccines)
+            vaccines = VaccinationRecord.objects.bulk_create(vaccines)
 
             # Treatments
             treatments = treatment_formset.save(commit=False)
             for treatment in treatments:
                 treatment.pet = pet
-                treatment.save()
-            report.medications.set(treatments)
-
-            # Optional test forms
-            if request_data.get('has_blood_test'):
-                blood_test_form = BloodTestForm(request_data)
-                report.blood_test = blood_test_form.save()
+            treatments = MedicationRecord.objects.bulk_create(treatments)
 
-            if request_data.get('has_urine_test'):
-                urine_test_form = UrineTestForm(request_data)
-                report.urine_test = urine_test_form.save()
+            # one insert per relation instead of the diffing done by set()
+            Vaccinations = MedicalExaminationRecord.vaccinations.through
+            Vaccinations.objects.bulk_create(
+                Vaccinations(medicalexaminationrecord=report, vaccinationrecord=vaccine)
+                for vaccine in vaccines
+            )
+            Medications = MedicalExaminationRecord.medications.through
+            Medications.objects.bulk_create(
+                Medications(medicalexaminationrecord=report, medicationrecord=treatment)
+                for treatment in treatments
+            )
 
-            if request_data.get('has_fecal_test'):
-                fecal_test_form = FecalTestForm(request_data)
-                report.fecal_test = fecal_test_form.save()
+            # bulk_create skips the post_save signal scheduling the reminders
+            schedule_reminders(vaccines)
+            schedule_reminders(treatments)
 
-            report.save()
+            lang = self.request.COOKIES.get('django_language', 'en')
+            transaction.on_commit(partial(send_medical_record_email.delay, report.pk, lang))
 
-        lang = self.request.COOKIES.get('django_language', 'en')
-        send_medical_record_email(report, lang)
         messages.success(self.request, _(
             "Examination data saved successfully!"))
         return redirect(reverse_lazy('pet-details', kwargs={'pk': pet.pk}))
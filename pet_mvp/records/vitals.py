@@ -0,0 +1,157 @@
+"""
+Time series of the vitals and blood test results of a pet, for charts.
+
+One metric is read as a (date, value) values_list projection in a single query
+and turned into NumPy arrays, so the rolling mean, the min/max and the flags of
+the values outside the reference range of the species are computed vectorized
+over the whole history. Long histories are downsampled with Largest-Triangle-
+Three-Buckets (LTTB), which keeps the peaks and dips a chart needs, and the
+series is returned as columns rather than a list of points to keep it compact.
+"""
+import numpy as np
+
+from pet_mvp.drugs.models import BloodTest
+from pet_mvp.records.models import MedicalExaminationRecord
+
+# metric -> model, path from the model to the pet, date field and value field
+VITAL_METRICS = {
+    'temperature': (MedicalExaminationRecord, 'pet', 'date_of_entry', 'temperature'),
+    'heart_rate': (MedicalExaminationRecord, 'pet', 'date_of_entry', 'heart_rate'),
+    'respiratory_rate': (MedicalExaminationRecord, 'pet', 'date_of_entry', 'respiratory_rate'),
+    'body_condition_score': (MedicalExaminationRecord, 'pet', 'date_of_entry', 'body_condition_score'),
+    'white_blood_cells': (BloodTest, 'medicalexaminationrecord__pet', 'date_conducted', 'white_blood_cells'),
+    'red_blood_cells': (BloodTest, 'medicalexaminationrecord__pet', 'date_conducted', 'red_blood_cells'),
+    'hemoglobin': (BloodTest, 'medicalexaminationrecord__pet', 'date_conducted', 'hemoglobin'),
+    'platelets': (BloodTest, 'medicalexaminationrecord__pet', 'date_conducted', 'platelets'),
+}
+
+# metric -> species -> (low, high) of the usual adult reference interval;
+# cell counts in thousands (WBC, platelets) or millions (RBC) per microliter
+REFERENCE_RANGES = {
+    'temperature': {'dog': (37.5, 39.2), 'cat': (37.8, 39.2)},
+    'heart_rate': {'dog': (60, 140), 'cat': (140, 220)},
+    'respiratory_rate': {'dog': (10, 30), 'cat': (20, 30)},
+    'body_condition_score': {'dog': (4, 5), 'cat': (4, 5)},
+    'white_blood_cells': {'dog': (5.5, 16.9), 'cat': (5.5, 19.5)},
+    'red_blood_cells': {'dog': (5.5, 8.5), 'cat': (5.0, 10.0)},
+    'hemoglobin': {'dog': (12.0, 18.0), 'cat': (8.0, 15.0)},
+    'platelets': {'dog': (175, 500), 'cat': (300, 800)},
+}
+
+# decimals of the values returned
+PRECISION = 2
+
+
+def metric_series(pet_id, metric):
+    """
+    Read the dated values of one metric of a pet, oldest first, in one query.
+
+    Args:
+        pet_id (int): primary key of the pet
+        metric (str): one of VITAL_METRICS
+    Returns:
+        tuple: the dates as a datetime64[D] array and the values as a float64 array
+    """
+    model, pet_path, date_field, value_field = VITAL_METRICS[metric]
+    rows = (
+        model.objects.filter(**{pet_path: pet_id, f'{value_field}__isnull': False})
+        .order_by(date_field, 'pk')
+        .values_list(date_field, value_field)
+    )
+    dates, values = zip(*rows) if rows else ((), ())
+    return np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=np.float64)
+
+
+def rolling_mean(values, window):
+    """Trailing mean of the last window values at each point, over fewer values at the start."""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the point kept before it and the
+    average of the next bucket.
+
+    Args:
+        x (ndarray): ascending positions of the points
+        y (ndarray): values of the points
+        threshold (int): number of points to keep
+    Returns:
+        ndarray: ascending indices of the kept points, all of them when there are no more than threshold
+    """
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    # bucket i spans edges[i]:edges[i + 1], the last one ends with the last point on its own
+    every = (size - 2) / (threshold - 2)
+    edges = np.append(np.floor(np.arange(threshold - 1) * every).astype(int) + 1, size)
+
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end, next_end = edges[bucket], edges[bucket + 1], edges[bucket + 2]
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = kept[bucket + 1] = start + int(np.argmax(areas))
+    return kept
+
+
+def vitals_series(pet, metric, window, max_points):
+    """
+    Columnar series of one metric of a pet with its rolling mean and reference range flags.
+
+    The statistics are computed over the whole history; the columns hold at most
+    max_points points, picked with LTTB.
+
+    Args:
+        pet (Pet): the pet
+        metric (str): one of VITAL_METRICS
+        window (int): values averaged by the rolling mean
+        max_points (int): points returned at most
+    Returns:
+        dict: the metric, its reference range, the statistics and the columns
+            dates, values, rolling_mean and out_of_range
+    """
+    dates, values = metric_series(pet.pk, metric)
+    reference = REFERENCE_RANGES[metric].get(pet.species.lower())
+
+    if reference is None:
+        out_of_range = np.zeros(len(values), dtype=bool)
+    else:
+        out_of_range = (values < reference[0]) | (values > reference[1])
+    means = rolling_mean(values, window)
+
+    kept = lttb(dates.astype(np.float64), values, max_points)
+
+    stats = {'count': len(values), 'min': None, 'max': None, 'mean': None, 'latest': None, 'out_of_range': 0}
+    if len(values):
+        stats.update(
+            min=float(values.min()),
+            max=float(values.max()),
+            mean=round(float(values.mean()), PRECISION),
+            latest=float(values[-1]),
+            out_of_range=int(out_of_range.sum()),
+        )
+
+    return {
+        'metric': metric,
+        'reference_range': list(reference) if reference else None,
+        'window': window,
+        'stats': stats,
+        'downsampled': len(kept) < len(values),
+        'dates': np.datetime_as_string(dates[kept]).tolist(),
+        'values': values[kept].round(PRECISION).tolist(),
+        'rolling_mean': means[kept].round(PRECISION).tolist(),
+        'out_of_range': out_of_range[kept].tolist(),
+    }
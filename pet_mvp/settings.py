@@ -254,6 +254,75 @@ else:
     EMAIL_USE_TLS = False
     EMAIL_USE_SSL = False
 
+# Rendered email cache: in-process LRU entries and an optional shared Redis tier, e.g. "redis://localhost:6379/1"
+EMAIL_RENDER_CACHE_SIZE = int(os.getenv('EMAIL_RENDER_CACHE_SIZE', 256))
+EMAIL_RENDER_CACHE_TIMEOUT = int(os.getenv('EMAIL_RENDER_CACHE_TIMEOUT', 3600))
+EMAIL_RENDER_CACHE_URL = os.getenv('EMAIL_RENDER_CACHE_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+if EMAIL_RENDER_CACHE_URL:
+    CACHES['email_render'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': EMAIL_RENDER_CACHE_URL,
+        'TIMEOUT': EMAIL_RENDER_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'email_render',
+    }
+
+# Records per type shown on a page of the pet's record history
+RECORD_LIST_PAGE_SIZE = int(os.getenv('RECORD_LIST_PAGE_SIZE', 20))
+
+# Entries per page of the medical timeline API, the 'limit' parameter is capped at the maximum
+TIMELINE_PAGE_SIZE = int(os.getenv('TIMELINE_PAGE_SIZE', 20))
+TIMELINE_MAX_PAGE_SIZE = int(os.getenv('TIMELINE_MAX_PAGE_SIZE', 100))
+
+# Points of a vitals chart series, the 'points' parameter is capped at the maximum; longer histories are downsampled
+VITALS_POINTS = int(os.getenv('VITALS_POINTS', 200))
+VITALS_MAX_POINTS = int(os.getenv('VITALS_MAX_POINTS', 1000))
+
+# Values averaged by the rolling mean of a vitals series unless the 'window' parameter is given
+VITALS_ROLLING_WINDOW = int(os.getenv('VITALS_ROLLING_WINDOW', 3))
+
+# Pets a vaccination or treatment campaign may add records to in one submission
+CAMPAIGN_MAX_PETS = int(os.getenv('CAMPAIGN_MAX_PETS', 500))
+
+# Rows validated and inserted per chunk by the bulk import of historical records
+RECORD_IMPORT_BATCH_SIZE = int(os.getenv('RECORD_IMPORT_BATCH_SIZE', 1000))
+
+# Rows fetched per database round-trip while streaming a record export
+RECORD_EXPORT_CHUNK_SIZE = int(os.getenv('RECORD_EXPORT_CHUNK_SIZE', 2000))
+
+# TrueType font of the PDF passports, the bundled DejaVu Sans by default; the built-in PDF fonts have no Cyrillic
+PASSPORT_PDF_FONT = os.getenv('PASSPORT_PDF_FONT', str(BASE_DIR / 'staticfiles' / 'fonts' / 'DejaVuSans.ttf'))
+
+# Seconds a passport render queued by a request is not queued again by the following requests
+PASSPORT_RENDER_LOCK = int(os.getenv('PASSPORT_RENDER_LOCK', 60))
+
+# Seconds the browser keeps a version of the vaccine and drug catalog of the examination page
+RECORD_CATALOG_MAX_AGE = int(os.getenv('RECORD_CATALOG_MAX_AGE', 60 * 60 * 24 * 365))
+
+# Seconds the record forms trust their cached catalog before comparing it to the version shared by the workers
+RECORD_CATALOG_SYNC_INTERVAL = int(os.getenv('RECORD_CATALOG_SYNC_INTERVAL', 5))
+
+# Email outbox: emails sent per connection, attempts before dead-lettering, base retry delay in seconds
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', 60))
+
+# Seconds the outbox rows claimed by a drain stay hidden from other drains; rows of a crashed drain are sent after it
+OUTBOX_LEASE = int(os.getenv('OUTBOX_LEASE', 300))
+
+# Pets or venues per shard of the daily beat jobs, the shards run in parallel across the workers
+DAILY_JOB_SHARD_SIZE = int(os.getenv('DAILY_JOB_SHARD_SIZE', 5000))
+
+# Days before 'valid_until' on which expiration reminders are sent, e.g. "28 14 7 1"
+VACCINE_REMINDER_OFFSETS = [int(days) for days in os.getenv('VACCINE_REMINDER_OFFSETS', '28 14 7 1').split()]
+TREATMENT_REMINDER_OFFSETS = [int(days) for days in os.getenv('TREATMENT_REMINDER_OFFSETS', '7 1').split()]
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get(
@@ -264,6 +333,24 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Outbound email rate limit per backend: (sustained emails per second, burst size).
+# The bucket is shared by all workers through Redis, defaults to the celery broker when it is Redis.
+EMAIL_RATE_LIMITS = {
+    'django.core.mail.backends.smtp.EmailBackend': (
+        float(os.getenv('MAILHOG_RATE_LIMIT', 50)), int(os.getenv('MAILHOG_RATE_BURST', 100))
+    ),
+    'anymail.backends.brevo.EmailBackend': (
+        float(os.getenv('BREVO_RATE_LIMIT', 10)), int(os.getenv('BREVO_RATE_BURST', 20))
+    ),
+}
+EMAIL_RATE_LIMIT_REDIS_URL = os.getenv(
+    'EMAIL_RATE_LIMIT_REDIS_URL', CELERY_BROKER_URL if CELERY_BROKER_URL.startswith('redis') else ''
+)
+# seconds the local buckets are used after Redis failed, before Redis is tried again
+EMAIL_RATE_LIMIT_REDIS_RETRY = int(os.getenv('EMAIL_RATE_LIMIT_REDIS_RETRY', 30))
+# seconds to stop sending when the provider throttles without a Retry-After header
+EMAIL_THROTTLE_PAUSE = int(os.getenv('EMAIL_THROTTLE_PAUSE', 5))
+
 CELERY_BEAT_SCHEDULE = {
     'send-vaccine-expiration-notifications-daily': {
         'task': 'pet_mvp.notifications.tasks.send_vaccine_expiration_notifications',
@@ -273,6 +360,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'pet_mvp.notifications.tasks.send_treatment_expiration_notifications',
         'schedule': crontab(hour='7', minute='30'),  # runs daily at 07:30 AM
     },
+    'send-expiration-digest-notifications-daily': {
+        'task': 'pet_mvp.notifications.tasks.send_expiration_digest_notifications',
+        'schedule': crontab(hour='7', minute='15'),  # runs daily at 07:15 AM
+    },
+    'reconcile-health-summaries-daily': {
+        'task': 'pet_mvp.pets.tasks.reconcile_health_summaries',
+        'schedule': crontab(hour='0', minute='5'),  # right after midnight, when the day's expirations apply
+    },
+    'prune-notification-ledger-daily': {
+        'task': 'pet_mvp.notifications.tasks.prune_notification_ledger',
+        'schedule': crontab(hour='3', minute='0'),
+    },
+    'drain-email-outbox-every-minute': {
+        'task': 'pet_mvp.notifications.tasks.drain_email_outbox',
+        'schedule': crontab(minute='*'),  # picks up retries and emails queued while workers were down
+    },
     'cleanup-used-qr-codes-daily': {
         'task': 'pet_mvp.access_codes.tasks.qr_code_cleanup_task',
         'schedule': crontab(hour='0', minute='0'),
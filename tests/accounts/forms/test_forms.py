@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
-from pet_mvp.accounts.forms import OwnerCreateForm, ClinicRegistrationForm, AccessCodeEmailForm
+from pet_mvp.accounts.forms import OwnerCreateForm, ClinicRegistrationForm, AccessCodeEmailForm, OwnerEditForm
 from pet_mvp.pets.models import Pet
 from pet_mvp.access_codes.models import PetAccessCode
 
@@ -128,6 +128,40 @@ class ClinicRegistrationFormTests(TestCase):
         self.assertFalse(form.instance.is_owner)
 
 
+class OwnerEditFormTests(TestCase):
+    """
+    Tests for the OwnerEditForm.
+    """
+
+    def setUp(self):
+        self.user = UserModel.objects.create_owner(
+            email='owner@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.form_data = {
+            'email': 'owner@example.com',
+            'first_name': 'Test',
+            'last_name': 'Owner',
+        }
+
+    def test_reminder_delivery_is_saved_unchanged(self):
+        """Test that the choice value is not title-cased like the other text fields."""
+        form = OwnerEditForm(data={**self.form_data, 'reminder_delivery': UserModel.REMINDER_SINGLE},
+                             instance=self.user)
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.reminder_delivery, UserModel.REMINDER_SINGLE)
+
+    def test_missing_reminder_delivery_keeps_current_value(self):
+        """Test that omitting the field keeps the stored preference."""
+        form = OwnerEditForm(data=self.form_data, instance=self.user)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['reminder_delivery'], UserModel.REMINDER_DIGEST)
+
+
 class AccessCodeEmailFormTests(TestCase):
     """
     Tests for the AccessCodeEmailForm.
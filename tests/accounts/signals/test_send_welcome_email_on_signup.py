@@ -26,7 +26,8 @@ class SendWelcomeEmailSignalTest(TestCase):
         )
 
         # Act: send the signal
-        user_signed_up.send(sender=UserModel, request=request, user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            user_signed_up.send(sender=UserModel, request=request, user=user)
 
-        # Assert: check the Celery task is called with the right arguments
-        mock_send_email.assert_called_once_with(user, 'bg')
\ No newline at end of file
+        # Assert: check the Celery task is queued with the right arguments
+        mock_send_email.delay.assert_called_once_with(user.pk, 'bg')
\ No newline at end of file
@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
+from unittest.mock import patch
 
 from pet_mvp.accounts.views import RegisterOwnerView
 from pet_mvp.accounts.forms import OwnerCreateForm, ClinicRegistrationForm
@@ -179,6 +180,28 @@ class RegisterOwnerViewTests(TestCase):
         user = UserModel.objects.get(email='newowner@example.com')
         self.assertEqual(int(self.client.session['_auth_user_id']), user.pk)
 
+    @patch('pet_mvp.accounts.views.send_user_registration_email')
+    def test_registration_email_queued_on_commit(self, mock_send_email):
+        """Test that the welcome email is handed to celery with the user id after commit."""
+        url = reverse('register')
+        form_data = {
+            'email': 'queued@example.com',
+            'password1': 'testpass123',
+            'password2': 'testpass123',
+            'first_name': 'Queued',
+            'last_name': 'Owner',
+            'phone_number': '0887654321',
+            'city': 'Sofia',
+            'country': 'Bulgaria'
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, data=form_data)
+
+        user = UserModel.objects.get(email='queued@example.com')
+        mock_send_email.delay.assert_called_once()
+        self.assertEqual(mock_send_email.delay.call_args.args[0], user.pk)
+
 
     def test_phone_number_invalid(self):
         url = reverse('register')
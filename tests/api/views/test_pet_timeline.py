@@ -0,0 +1,133 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pet_mvp.access_codes.models import VetPetAccess
+from pet_mvp.common.utils import encode_cursor
+from pet_mvp.drugs.models import Vaccine, Drug, BloodTest, FecalTest
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+
+class PetTimelineApiTest(TestCase):
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+        self.pet.owners.add(self.owner)
+
+        self.vaccine = Vaccine.objects.create(name='Test Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Test Drug', suitable_for='dog', notes='Test drug')
+        self.url = reverse('pet-timeline', kwargs={'pet_id': self.pet.pk})
+
+    def add_history(self, days):
+        today = datetime.date.today()
+        for i in range(days):
+            day = today - datetime.timedelta(days=i)
+            VaccinationRecord.objects.create(
+                pet=self.pet, vaccine=self.vaccine, date_of_vaccination=day,
+                valid_until=day + datetime.timedelta(days=365))
+            MedicationRecord.objects.create(
+                pet=self.pet, medication=self.drug, date=day, valid_until=day + datetime.timedelta(days=30))
+            MedicalExaminationRecord.objects.create(
+                pet=self.pet,
+                clinic=self.clinic,
+                doctor='Dr. Test',
+                reason_for_visit='Checkup',
+                treatment_performed='None',
+                date_of_entry=day,
+                blood_test=BloodTest.objects.create(result='Normal', date_conducted=day),
+                fecal_test=FecalTest.objects.create(result='Normal', date_conducted=day) if i % 2 else None,
+            )
+
+    def test_pages_merge_sources_in_order(self):
+        self.add_history(5)
+        self.client.force_login(self.owner)
+
+        entries, cursor = [], None
+        while True:
+            response = self.client.get(self.url, {'limit': 4, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 4)
+            entries += data['results']
+            cursor = data['next']
+            if cursor is None:
+                break
+
+        # vaccination, treatment, examination and blood test every day, fecal test every other day
+        self.assertEqual(len(entries), 5 * 4 + 2)
+        keys = [(entry['date'], entry['type'], entry['id']) for entry in entries]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(len(set(keys)), len(keys))
+
+        vaccination = next(entry for entry in entries if entry['type'] == 'vaccination')
+        self.assertEqual(vaccination['name'], 'Test Vaccine')
+        # sparse entries leave empty fields out
+        self.assertNotIn('batch_number', vaccination)
+
+    def test_page_reads_one_page_per_source(self):
+        self.add_history(10)
+        self.client.force_login(self.owner)
+
+        # session, user, pet, owner check and one query per source
+        with self.assertNumQueries(10):
+            response = self.client.get(self.url, {'limit': 3})
+
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_vet_needs_active_access(self):
+        self.add_history(1)
+        self.client.force_login(self.clinic)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        VetPetAccess.objects.create(
+            vet=self.clinic, pet=self.pet, expires_at=timezone.now() + datetime.timedelta(minutes=40),
+            granted_by='code',
+        )
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_unhashable_type(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(self.url, {'cursor': encode_cursor(['2024-01-01', ['x'], 1])})
+
+        self.assertEqual(response.status_code, 400)
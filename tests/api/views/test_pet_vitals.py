@@ -0,0 +1,144 @@
+import datetime
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pet_mvp.access_codes.models import VetPetAccess
+from pet_mvp.drugs.models import BloodTest
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord
+from pet_mvp.records.vitals import lttb, rolling_mean
+
+UserModel = get_user_model()
+
+
+class PetVitalsApiTest(TestCase):
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+        self.pet.owners.add(self.owner)
+        self.client.force_login(self.owner)
+
+    def url(self, metric):
+        return reverse('pet-vitals', kwargs={'pet_id': self.pet.pk, 'metric': metric})
+
+    def add_exams(self, temperatures, hemoglobin=None):
+        start = datetime.date(2024, 1, 1)
+        for i, temperature in enumerate(temperatures):
+            day = start + datetime.timedelta(days=i)
+            MedicalExaminationRecord.objects.create(
+                pet=self.pet,
+                clinic=self.clinic,
+                doctor='Dr. Test',
+                reason_for_visit='Checkup',
+                treatment_performed='None',
+                date_of_entry=day,
+                temperature=temperature,
+                blood_test=BloodTest.objects.create(
+                    result='Normal', date_conducted=day, hemoglobin=hemoglobin[i]) if hemoglobin else None,
+            )
+
+    def test_series_with_rolling_mean_and_flags(self):
+        self.add_exams(['38.0', '38.6', '39.8', None, '37.0'])
+
+        response = self.client.get(self.url('temperature'), {'window': 2})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # the exam without a temperature is not part of the series
+        self.assertEqual(data['dates'], ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-05'])
+        self.assertEqual(data['values'], [38.0, 38.6, 39.8, 37.0])
+        self.assertEqual(data['rolling_mean'], [38.0, 38.3, 39.2, 38.4])
+        self.assertEqual(data['out_of_range'], [False, False, True, True])
+        self.assertEqual(data['reference_range'], [37.5, 39.2])
+        self.assertEqual(data['stats'], {
+            'count': 4, 'min': 37.0, 'max': 39.8, 'mean': 38.35, 'latest': 37.0, 'out_of_range': 2,
+        })
+        self.assertFalse(data['downsampled'])
+
+    def test_blood_test_metric(self):
+        self.add_exams(['38.0', '38.1'], hemoglobin=['14.50', '10.00'])
+
+        data = self.client.get(self.url('hemoglobin')).json()
+
+        self.assertEqual(data['values'], [14.5, 10.0])
+        self.assertEqual(data['out_of_range'], [False, True])
+
+    def test_long_history_is_downsampled_in_one_query(self):
+        temperatures = [f'{38 + (i % 7) / 10:.1f}' for i in range(50)]
+        temperatures[25] = '41.0'
+        self.add_exams(temperatures)
+
+        # session, user, pet, ownership and the series
+        with self.assertNumQueries(5):
+            data = self.client.get(self.url('temperature'), {'points': 10}).json()
+
+        self.assertTrue(data['downsampled'])
+        self.assertEqual(len(data['dates']), 10)
+        self.assertEqual(data['stats']['count'], 50)
+        # the ends and the fever peak are kept
+        self.assertEqual(data['dates'][0], '2024-01-01')
+        self.assertEqual(data['dates'][-1], '2024-02-19')
+        self.assertIn(41.0, data['values'])
+
+    def test_empty_series(self):
+        data = self.client.get(self.url('heart_rate')).json()
+
+        self.assertEqual(data['values'], [])
+        self.assertEqual(data['stats']['count'], 0)
+        self.assertIsNone(data['stats']['min'])
+
+    def test_access_and_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url('weight')).status_code, 404)
+        self.assertEqual(self.client.get(self.url('temperature'), {'window': 0}).status_code, 400)
+        self.assertEqual(self.client.get(self.url('temperature'), {'points': 'x'}).status_code, 400)
+
+        self.client.force_login(self.clinic)
+        self.assertEqual(self.client.get(self.url('temperature')).status_code, 403)
+
+        VetPetAccess.objects.create(
+            vet=self.clinic, pet=self.pet, expires_at=timezone.now() + datetime.timedelta(minutes=40),
+            granted_by='code',
+        )
+        self.assertEqual(self.client.get(self.url('temperature')).status_code, 200)
+
+    def test_lttb_and_rolling_mean(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+
+        kept = lttb(x, y, 100)
+
+        self.assertEqual(len(kept), 100)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 999)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+        np.testing.assert_array_equal(lttb(x[:5], y[:5], 100), np.arange(5))
+        np.testing.assert_allclose(rolling_mean(np.array([1.0, 2.0, 3.0, 4.0]), 3), [1.0, 1.5, 2.0, 3.0])
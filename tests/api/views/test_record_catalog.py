@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pet_mvp.drugs.catalog import catalog_payload, clear_catalog, bump_catalog_version
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.pets.models import Pet
+
+UserModel = get_user_model()
+
+
+class RecordCatalogApiTest(TestCase):
+    def setUp(self):
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+
+        self.vaccine = Vaccine.objects.create(
+            name='Dog Vaccine', suitable_for='dog', notes='Long notes', recommended_interval_days=365)
+        Vaccine.objects.create(name='Cat Vaccine', suitable_for='cat', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Dog Drug', suitable_for='dog', notes='Test drug')
+
+        # rolled back rows of other tests do not fire post_delete
+        clear_catalog()
+        self.addCleanup(clear_catalog)
+        self.client.force_login(self.clinic)
+
+    def catalog_url(self, version=None):
+        version = version or catalog_payload('dog')[0]
+        return reverse('record-catalog', kwargs={'language': 'en', 'species': 'dog', 'version': version})
+
+    def test_catalog_of_species(self):
+        response = self.client.get(self.catalog_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'vaccines': [{
+                'id': self.vaccine.pk, 'name': 'Dog Vaccine', 'species': 'dog', 'recommended_interval_days': 365,
+            }],
+            'drugs': [{
+                'id': self.drug.pk, 'name': 'Dog Drug', 'species': 'dog', 'recommended_interval_days': None,
+            }],
+        })
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age', response['Cache-Control'])
+
+    def test_version_follows_catalog_changes(self):
+        old_url = self.catalog_url()
+
+        self.vaccine.name = 'Renamed Dog Vaccine'
+        self.vaccine.save()
+
+        self.assertNotEqual(self.catalog_url(), old_url)
+
+        # a page loaded before the change gets the current catalog, not cached under the old version
+        response = self.client.get(old_url)
+        self.assertEqual(response.json()['vaccines'][0]['name'], 'Renamed Dog Vaccine')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(RECORD_CATALOG_SYNC_INTERVAL=0)
+    def test_version_follows_changes_made_by_another_process(self):
+        old_url = self.catalog_url()
+
+        # a queryset update sends no signal, as if another worker had changed the catalog
+        Vaccine.objects.filter(pk=self.vaccine.pk).update(name='Renamed Dog Vaccine')
+        bump_catalog_version()
+
+        self.assertNotEqual(self.catalog_url(), old_url)
+        response = self.client.get(self.catalog_url())
+        self.assertEqual(response.json()['vaccines'][0]['name'], 'Renamed Dog Vaccine')
+
+    def test_exam_page_links_current_catalog(self):
+        response = self.client.get(f"{reverse('exam-add')}?id={self.pet.pk}")
+
+        self.assertEqual(response.context['catalog_url'], self.catalog_url())
+
+    def test_unknown_species_returns_404(self):
+        url = reverse('record-catalog', kwargs={'language': 'en', 'species': 'parrot', 'version': 'v'})
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_unknown_language_returns_404(self):
+        url = reverse('record-catalog', kwargs={'language': 'xx', 'species': 'dog', 'version': 'v'})
+
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,186 @@
+import datetime
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pet_mvp.access_codes.models import VetPetAccess
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.notifications.models import ReminderSchedule
+from pet_mvp.notifications.tasks import send_campaign_notifications
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+
+class RecordsCampaignApiTest(TestCase):
+    def setUp(self):
+        self.shelter = UserModel.objects.create_owner(
+            email='shelter@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Shelter',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pets = [self.create_pet(i) for i in range(3)]
+        self.vaccine = Vaccine.objects.create(name='Campaign Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Campaign Drug', suitable_for='dog', notes='Test drug')
+        self.today = datetime.date.today()
+        self.client.force_login(self.shelter)
+
+    def create_pet(self, i, species='dog', owner=None):
+        pet = Pet.objects.create(
+            name=f'Shelter Dog {i}',
+            species=species,
+            breed='Mixed',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='20',
+            passport_number=f'BG01VP{i:06d}',
+        )
+        pet.owners.add(owner or self.shelter)
+        return pet
+
+    def vaccination(self, pets, **record):
+        return self.client.post(reverse('records-campaign'), data=json.dumps({
+            'record_type': 'vaccination',
+            'pets': pets,
+            'record': {
+                'vaccine': self.vaccine.pk,
+                'batch_number': 'CAMPAIGN-1',
+                'date_of_vaccination': self.today.isoformat(),
+                'valid_until': (self.today + datetime.timedelta(days=365)).isoformat(),
+                **record,
+            },
+        }), content_type='application/json')
+
+    def test_vaccinates_pets_by_id_and_passport(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.vaccination([self.pets[0].pk, self.pets[1].passport_number, self.pets[2].pk])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+        records = VaccinationRecord.objects.filter(batch_number='CAMPAIGN-1')
+        self.assertEqual({record.pet_id for record in records}, {pet.pk for pet in self.pets})
+        # bulk_create skips the signal, the campaign schedules the reminders itself
+        self.assertEqual(
+            ReminderSchedule.objects.filter(vaccination_record__in=records).values('vaccination_record').distinct().count(),
+            3,
+        )
+        # the health summaries of the pets and the owner notifications
+        self.assertEqual(len(callbacks), 2)
+
+    def test_query_count_does_not_grow_with_pets(self):
+        # session, user, the template vaccine, the pets, ownership, vet access,
+        # the records and their reminder schedule inside a savepoint
+        with self.assertNumQueries(12):
+            self.vaccination([pet.pk for pet in self.pets])
+
+        pets = [self.create_pet(i) for i in range(3, 13)]
+        with self.assertNumQueries(12):
+            response = self.vaccination([pet.pk for pet in pets])
+
+        self.assertEqual(response.json()['created'], 10)
+
+    def test_one_batched_notification_per_owner(self):
+        other_owner = UserModel.objects.create_owner(
+            email='other@test.com', password='1234', first_name='Other', last_name='Owner')
+        self.pets[0].owners.add(other_owner)
+        records = [
+            MedicationRecord.objects.create(
+                pet=pet, medication=self.drug, valid_until=self.today + datetime.timedelta(days=30))
+            for pet in self.pets
+        ]
+
+        with patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async') as send_emails:
+            send_campaign_notifications('medication', [record.pk for record in records])
+
+        send_emails.assert_called_once()
+        messages = {message['to_email']: message for message in send_emails.call_args.args[0]}
+        self.assertEqual(set(messages), {'shelter@test.com', 'other@test.com'})
+        self.assertEqual(len(messages['shelter@test.com']['context']['records']), 3)
+        self.assertEqual(
+            [record['pet_name'] for record in messages['other@test.com']['context']['records']],
+            ['Shelter Dog 0'],
+        )
+
+    def test_pet_without_access_rejects_whole_campaign(self):
+        stranger_pet = self.create_pet(99, owner=self.clinic)
+
+        response = self.vaccination([self.pets[0].pk, stranger_pet.pk])
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['pets'], [stranger_pet.pk])
+        self.assertFalse(VaccinationRecord.objects.exists())
+
+    def test_vet_with_access_can_vaccinate(self):
+        VetPetAccess.objects.create(
+            vet=self.clinic, pet=self.pets[0], expires_at=timezone.now() + datetime.timedelta(minutes=40),
+            granted_by='code',
+        )
+        self.client.force_login(self.clinic)
+
+        self.assertEqual(self.vaccination([self.pets[0].pk]).status_code, 201)
+        self.assertEqual(self.vaccination([self.pets[1].pk]).status_code, 403)
+
+    def test_owner_vaccinations_follow_can_add_vaccines(self):
+        self.pets[0].can_add_vaccines = False
+        self.pets[0].save()
+
+        self.assertEqual(self.vaccination([self.pets[0].pk]).status_code, 403)
+
+        response = self.client.post(reverse('records-campaign'), data=json.dumps({
+            'record_type': 'medication',
+            'pets': [self.pets[0].pk],
+            'record': {
+                'medication': self.drug.pk,
+                'date': self.today.isoformat(),
+                'valid_until': (self.today + datetime.timedelta(days=30)).isoformat(),
+            },
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_unknown_and_unsuitable_pets(self):
+        response = self.vaccination([self.pets[0].pk, 'BG01VP999999'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['pets'], ['BG01VP999999'])
+
+        cat = self.create_pet(50, species='cat')
+        response = self.vaccination([self.pets[0].pk, cat.pk])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['pets'], [cat.pk])
+
+    def test_invalid_pet_references(self):
+        response = self.vaccination([self.pets[0].pk, ['x'], {'id': 1}, True])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['pets'], [['x'], {'id': 1}, True])
+        self.assertFalse(VaccinationRecord.objects.exists())
+
+    def test_invalid_record_and_flags(self):
+        response = self.vaccination([self.pets[0].pk], valid_until='')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('valid_until', response.json()['errors'])
+
+        # the flags of the owners and the admin are not set by a campaign
+        self.vaccination([self.pets[0].pk], is_editable=True)
+        self.assertFalse(VaccinationRecord.objects.get().is_editable)
+
+    def test_pets_are_limited(self):
+        with self.settings(CAMPAIGN_MAX_PETS=2):
+            self.assertEqual(self.vaccination([]).status_code, 400)
@@ -0,0 +1,143 @@
+import csv
+import datetime
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.notifications.tasks import send_vaccine_recall_notifications
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord
+from pet_mvp.records.recalls import recalled_records
+
+UserModel = get_user_model()
+
+
+class VaccineRecallApiTest(TestCase):
+    def setUp(self):
+        self.staff = UserModel.objects.create_superuser(
+            email='admin@test.com', password='1234', first_name='Test', last_name='Admin')
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com', password='1234', first_name='Test', last_name='Owner')
+        self.other_owner = UserModel.objects.create_owner(
+            email='other@test.com', password='1234', first_name='Other', last_name='Owner')
+
+        self.vaccine = Vaccine.objects.create(name='Recalled Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.today = datetime.date.today()
+        self.pets = [self.create_pet(i) for i in range(3)]
+        self.pets[0].owners.add(self.other_owner)
+
+        self.records = [self.vaccinate(pet, 'ab-1234', 'Vetco') for pet in self.pets]
+        # another manufacturer's lot with the same number and another lot
+        self.vaccinate(self.pets[0], 'AB-1234', 'Other Labs')
+        self.vaccinate(self.pets[1], 'CD-5678', 'Vetco')
+
+        self.client.force_login(self.staff)
+        self.url = reverse('vaccine-recall')
+
+    def create_pet(self, i):
+        pet = Pet.objects.create(
+            name=f'Recall Dog {i}',
+            species='dog',
+            breed='Mixed',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='20',
+            passport_number=f'BG01VP{i:06d}',
+        )
+        pet.owners.add(self.owner)
+        return pet
+
+    def vaccinate(self, pet, batch_number, manufacturer):
+        return VaccinationRecord.objects.create(
+            pet=pet,
+            vaccine=self.vaccine,
+            date_of_vaccination=self.today,
+            valid_until=self.today + datetime.timedelta(days=365),
+            batch_number=batch_number,
+            manufacturer=manufacturer,
+        )
+
+    def test_report_has_a_row_per_record_and_owner(self):
+        response = self.client.get(self.url, {'batch_number': ' AB-1234 ', 'manufacturer': 'vetco'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({int(row['record']) for row in rows}, {record.pk for record in self.records})
+        self.assertEqual(
+            {row['owner_email'] for row in rows if row['pet'] == 'Recall Dog 0'},
+            {'owner@test.com', 'other@test.com'},
+        )
+
+    def test_ndjson_report_without_manufacturer(self):
+        response = self.client.get(self.url, {'batch_number': 'ab-1234', 'format': 'ndjson'})
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        # both manufacturers' lots, the first pet has two owners
+        self.assertEqual(len(rows), 6)
+
+    def test_lookup_uses_the_batch_index(self):
+        records = recalled_records([('ab-1234', None)])
+        with connection.cursor() as cursor:
+            sql, params = records.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+
+        self.assertIn('vaccination_batch_idx', plan)
+
+    def test_notification_is_queued_with_the_counts(self):
+        with patch('pet_mvp.api.views.send_vaccine_recall_notifications.delay') as delay:
+            response = self.client.post(
+                self.url,
+                data=json.dumps({'batch_number': 'AB-1234', 'manufacturer': 'Vetco'}),
+                content_type='application/json',
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'records': 3, 'pets': 3, 'owners': 2})
+        delay.assert_called_once_with([('AB-1234', 'Vetco')], None)
+
+    def test_summary_takes_one_query(self):
+        with patch('pet_mvp.api.views.send_vaccine_recall_notifications.delay'):
+            # session, user and the counts
+            with self.assertNumQueries(3):
+                self.client.post(self.url, data=json.dumps({'batch_number': 'AB-1234'}),
+                                 content_type='application/json')
+
+    def test_one_email_per_owner(self):
+        with patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async') as send_emails:
+            send_vaccine_recall_notifications([('AB-1234', 'Vetco')])
+
+        send_emails.delay.assert_called_once()
+        messages = {message['to_email']: message for message in send_emails.delay.call_args.args[0]}
+        self.assertEqual(set(messages), {'owner@test.com', 'other@test.com'})
+        self.assertEqual(len(messages['owner@test.com']['context']['records']), 3)
+        self.assertEqual(
+            [record['pet_name'] for record in messages['other@test.com']['context']['records']],
+            ['Recall Dog 0'],
+        )
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'batch_number': 'AB-1234', 'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'batch_number': 'AB-1234', 'vaccine': 'x'}).status_code, 400)
+        self.assertEqual(
+            self.client.post(self.url, data='[', content_type='application/json').status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(self.url, {'batch_number': 'AB-1234'})
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(self.url, data='{"batch_number": "AB-1234"}', content_type='application/json')
+        self.assertEqual(response.status_code, 403)
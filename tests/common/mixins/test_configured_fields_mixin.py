@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from pet_mvp.common.mixins import ConfiguredFieldsMixin
+from pet_mvp.records.forms import MedicationRecordAddForm, FecalTestForm, MedicalExaminationRecordForm
+
+
+class ConfiguredFieldsMixinTests(SimpleTestCase):
+    """
+    Tests for the ConfiguredFieldsMixin.
+    """
+
+    def test_fields_are_configured_once_per_class_and_language(self):
+        """Test that building more forms does not set up their fields again."""
+        ConfiguredFieldsMixin._configured_fields.clear()
+
+        with patch.object(FecalTestForm, 'configure_field', wraps=FecalTestForm.configure_field) as configure:
+            with translation.override('en'):
+                FecalTestForm()
+                FecalTestForm()
+            self.assertEqual(configure.call_count, len(FecalTestForm.base_fields))
+
+            with translation.override('bg'):
+                FecalTestForm()
+            self.assertEqual(configure.call_count, 2 * len(FecalTestForm.base_fields))
+
+    def test_instances_get_their_own_widgets(self):
+        """Test that a form changing its fields does not change the other forms."""
+        form = MedicalExaminationRecordForm()
+        form.fields['doctor'].widget.attrs['placeholder'] = 'Changed'
+
+        self.assertNotEqual(MedicalExaminationRecordForm().fields['doctor'].widget.attrs['placeholder'], 'Changed')
+        self.assertIsNot(form.fields['date_of_entry'].widget, MedicalExaminationRecordForm().fields['date_of_entry'].widget)
+
+    def test_field_config_is_applied(self):
+        form = MedicationRecordAddForm()
+
+        self.assertEqual(form.fields['medication'].label, 'Select Medication/Treatment')
+        self.assertEqual(form.fields['medication'].widget.attrs['id'], 'id_medication')
+        self.assertEqual(form.fields['medication'].widget.attrs['placeholder'], 'Medication')
+        self.assertEqual(form.fields['date'].widget.input_type, 'date')
+        self.assertFalse(form.fields['time'].required)
+        self.assertFalse(form.fields['dosage'].required)
+        # not a model field, so there is no verbose name placeholder
+        self.assertNotIn('placeholder', form.fields['custom_is_antiparasite'].widget.attrs)
+
+    def test_instance_initial_is_kept(self):
+        self.assertEqual(FecalTestForm().initial['parasites_detected'], 'false')
+        self.assertEqual(MedicalExaminationRecordForm().initial['follow_up'], 'false')
@@ -0,0 +1,64 @@
+"""
+Test cases for the sharded geocoding of the venues.
+
+This module contains tests for geocoding the venues by id range shards and
+reporting the venues which fail without failing their shard.
+"""
+from unittest.mock import patch, Mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from pet_mvp.accounts.models import Clinic
+from pet_mvp.celery import app as celery_app
+from pet_mvp.common.tasks import geocode_venues_coordinates_task, collect_geocode_shards
+
+User = get_user_model()
+
+
+def geocoding_response(data):
+    return Mock(status_code=200, raise_for_status=Mock(), json=Mock(return_value=data))
+
+
+class GeocodeShardsTestCase(TestCase):
+    """Test cases for the sharded venue geocoding."""
+
+    def setUp(self):
+        for i in range(3):
+            User.objects.create_clinic(
+                email=f'clinic{i}@example.com',
+                password='testpassword',
+                name=f'Clinic {i}',
+                address=f'{i} Some Street',
+                city='Varna',
+                country='Bulgaria',
+            )
+
+    @override_settings(DAILY_JOB_SHARD_SIZE=1)
+    @patch('pet_mvp.common.tasks.requests.get')
+    def test_failed_venue_is_reported_and_the_chord_completes(self, mock_get):
+        """Test that a malformed response fails only its venue and the callback still aggregates every shard."""
+        # run the chord in process
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', always_eager)
+
+        mock_get.side_effect = [
+            geocoding_response({'status': 'OK', 'results': [{'geometry': {'location': {'lat': 43.2, 'lng': 27.9}}}]}),
+            geocoding_response({'status': 'OK', 'results': []}),
+            geocoding_response({'status': 'ZERO_RESULTS'}),
+        ]
+
+        with patch('pet_mvp.common.tasks.collect_geocode_shards.run',
+                   wraps=collect_geocode_shards.run) as mock_collect:
+            geocode_venues_coordinates_task()
+
+        results = mock_collect.call_args.args[0]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(shard['updated'] for shard in results), 1)
+
+        failures = [failure for shard in results for failure in shard['failures']]
+        first, second, third = Clinic.objects.order_by('pk')
+        self.assertEqual([venue_id for venue_id, _ in failures], [second.pk, third.pk])
+        self.assertEqual(failures[1][1], 'ZERO_RESULTS')
+        self.assertEqual(first.latitude, 43.2)
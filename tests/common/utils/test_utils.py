@@ -5,7 +5,9 @@ import os
 import tempfile
 from PIL import Image
 
-from pet_mvp.common.utils import profile_directory_path, get_model_field_translations, resize_image, delete_file
+from pet_mvp.common.utils import profile_directory_path, get_model_field_translations, resize_image, delete_file, \
+    id_ranges, encode_cursor, decode_cursor, cursor_values, keyset_page, split_keyset_page
+from pet_mvp.drugs.models import Vaccine
 
 
 class UtilsTests(TestCase):
@@ -119,3 +121,48 @@ class UtilsTests(TestCase):
 
         # Check the result
         self.assertFalse(result)
+
+    def test_id_ranges(self):
+        """Test that id_ranges splits the primary keys into inclusive ranges of at most shard_size ids."""
+        self.assertEqual(id_ranges(Vaccine.objects.all(), 2), [])
+
+        vaccines = [Vaccine.objects.create(name=f'Vaccine {i}') for i in range(5)]
+        first = vaccines[0].pk
+
+        self.assertEqual(
+            id_ranges(Vaccine.objects.all(), 2),
+            [(first, first + 1), (first + 2, first + 3), (first + 4, first + 4)],
+        )
+        self.assertEqual(id_ranges(Vaccine.objects.all(), 100), [(first, first + 4)])
+
+    def test_keyset_pages(self):
+        """Test that keyset pages ordered by a non-unique field cover every row exactly once."""
+        for i in range(7):
+            Vaccine.objects.create(name=f'Vaccine {i}', recommended_interval_days=i // 3)
+        ordering = ['-recommended_interval_days', 'pk']
+        expected = list(Vaccine.objects.order_by(*ordering).values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = split_keyset_page(keyset_page(Vaccine.objects.all(), ordering, cursor, 3), ordering, 3)
+            seen += [vaccine.pk for vaccine in page]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_decode_cursor(self):
+        """Test that cursors round-trip and malformed cursors are ignored."""
+        self.assertEqual(decode_cursor(encode_cursor(['2025-01-01', 5])), ['2025-01-01', 5])
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        self.assertIsNone(decode_cursor(''))
+
+    def test_cursor_values(self):
+        """Test that cursor values are converted to the ordering fields and mistyped ones are rejected."""
+        ordering = ['-recommended_interval_days', 'pk']
+
+        self.assertEqual(cursor_values(Vaccine, ordering, ['30', 5]), [30, 5])
+        self.assertIsNone(cursor_values(Vaccine, ordering, ['x', 'y']))
+        self.assertIsNone(cursor_values(Vaccine, ordering, [['x'], 5]))
+        self.assertIsNone(cursor_values(Vaccine, ordering, [None, 5]))
+        self.assertIsNone(cursor_values(Vaccine, ordering, [30]))
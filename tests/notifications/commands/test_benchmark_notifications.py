@@ -0,0 +1,47 @@
+"""
+Test cases for the notification throughput benchmark.
+
+This module contains tests for the benchmark_notifications management command.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from pet_mvp.notifications.models import Outbox
+from pet_mvp.pets.models import Pet
+
+
+class BenchmarkNotificationsTestCase(TestCase):
+    """Test cases for the benchmark_notifications command."""
+
+    def setUp(self):
+        handle, self.output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, self.output)
+
+    def test_benchmark_writes_results_and_rolls_back(self):
+        """Test that each run is measured, written as JSON and leaves no seeded data behind."""
+        call_command(
+            'benchmark_notifications', '--pets', '4', '10', '--output', self.output, stdout=StringIO()
+        )
+
+        with open(self.output) as output:
+            results = json.load(output)
+
+        self.assertEqual([run['pets'] for run in results['runs']], [4, 10])
+
+        run = results['runs'][1]
+        # 10 pets of 5 owners: a vaccine and a treatment reminder for each pet of the
+        # 2 owners receiving separate reminders, and a digest for each of the other 3
+        self.assertEqual(run['records'], 20)
+        self.assertEqual(run['emails'], 2 * 2 * 2 + 3)
+        self.assertGreater(run['queries'], 0)
+        self.assertGreater(run['renders'], 0)
+        self.assertGreater(run['peak_rss_kb'], 0)
+
+        self.assertFalse(Pet.objects.exists())
+        self.assertFalse(Outbox.objects.exists())
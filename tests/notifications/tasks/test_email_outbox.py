@@ -0,0 +1,155 @@
+"""
+Test cases for the email outbox.
+
+This module contains tests for queueing emails to the outbox and for the
+drain_email_outbox task which sends them in batches.
+"""
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connection as db_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.models import Outbox
+from pet_mvp.notifications.tasks import drain_email_outbox
+
+
+class EmailOutboxTestCase(TestCase):
+    """Test cases for the email outbox and its batched drain."""
+
+    def queue(self, count):
+        return EmailService.queue_emails(
+            {
+                'subject': f'Subject {i}',
+                'to_email': f'owner{i}@example.com',
+                'html_content': f'<p>Email {i}</p>',
+            }
+            for i in range(count)
+        )
+
+    def test_queue_template_emails(self):
+        """Test that templated emails are rendered into the outbox and drained on commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            queued = EmailService.queue_template_emails([{
+                'subject': 'Digest',
+                'to_email': 'owner@example.com',
+                'template_name': 'emails/expiration_digest_notification.html',
+                'context': {
+                    'vaccines': [{'pet_name': 'First', 'name': 'OutboxVaccine',
+                                  'expiration_date': timezone.now().date(), 'time_left': 'tomorrow'}],
+                    'treatments': [],
+                    'lang': 'en',
+                },
+            }])
+
+        self.assertEqual(queued, 1)
+        email = Outbox.objects.get()
+        self.assertEqual(email.to_email, ['owner@example.com'])
+        self.assertEqual(email.status, Outbox.STATUS_PENDING)
+        self.assertIn('OutboxVaccine', email.html_content)
+
+        # nothing is sent before the caller's transaction commits
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+
+    @patch('pet_mvp.notifications.outbox.get_connection', wraps=get_connection)
+    def test_drain_sends_batch_over_one_connection(self, mock_get_connection):
+        """Test that a batch of emails shares a single backend connection."""
+        self.queue(3)
+
+        result = drain_email_outbox()
+
+        self.assertIn("Sent 3 outbox emails", result)
+        self.assertEqual(mock_get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(Outbox.objects.filter(status=Outbox.STATUS_SENT).count(), 3)
+
+    @override_settings(OUTBOX_BATCH_SIZE=2)
+    @patch('pet_mvp.notifications.outbox.get_connection', wraps=get_connection)
+    def test_drain_opens_one_connection_per_batch(self, mock_get_connection):
+        """Test that the drain keeps pulling batches until the outbox is empty."""
+        self.queue(5)
+
+        drain_email_outbox()
+
+        self.assertEqual(mock_get_connection.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    def test_failed_email_is_retried_later(self, mock_send_messages):
+        """Test that a failure only affects its own row, which is retried with a backoff."""
+        mock_send_messages.side_effect = [1, SMTPException('Mailbox unavailable'), 1]
+        self.queue(3)
+
+        result = drain_email_outbox()
+
+        self.assertIn("Sent 2 outbox emails", result)
+        failed = Outbox.objects.get(status=Outbox.STATUS_PENDING)
+        self.assertEqual(failed.subject, 'Subject 1')
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.last_error, 'Mailbox unavailable')
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+        # not due yet
+        mock_send_messages.reset_mock()
+        drain_email_outbox()
+        mock_send_messages.assert_not_called()
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    def test_email_is_dead_lettered(self, mock_send_messages):
+        """Test that an email is dead-lettered after the maximum number of attempts."""
+        mock_send_messages.side_effect = SMTPException('Mailbox unavailable')
+        self.queue(1)
+
+        drain_email_outbox()
+        Outbox.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        drain_email_outbox()
+
+        email = Outbox.objects.get()
+        self.assertEqual(email.status, Outbox.STATUS_DEAD)
+        self.assertEqual(email.attempts, 2)
+
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    def test_batch_is_sent_outside_the_claiming_transaction(self, mock_send_messages):
+        """Test that no transaction is open while sending and the claimed rows are leased meanwhile."""
+        self.queue(2)
+        atomic_blocks = len(db_connection.atomic_blocks)
+        seen = []
+
+        def send_messages(messages):
+            seen.append((
+                len(db_connection.atomic_blocks),
+                Outbox.objects.filter(next_attempt_at__lte=timezone.now()).count(),
+            ))
+            return 1
+
+        mock_send_messages.side_effect = send_messages
+
+        drain_email_outbox()
+
+        self.assertEqual(seen, [(atomic_blocks, 0), (atomic_blocks, 0)])
+        self.assertEqual(Outbox.objects.filter(status=Outbox.STATUS_SENT).count(), 2)
+
+    @override_settings(OUTBOX_BATCH_SIZE=2)
+    @patch('django.core.mail.backends.locmem.EmailBackend.open')
+    @patch('pet_mvp.notifications.outbox.get_connection', wraps=get_connection)
+    def test_connection_failure_stops_the_drain(self, mock_get_connection, mock_open):
+        """Test that a connection failure leaves every email pending and due, without an attempt."""
+        mock_open.side_effect = OSError('Connection refused')
+        self.queue(5)
+
+        result = drain_email_outbox()
+
+        self.assertIn("Sent 0 outbox emails", result)
+        self.assertEqual(mock_get_connection.call_count, 1)
+        self.assertEqual(
+            Outbox.objects.filter(
+                status=Outbox.STATUS_PENDING, attempts=0, next_attempt_at__lte=timezone.now()
+            ).count(),
+            5,
+        )
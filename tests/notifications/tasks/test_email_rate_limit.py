@@ -0,0 +1,233 @@
+"""
+Test cases for the outbound email rate limiter.
+
+This module contains tests for the token bucket shared by the outbox drains,
+the handling of throttled and failed sends and the email metrics endpoint.
+"""
+import socketserver
+import threading
+import time
+from datetime import timedelta
+from smtplib import SMTPResponseException
+from unittest.mock import patch
+
+import redis
+import requests
+from anymail.exceptions import AnymailAPIError
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pet_mvp.notifications import rate_limit
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.models import Outbox
+from pet_mvp.notifications.outbox import classify_error, ERROR_THROTTLED, ERROR_PERMANENT, ERROR_TRANSIENT
+from pet_mvp.notifications.rate_limit import LocalBucket
+from pet_mvp.notifications.tasks import drain_email_outbox
+
+User = get_user_model()
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+def api_error(status_code, headers=None):
+    """Error raised by the Anymail backend for an HTTP response of the provider."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'Provider error'
+    response.headers.update(headers or {})
+    response._content = b''
+    return AnymailAPIError('Provider error', status_code=status_code, response=response)
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue which throttles messages arriving faster than the server's min_interval."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 fake ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+
+            if command.startswith('DATA'):
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.accept_message(self)
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, min_interval):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.min_interval = min_interval
+        self.received = []
+        self.throttled = 0
+
+    def accept_message(self, handler):
+        now = time.monotonic()
+        if self.received and now - self.received[-1] < self.min_interval:
+            self.throttled += 1
+            handler.reply('451 4.7.1 Too many messages, slow down')
+            return
+        self.received.append(now)
+        handler.reply('250 Queued')
+
+
+class EmailRateLimitTestCase(TestCase):
+    """Test cases for rate limited delivery of the outbox."""
+
+    def setUp(self):
+        rate_limit.local_buckets.clear()
+        rate_limit.local_metrics.clear()
+        rate_limit.redis_failures.clear()
+
+    def queue(self, count):
+        EmailService.queue_emails(
+            {
+                'subject': f'Subject {i}',
+                'to_email': f'owner{i}@example.com',
+                'html_content': f'<p>Email {i}</p>',
+            }
+            for i in range(count)
+        )
+
+    def test_bucket_allows_burst_then_waits(self):
+        bucket = LocalBucket(rate=10, capacity=2)
+
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertAlmostEqual(bucket.take(), 0.1, delta=0.01)
+
+        bucket.pause(5)
+        self.assertGreater(bucket.take(), 4)
+
+    @override_settings(EMAIL_RATE_LIMIT_REDIS_URL='redis://127.0.0.1:1/0', EMAIL_RATE_LIMIT_REDIS_RETRY=30)
+    @patch('redis.Redis.eval')
+    def test_unreachable_redis_falls_back_for_a_while(self, mock_eval):
+        """Test that after a Redis error the local bucket is used without retrying Redis until the cool-down ends."""
+        mock_eval.side_effect = redis.ConnectionError('Connection refused')
+        limiter = rate_limit.RateLimiter(LOCMEM_BACKEND, rate=1000, capacity=10)
+
+        self.assertEqual(limiter.take(), 0)
+        self.assertEqual(limiter.take(), 0)
+        self.assertEqual(mock_eval.call_count, 1)
+
+        # the cool-down is over, Redis is tried again
+        rate_limit.redis_failures['redis://127.0.0.1:1/0'] -= 31
+        mock_eval.side_effect = None
+        mock_eval.return_value = b'0'
+
+        self.assertEqual(limiter.take(), 0)
+        self.assertEqual(mock_eval.call_count, 2)
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(api_error(429)), ERROR_THROTTLED)
+        self.assertEqual(classify_error(api_error(400)), ERROR_PERMANENT)
+        self.assertEqual(classify_error(api_error(503)), ERROR_TRANSIENT)
+        self.assertEqual(classify_error(SMTPResponseException(451, b'slow down')), ERROR_THROTTLED)
+        self.assertEqual(classify_error(SMTPResponseException(550, b'no such user')), ERROR_PERMANENT)
+        self.assertEqual(classify_error(ConnectionResetError()), ERROR_TRANSIENT)
+
+    def test_steady_throughput_against_smtp_server(self):
+        """Test that the limiter spaces the sends so a rate limiting server accepts all of them."""
+        rate = 50
+        server = FakeSMTPServer(min_interval=0.5 / rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.queue(10)
+
+        with override_settings(
+                EMAIL_BACKEND=SMTP_BACKEND,
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=server.server_address[1],
+                EMAIL_RATE_LIMITS={SMTP_BACKEND: (rate, 1)},
+                EMAIL_RATE_LIMIT_REDIS_URL='',
+        ):
+            result = drain_email_outbox()
+
+        self.assertIn("Sent 10 outbox emails", result)
+        self.assertEqual(server.throttled, 0)
+        self.assertEqual(len(server.received), 10)
+
+        gaps = [later - earlier for earlier, later in zip(server.received, server.received[1:])]
+        self.assertGreaterEqual(min(gaps), 0.8 / rate)
+
+    @override_settings(EMAIL_RATE_LIMITS={LOCMEM_BACKEND: (1000, 1000)}, EMAIL_RATE_LIMIT_REDIS_URL='')
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    def test_throttled_send_pauses_and_stops_the_batch(self, mock_send_messages):
+        """Test that a 429 pauses the limiter and leaves the rest of the batch for later."""
+        mock_send_messages.side_effect = [1, api_error(429, {'Retry-After': '30'}), 1]
+        self.queue(3)
+
+        with patch('pet_mvp.notifications.rate_limit.RateLimiter.pause') as mock_pause:
+            result = drain_email_outbox()
+
+        self.assertIn("Sent 1 outbox emails", result)
+        mock_pause.assert_called_once_with(30.0)
+
+        sent, throttled_email, untouched = Outbox.objects.order_by('pk')
+        self.assertEqual(sent.status, Outbox.STATUS_SENT)
+        self.assertEqual(throttled_email.status, Outbox.STATUS_PENDING)
+        self.assertGreaterEqual(throttled_email.next_attempt_at, timezone.now() + timedelta(seconds=29))
+        self.assertEqual(untouched.attempts, 0)
+
+    @patch('django.core.mail.backends.locmem.EmailBackend.send_messages')
+    def test_permanent_failure_is_dead_lettered(self, mock_send_messages):
+        """Test that a rejected request is not retried."""
+        mock_send_messages.side_effect = api_error(400)
+        self.queue(1)
+
+        drain_email_outbox()
+
+        email = Outbox.objects.get()
+        self.assertEqual(email.status, Outbox.STATUS_DEAD)
+        self.assertEqual(email.attempts, 1)
+
+    @override_settings(EMAIL_RATE_LIMITS={LOCMEM_BACKEND: (1000, 1)}, EMAIL_RATE_LIMIT_REDIS_URL='')
+    def test_email_metrics_endpoint(self):
+        """Test that queue depth and throttle waits are exposed to staff."""
+        self.queue(3)
+        drain_email_outbox()
+        self.queue(2)
+
+        staff = User.objects.create_superuser(
+            email='admin@example.com', password='testpassword', first_name='Test', last_name='Admin',
+        )
+        self.client.force_login(staff)
+
+        response = self.client.get(reverse('email-metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        metrics = response.json()
+        self.assertEqual(metrics['pending'], 2)
+        self.assertEqual(metrics['dead'], 0)
+        self.assertEqual(metrics['backend'], LOCMEM_BACKEND)
+        self.assertGreaterEqual(metrics['throttle_waits'], 1)
+        self.assertGreater(metrics['throttle_wait_seconds'], 0)
+
+    def test_email_metrics_endpoint_is_staff_only(self):
+        owner = User.objects.create_owner(
+            email='owner@example.com', password='testpassword', first_name='Test', last_name='Owner',
+        )
+        self.client.force_login(owner)
+
+        response = self.client.get(reverse('email-metrics'))
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,136 @@
+"""
+Test cases for the daily expiration digest.
+
+This module contains tests for the send_expiration_digest_notifications task.
+"""
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import patch
+
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.tasks import send_expiration_digest_notifications
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+from pet_mvp.pets.models import Pet
+from pet_mvp.drugs.models import Vaccine, Drug
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class ExpirationDigestTestCase(TestCase):
+    """Test cases for the per-owner expiration digest."""
+
+    def create_owner(self, email, delivery):
+        return User.objects.create_owner(
+            email=email,
+            password='testpassword',
+            first_name='Test',
+            last_name='Owner',
+            is_owner=True,
+            reminder_delivery=delivery,
+        )
+
+    def create_pet(self, name, owner):
+        pet = Pet.objects.create(
+            name=name,
+            species='dog',
+            breed='Mixed',
+            sex='male',
+            date_of_birth=self.today - timedelta(days=365),
+            color='Brown',
+            features='Digest test pet',
+            current_weight=10.0,
+        )
+        pet.owners.add(owner)
+        return pet
+
+    def setUp(self):
+        """Set up test data."""
+        self.today = timezone.now().date()
+
+        self.digest_owner = self.create_owner('digest@example.com', User.REMINDER_DIGEST)
+        self.single_owner = self.create_owner('single@example.com', User.REMINDER_SINGLE)
+
+        self.vaccine = Vaccine.objects.create(name='DigestVaccine', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='DigestDrug', notes='Test drug')
+
+        first_pet = self.create_pet('First', self.digest_owner)
+        second_pet = self.create_pet('Second', self.digest_owner)
+        single_pet = self.create_pet('Single', self.single_owner)
+
+        VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=28), pet=first_pet, vaccine=self.vaccine)
+        VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=7), pet=second_pet, vaccine=self.vaccine)
+        MedicationRecord.objects.create(
+            valid_until=self.today + timedelta(days=1), pet=first_pet, medication=self.drug)
+
+        # not on a reminder interval
+        VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=3), pet=first_pet, vaccine=self.vaccine)
+
+        # owner prefers separate emails
+        VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=7), pet=single_pet, vaccine=self.vaccine)
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_one_digest_per_owner(self, mock_send_emails):
+        """Test that all reminders of an owner are grouped into a single email."""
+        result = send_expiration_digest_notifications()
+
+        self.assertIn("Processed 1 expiration digest notifications", result)
+
+        messages = mock_send_emails.delay.call_args.args[0]
+        self.assertEqual(len(messages), 1)
+
+        digest = messages[0]
+        self.assertEqual(digest['to_email'], self.digest_owner.email)
+        self.assertEqual(digest['template_name'], 'emails/expiration_digest_notification.html')
+        self.assertEqual(digest['context']['lang'], self.digest_owner.default_language)
+
+        self.assertEqual(
+            [(item['pet_name'], item['time_left']) for item in digest['context']['vaccines']],
+            [('Second', 'in 1 week'), ('First', 'in 4 weeks')],
+        )
+        self.assertEqual(
+            [(item['pet_name'], item['name']) for item in digest['context']['treatments']],
+            [('First', self.drug.name)],
+        )
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_query_count_is_fixed(self, mock_send_emails):
+        """Test that the digest runs a fixed number of queries regardless of owners."""
+        for i in range(5):
+            owner = self.create_owner(f'bulk{i}@example.com', User.REMINDER_DIGEST)
+            pet = self.create_pet(f'Bulk{i}', owner)
+            VaccinationRecord.objects.create(
+                valid_until=self.today + timedelta(days=14), pet=pet, vaccine=self.vaccine)
+
+        # schedule bound, one scan per record type, ledger lookup and claim
+        # (savepoint, insert, release) of the single batch and marking them as sent
+        with self.assertNumQueries(9):
+            result = send_expiration_digest_notifications()
+
+        self.assertIn("Processed 6 expiration digest notifications", result)
+
+    def test_digest_template_renders(self):
+        """Test that the digest template renders all reminders in one email."""
+        EmailService.send_template_email(
+            subject='Digest',
+            to_email=self.digest_owner.email,
+            template_name='emails/expiration_digest_notification.html',
+            context={
+                'vaccines': [{'pet_name': 'First', 'name': 'DigestVaccine',
+                              'expiration_date': self.today, 'time_left': 'in 4 weeks'}],
+                'treatments': [{'pet_name': 'Second', 'name': 'DigestDrug',
+                                'expiration_date': self.today, 'time_left': 'tomorrow'}],
+                'lang': 'en',
+            },
+        )
+
+        self.assertEqual(len(mail.outbox), 1)
+        html = mail.outbox[0].alternatives[0][0]
+        self.assertIn('DigestVaccine', html)
+        self.assertIn('DigestDrug', html)
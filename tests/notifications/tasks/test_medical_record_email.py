@@ -82,7 +82,7 @@ class MedicalRecordEmailTestCase(TestCase):
     def test_send_medical_record_email(self, mock_send_email):
         """Test that medical record email is sent correctly."""
         # Run the task
-        result = send_medical_record_email(self.test_exam, 'bg')
+        result = send_medical_record_email(self.test_exam.pk, 'bg')
 
         # Check that the task processed the medical report
         self.assertIn(f"Processed one medical report for {self.test_pet.name}", result)
@@ -122,7 +122,7 @@ class MedicalRecordEmailTestCase(TestCase):
         """Test running the task manually (for demonstration purposes)."""
         # This test actually runs the task without mocking
         # It's useful for manual testing but might be skipped in automated tests
-        result = send_medical_record_email(self.test_exam, 'bg')
+        result = send_medical_record_email(self.test_exam.pk, 'bg')
         self.assertIn("Processed", result)
 
         # Print the result for manual verification
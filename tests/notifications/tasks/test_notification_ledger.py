@@ -0,0 +1,139 @@
+"""
+Test cases for the notification send ledger.
+
+This module contains tests for skipping the reminders already handed to the
+outbox when a reminder job is re-run after a crash or fired twice.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.notifications.models import NotificationLedger
+from pet_mvp.notifications.reminders import ReminderScan, enqueue_once, prune_ledger
+from pet_mvp.notifications.tasks import send_vaccine_expiration_notifications, \
+    send_expiration_digest_notifications
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+User = get_user_model()
+
+
+class NotificationLedgerTestCase(TestCase):
+    """Test cases for the idempotency of the reminder jobs."""
+
+    def setUp(self):
+        """Set up an owner with three pets, each with a vaccine expiring in a week."""
+        self.today = timezone.now().date()
+
+        self.owner = User.objects.create_owner(
+            email='ledger@example.com',
+            password='testpassword',
+            first_name='Test',
+            last_name='Owner',
+            is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
+        )
+        self.vaccine = Vaccine.objects.create(name='LedgerVaccine', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='LedgerDrug', notes='Test drug')
+
+        self.pets = []
+        for i in range(3):
+            pet = Pet.objects.create(
+                name=f'LedgerPet{i}',
+                species='dog',
+                breed='Mixed',
+                sex='male',
+                date_of_birth=self.today - timedelta(days=365),
+                color='Brown',
+                features='Ledger test pet',
+                current_weight=10.0,
+            )
+            pet.owners.add(self.owner)
+            VaccinationRecord.objects.create(
+                valid_until=self.today + timedelta(days=7), pet=pet, vaccine=self.vaccine)
+            self.pets.append(pet)
+
+    def sent_pet_names(self, mock_send_emails):
+        return [
+            message['context']['pet_name']
+            for call in mock_send_emails.delay.call_args_list
+            for message in call.args[0]
+        ]
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_rerun_after_crash_skips_sent_reminders(self, mock_send_emails):
+        """Test that a job which crashed before closing its reminders does not send them again."""
+        with patch('pet_mvp.notifications.reminders.ReminderScan.mark_sent'):
+            result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 3 vaccine expiration notifications", result)
+        self.assertEqual(NotificationLedger.objects.count(), 3)
+
+        # the reminders are still due, the ledger stops them
+        result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 0 vaccine expiration notifications", result)
+        self.assertEqual(mock_send_emails.delay.call_count, 1)
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_failed_batch_is_given_back(self, mock_send_emails):
+        """Test that a batch which could not be enqueued is left for the re-run, unlike the batches before it."""
+        mock_send_emails.delay.side_effect = [None, RuntimeError('Broker unavailable')]
+        scan = ReminderScan(User.REMINDER_SINGLE)
+
+        def build_message(reminders):
+            return {'context': {'pet_name': reminders[0].record.pet.name}}
+
+        with self.assertRaises(RuntimeError):
+            enqueue_once(
+                ([reminder] for reminder in scan.iter_reminders('vaccination_record', 'vaccine')),
+                build_message,
+                batch_size=1,
+            )
+
+        self.assertEqual(NotificationLedger.objects.count(), 1)
+
+        mock_send_emails.delay.side_effect = None
+        enqueued = enqueue_once(
+            ([reminder] for reminder in scan.iter_reminders('vaccination_record', 'vaccine')),
+            build_message,
+            batch_size=1,
+        )
+
+        self.assertEqual(enqueued, 2)
+        self.assertEqual(
+            sorted(self.sent_pet_names(mock_send_emails)),
+            ['LedgerPet0', 'LedgerPet1', 'LedgerPet1', 'LedgerPet2'],
+        )
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_digest_sends_remaining_reminders_only(self, mock_send_emails):
+        """Test that a digest re-run lists only the reminders which were not sent yet."""
+        self.owner.reminder_delivery = User.REMINDER_DIGEST
+        self.owner.save()
+
+        with patch('pet_mvp.notifications.reminders.ReminderScan.mark_sent'):
+            send_expiration_digest_notifications()
+
+        MedicationRecord.objects.create(
+            valid_until=self.today + timedelta(days=7), pet=self.pets[0], medication=self.drug)
+
+        result = send_expiration_digest_notifications()
+
+        self.assertIn("Processed 1 expiration digest notifications", result)
+        context = mock_send_emails.delay.call_args.args[0][0]['context']
+        self.assertEqual(context['vaccines'], [])
+        self.assertEqual([treatment['name'] for treatment in context['treatments']], ['LedgerDrug'])
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_prune_ledger(self, mock_send_emails):
+        """Test that only the ledger rows of expired records are pruned."""
+        send_vaccine_expiration_notifications()
+
+        self.assertEqual(prune_ledger(self.today + timedelta(days=7)), 0)
+        self.assertEqual(prune_ledger(self.today + timedelta(days=29)), 3)
+        self.assertFalse(NotificationLedger.objects.exists())
@@ -0,0 +1,144 @@
+"""
+Test cases for the precomputed reminder schedule.
+
+This module contains tests for the ReminderSchedule rows maintained on record
+writes and for the catch-up behaviour of the expiration notification tasks.
+"""
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import patch
+
+from pet_mvp.notifications.models import ReminderSchedule
+from pet_mvp.notifications.tasks import send_vaccine_expiration_notifications
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+from pet_mvp.pets.models import Pet
+from pet_mvp.drugs.models import Vaccine, Drug
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class ReminderScheduleTestCase(TestCase):
+    """Test cases for the reminder schedule and the catch-up of missed reminders."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.today = timezone.now().date()
+
+        self.owner = User.objects.create_owner(
+            email='schedule@example.com',
+            password='testpassword',
+            first_name='Test',
+            last_name='Owner',
+            is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
+        )
+
+        self.pet = Pet.objects.create(
+            name='SchedulePet',
+            species='dog',
+            breed='Mixed',
+            sex='male',
+            date_of_birth=self.today - timedelta(days=365),
+            color='Brown',
+            features='Schedule test pet',
+            current_weight=10.0,
+        )
+        self.pet.owners.add(self.owner)
+
+        self.vaccine = Vaccine.objects.create(name='ScheduleVaccine', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='ScheduleDrug', notes='Test drug')
+
+    def fire_dates(self, record, channel=User.REMINDER_SINGLE):
+        return sorted(
+            record.reminders.filter(channel=channel, sent=False).values_list('fire_date', flat=True)
+        )
+
+    def test_schedule_created_on_save(self):
+        """Test that saving a record schedules its upcoming reminders for every channel."""
+        record = VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=20), pet=self.pet, vaccine=self.vaccine)
+
+        # the 4 weeks reminder is already in the past
+        self.assertEqual(
+            self.fire_dates(record),
+            [self.today + timedelta(days=6), self.today + timedelta(days=13), self.today + timedelta(days=19)],
+        )
+        self.assertEqual(record.reminders.filter(channel=User.REMINDER_DIGEST).count(), 3)
+
+        treatment = MedicationRecord.objects.create(
+            valid_until=self.today + timedelta(days=20), pet=self.pet, medication=self.drug)
+
+        self.assertEqual(
+            self.fire_dates(treatment),
+            [self.today + timedelta(days=13), self.today + timedelta(days=19)],
+        )
+
+    def test_schedule_moves_with_valid_until(self):
+        """Test that editing 'valid_until' reschedules the pending reminders only."""
+        record = VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=7), pet=self.pet, vaccine=self.vaccine)
+        record.reminders.filter(offset_days=7).update(sent=True)
+
+        record.valid_until = self.today + timedelta(days=14)
+        record.save()
+
+        # today's reminder was already sent, so the new 2 weeks reminder is not repeated
+        self.assertEqual(
+            self.fire_dates(record),
+            [self.today + timedelta(days=7), self.today + timedelta(days=13)],
+        )
+        self.assertEqual(record.reminders.filter(sent=True).count(), 2)
+
+    def test_partial_save_keeps_schedule(self):
+        """Test that saves not touching 'valid_until' leave the schedule alone."""
+        record = VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=14), pet=self.pet, vaccine=self.vaccine)
+        reminder_pks = set(record.reminders.values_list('pk', flat=True))
+
+        record.is_wrong = True
+        record.save(update_fields=['is_wrong'])
+
+        self.assertEqual(set(record.reminders.values_list('pk', flat=True)), reminder_pks)
+
+    @override_settings(VACCINE_REMINDER_OFFSETS=[3])
+    def test_offsets_are_configurable(self):
+        """Test that the reminder offsets are read from the settings."""
+        record = VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=14), pet=self.pet, vaccine=self.vaccine)
+
+        self.assertEqual(self.fire_dates(record), [self.today + timedelta(days=11)])
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_missed_reminders_are_caught_up_once(self, mock_send_emails):
+        """Test that reminders missed by earlier runs are sent once, with the latest interval."""
+        record = VaccinationRecord.objects.create(
+            valid_until=self.today + timedelta(days=5), pet=self.pet, vaccine=self.vaccine)
+
+        # the job did not run on the 4 weeks and 2 weeks days
+        for days in (28, 14):
+            for channel in (User.REMINDER_SINGLE, User.REMINDER_DIGEST):
+                ReminderSchedule.objects.create(
+                    vaccination_record=record,
+                    fire_date=record.valid_until - timedelta(days=days),
+                    offset_days=days,
+                    channel=channel,
+                )
+
+        result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 1 vaccine expiration notifications", result)
+        messages = mock_send_emails.delay.call_args.args[0]
+        self.assertEqual(messages[0]['context']['time_left'], 'in 2 weeks')
+
+        self.assertFalse(record.reminders.filter(
+            channel=User.REMINDER_SINGLE, fire_date__lte=self.today, sent=False).exists())
+        # the digest channel is closed by its own job
+        self.assertEqual(record.reminders.filter(channel=User.REMINDER_DIGEST, sent=False).count(), 3)
+
+        mock_send_emails.reset_mock()
+        result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 0 vaccine expiration notifications", result)
+        mock_send_emails.delay.assert_not_called()
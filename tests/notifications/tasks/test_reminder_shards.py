@@ -0,0 +1,114 @@
+"""
+Test cases for the sharded daily reminder jobs.
+
+This module contains tests for splitting the expiration notification tasks into
+pet id range shards fanned out as a celery chord and aggregating their results.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pet_mvp.celery import app as celery_app
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.notifications.models import ReminderSchedule
+from pet_mvp.notifications.tasks import send_vaccine_expiration_notifications, collect_reminder_shards, \
+    send_vaccine_expiration_shard
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord
+
+User = get_user_model()
+
+
+class ReminderShardsTestCase(TestCase):
+    """Test cases for the sharded expiration notifications."""
+
+    def setUp(self):
+        """Set up an owner with three pets, each with a vaccine expiring in a week."""
+        self.today = timezone.now().date()
+
+        self.owner = User.objects.create_owner(
+            email='shards@example.com',
+            password='testpassword',
+            first_name='Test',
+            last_name='Owner',
+            is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
+        )
+        self.vaccine = Vaccine.objects.create(name='ShardVaccine', notes='Test vaccine')
+
+        self.pets = []
+        for i in range(3):
+            pet = Pet.objects.create(
+                name=f'ShardPet{i}',
+                species='dog',
+                breed='Mixed',
+                sex='male',
+                date_of_birth=self.today - timedelta(days=365),
+                color='Brown',
+                features='Shard test pet',
+                current_weight=10.0,
+            )
+            pet.owners.add(self.owner)
+            VaccinationRecord.objects.create(
+                valid_until=self.today + timedelta(days=7), pet=pet, vaccine=self.vaccine)
+            self.pets.append(pet)
+
+    def due_reminders(self):
+        return ReminderSchedule.objects.filter(
+            channel=User.REMINDER_SINGLE, fire_date__lte=self.today, sent=False)
+
+    @override_settings(DAILY_JOB_SHARD_SIZE=1)
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_shards_cover_every_pet(self, mock_send_emails):
+        """Test that every pet's reminders are sent when the job is split into one shard per pet."""
+        # run the chord in process
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', always_eager)
+
+        with patch('pet_mvp.notifications.tasks.collect_reminder_shards.run',
+                   wraps=collect_reminder_shards.run) as mock_collect:
+            result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Dispatched 3 reminder shards", result)
+
+        results = mock_collect.call_args.args[0]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(shard["processed"] for shard in results), 3)
+        self.assertFalse(self.due_reminders().exists())
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_shard_is_limited_to_its_pets(self, mock_send_emails):
+        """Test that a shard only sends the reminders of the pets in its id range."""
+        pet = self.pets[1]
+
+        result = send_vaccine_expiration_shard(
+            pet.pk, pet.pk, ReminderSchedule.objects.latest('pk').pk, self.today.isoformat())
+
+        self.assertEqual(result, {"processed": 1, "failures": []})
+        self.assertEqual(mock_send_emails.delay.call_args.args[0][0]['context']['pet_name'], pet.name)
+        self.assertEqual(
+            sorted(set(self.due_reminders().values_list('vaccination_record__pet', flat=True))),
+            [self.pets[0].pk, self.pets[2].pk],
+        )
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_failed_shard_is_reported(self, mock_send_emails):
+        """Test that a failing shard is reported and leaves its reminders for the next run."""
+        mock_send_emails.delay.side_effect = RuntimeError('Broker unavailable')
+        pet = self.pets[0]
+
+        result = send_vaccine_expiration_shard(
+            pet.pk, pet.pk, ReminderSchedule.objects.latest('pk').pk, self.today.isoformat())
+
+        self.assertEqual(result, {"processed": 0, "failures": [[pet.pk, pet.pk, 'Broker unavailable']]})
+        self.assertEqual(self.due_reminders().count(), 3)
+
+        message = collect_reminder_shards(
+            [{"processed": 2, "failures": []}, result], 'vaccine')
+
+        self.assertIn("Processed 2 vaccine expiration notifications", message)
+        self.assertIn(f"pets {pet.pk}-{pet.pk}: Broker unavailable", message)
@@ -26,6 +26,7 @@ class TreatmentNotificationTestCase(TestCase):
             city='Testville',
             country='Testland',
             is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
         )
 
         self.test_pet = Pet.objects.create(
@@ -66,20 +67,46 @@ class TreatmentNotificationTestCase(TestCase):
             medication=self.test_treatment
         )
 
-    @patch('pet_mvp.notifications.email_service.EmailService.send_template_email_async')
-    def test_send_treatment_expiration_notifications(self, mock_send_email):
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_send_treatment_expiration_notifications(self, mock_send_emails):
         """Test that notifications are sent for treatments expiring soon."""
         result = send_treatment_expiration_notifications()
 
         self.assertIn("Processed 2 treatment expiration notifications", result)
-        self.assertEqual(mock_send_email.delay.call_count, 2)
+        self.assertEqual(mock_send_emails.delay.call_count, 1)
 
-        calls = mock_send_email.delay.call_args_list
-        time_left_values = [kwargs['context']['time_left'] for args, kwargs in calls]
+        messages = mock_send_emails.delay.call_args.args[0]
+        time_left_values = [message['context']['time_left'] for message in messages]
 
         self.assertIn("in 1 week", time_left_values)
         self.assertIn("tomorrow", time_left_values)
 
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_emails_are_enqueued_in_batches(self, mock_send_emails):
+        """Test that every full batch is handed to celery as one message."""
+        from pet_mvp.notifications.reminders import enqueue_in_batches
+
+        enqueued = enqueue_in_batches(({'to_email': str(i)} for i in range(5)), batch_size=2)
+
+        self.assertEqual(enqueued, 5)
+        self.assertEqual(
+            [len(call.args[0]) for call in mock_send_emails.delay.call_args_list],
+            [2, 2, 1],
+        )
+
+    def test_time_left_label_of_other_offsets_is_translated(self):
+        """Test that offsets without a fixed label get one translated into the owner's language."""
+        from django.utils import translation
+        from pet_mvp.notifications.reminders import time_left_label
+
+        self.assertEqual(time_left_label(1, 'bg'), 'tomorrow')
+        self.assertEqual(time_left_label(3, 'en'), 'in 3 days')
+        self.assertEqual(time_left_label(21), 'in 21 days')
+
+        with patch('pet_mvp.notifications.reminders.ngettext',
+                   side_effect=lambda singular, plural, count: translation.get_language()):
+            self.assertEqual(time_left_label(3, 'bg'), 'bg')
+
     def test_manual_task_run(self):
         """Manual test run for treatment notifications."""
         result = send_treatment_expiration_notifications()
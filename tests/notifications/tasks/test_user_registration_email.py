@@ -33,7 +33,7 @@ class UserRegistrationEmailTestCase(TestCase):
     def test_send_user_registration_email(self, mock_send_email):
         """Test that user registration email is sent correctly."""
         # Run the task
-        result = send_user_registration_email(self.test_user, 'bg')
+        result = send_user_registration_email(self.test_user.pk, 'bg')
 
         # Check that the task processed the registration
         self.assertIn(f"Sent registration email to {self.test_user.email}", result)
@@ -63,7 +63,7 @@ class UserRegistrationEmailTestCase(TestCase):
         """Test running the task manually (for demonstration purposes)."""
         # This test actually runs the task without mocking
         # It's useful for manual testing but might be skipped in automated tests
-        result = send_user_registration_email(self.test_user, 'bg')
+        result = send_user_registration_email(self.test_user.pk, 'bg')
         self.assertIn("Sent registration email", result)
 
         # Print the result for manual verification
@@ -32,6 +32,7 @@ class VaccineNotificationTestCase(TestCase):
             city='Test City',
             country='Test Country',
             is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
         )
 
         # Create a test pet
@@ -105,8 +106,8 @@ class VaccineNotificationTestCase(TestCase):
             vaccine=self.test_vaccine
         )
 
-    @patch('pet_mvp.notifications.email_service.EmailService.send_template_email_async')
-    def test_send_vaccine_expiration_notifications(self, mock_send_email):
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_send_vaccine_expiration_notifications(self, mock_send_emails):
         """Test that notifications are sent for vaccines expiring at different intervals."""
         # Run the task
         result = send_vaccine_expiration_notifications()
@@ -114,17 +115,13 @@ class VaccineNotificationTestCase(TestCase):
         # Check that the task processed 4 notifications (one for each record)
         self.assertIn("Processed 4 vaccine expiration notifications", result)
 
-        # Check that send_template_email_async was called 4 times (once for each record)
-        self.assertEqual(mock_send_email.delay.call_count, 4)
+        # All 4 emails are enqueued with a single batch
+        self.assertEqual(mock_send_emails.delay.call_count, 1)
+        messages = mock_send_emails.delay.call_args.args[0]
+        self.assertEqual(len(messages), 4)
 
-        # Check the calls to send_template_email_async
-        calls = mock_send_email.delay.call_args_list
-
-        # Extract the time_left values from each call
-        time_left_values = []
-        for call in calls:
-            args, kwargs = call
-            time_left_values.append(kwargs['context']['time_left'])
+        # Extract the time_left values from each message
+        time_left_values = [message['context']['time_left'] for message in messages]
 
         # Check that we have one notification for each time interval
         self.assertIn("in 4 weeks", time_left_values)
@@ -132,6 +129,70 @@ class VaccineNotificationTestCase(TestCase):
         self.assertIn("in 1 week", time_left_values)
         self.assertIn("tomorrow", time_left_values)
 
+        for message in messages:
+            self.assertEqual(message['to_email'], self.test_user.email)
+            self.assertEqual(message['context']['vaccine'], self.test_vaccine.name)
+            self.assertEqual(message['context']['lang'], self.test_user.default_language)
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_query_count_does_not_grow_with_records(self, mock_send_emails):
+        """Test that the scan runs a fixed number of queries regardless of the expiring records."""
+        second_owner = User.objects.create_owner(
+            email='second@example.com',
+            password='testpassword',
+            first_name='Second',
+            last_name='Owner',
+            is_owner=True,
+            reminder_delivery=User.REMINDER_SINGLE,
+        )
+        self.test_pet.owners.add(second_owner)
+
+        for i in range(10):
+            pet = Pet.objects.create(
+                name=f'Pet{i}',
+                species='Dog',
+                breed='Mixed',
+                sex='male',
+                date_of_birth=self.today - timedelta(days=365),
+                color='Brown',
+                features='Bulk',
+                current_weight=10.0,
+            )
+            pet.owners.add(self.test_user)
+            VaccinationRecord.objects.create(
+                valid_until=self.today + timedelta(days=7),
+                pet=pet,
+                vaccine=self.test_vaccine,
+            )
+
+        # pet id range, schedule bound, due reminders scan, ledger lookup and claim
+        # (savepoint, insert, release) of the single batch and marking them as sent
+        with self.assertNumQueries(8):
+            result = send_vaccine_expiration_notifications()
+
+        # 4 records x 2 owners + 10 records x 1 owner
+        self.assertIn("Processed 18 vaccine expiration notifications", result)
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_pet_without_owners_is_skipped(self, mock_send_emails):
+        """Test that records of pets with no owners do not produce emails."""
+        self.test_pet.owners.clear()
+
+        result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 0 vaccine expiration notifications", result)
+        mock_send_emails.delay.assert_not_called()
+
+    @patch('pet_mvp.notifications.email_service.EmailService.send_template_emails_async')
+    def test_digest_owners_are_skipped(self, mock_send_emails):
+        """Test that owners on the daily digest do not get separate emails."""
+        User.objects.filter(pk=self.test_user.pk).update(reminder_delivery=User.REMINDER_DIGEST)
+
+        result = send_vaccine_expiration_notifications()
+
+        self.assertIn("Processed 0 vaccine expiration notifications", result)
+        mock_send_emails.delay.assert_not_called()
+
     def test_run_task_manually(self):
         """Test running the task manually (for demonstration purposes)."""
         # This test actually runs the task without mocking
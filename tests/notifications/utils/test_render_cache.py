@@ -0,0 +1,93 @@
+"""
+Test cases for the rendered email template cache.
+"""
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import patch
+
+from pet_mvp.notifications import render_cache
+from pet_mvp.notifications.email_service import EmailService
+from pet_mvp.notifications.render_cache import LRUCache, fingerprint
+
+
+class LRUCacheTestCase(TestCase):
+    """Test cases for the in-process LRU tier."""
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_fingerprint_ignores_key_order(self):
+        self.assertEqual(fingerprint({'a': 1, 'b': [1, 2]}), fingerprint({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(fingerprint({'a': 1}), fingerprint({'a': 2}))
+
+
+class RenderCacheTestCase(TestCase):
+    """Test cases for caching rendered email templates."""
+
+    template_name = 'emails/expiration_digest_notification.html'
+
+    def setUp(self):
+        render_cache.local_cache.clear()
+        self.context = {
+            'vaccines': [{'pet_name': 'Cached', 'name': 'CacheVaccine',
+                          'expiration_date': timezone.now().date(), 'time_left': 'tomorrow'}],
+            'treatments': [],
+            'lang': 'en',
+        }
+
+    @patch('pet_mvp.notifications.render_cache.render_to_string', wraps=render_cache.render_to_string)
+    def test_equal_context_is_rendered_once(self, mock_render):
+        """Test that the same template, language and context hit the cache."""
+        first = EmailService.render_template(self.template_name, self.context)
+        second = EmailService.render_template(self.template_name, dict(self.context))
+
+        self.assertEqual(first, second)
+        self.assertIn('CacheVaccine', first)
+        self.assertEqual(mock_render.call_count, 1)
+
+    @patch('pet_mvp.notifications.render_cache.render_to_string', wraps=render_cache.render_to_string)
+    def test_language_and_context_are_part_of_the_key(self, mock_render):
+        """Test that a different language or context is rendered again."""
+        EmailService.render_template(self.template_name, self.context)
+        EmailService.render_template(self.template_name, {**self.context, 'lang': 'bg'})
+        EmailService.render_template(self.template_name, {**self.context, 'treatments': [
+            {'pet_name': 'Cached', 'name': 'CacheDrug',
+             'expiration_date': timezone.now().date(), 'time_left': 'tomorrow'}
+        ]})
+
+        self.assertEqual(mock_render.call_count, 3)
+
+    @patch('pet_mvp.notifications.render_cache.strip_tags', wraps=render_cache.strip_tags)
+    def test_plain_text_is_cached(self, mock_strip_tags):
+        """Test that the plain text alternative of the same HTML is computed once."""
+        html = EmailService.render_template(self.template_name, self.context)
+
+        first = EmailService.build_email('Subject', 'owner@example.com', html)
+        second = EmailService.build_email('Subject', 'other@example.com', html)
+
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(mock_strip_tags.call_count, 1)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'email_render': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'render'},
+    })
+    @patch('pet_mvp.notifications.render_cache.render_to_string', wraps=render_cache.render_to_string)
+    def test_shared_tier_is_used_across_processes(self, mock_render):
+        """Test that a render stored in the shared tier is reused when the local tier misses."""
+        EmailService.render_template(self.template_name, self.context)
+
+        # another worker starts with an empty local cache
+        render_cache.local_cache.clear()
+        EmailService.render_template(self.template_name, self.context)
+
+        self.assertEqual(mock_render.call_count, 1)
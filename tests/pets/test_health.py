@@ -0,0 +1,193 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from pet_mvp.access_codes.models import VetPetAccess
+
+from pet_mvp.celery import app as celery_app
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.pets.health import refresh_health_summaries
+from pet_mvp.pets.models import Pet, PetHealthSummary
+from pet_mvp.pets.tasks import reconcile_health_summaries
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord, MedicalExaminationRecord
+
+UserModel = get_user_model()
+
+
+class PetHealthSummaryTest(TestCase):
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pet = self.create_pet('Some Test Dog')
+
+        self.core = Vaccine.objects.create(name='Core Vaccine', suitable_for='dog', notes='Test', core=True)
+        self.rabies = Vaccine.objects.create(name='Rabies', suitable_for='dog', notes='Test', core=True)
+        self.optional = Vaccine.objects.create(name='Optional Vaccine', suitable_for='dog', notes='Test')
+        self.drug = Drug.objects.create(name='Test Drug', suitable_for='dog', notes='Test drug')
+        self.today = datetime.date.today()
+
+    def create_pet(self, name):
+        pet = Pet.objects.create(
+            name=name,
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+        )
+        pet.owners.add(self.owner)
+        return pet
+
+    def days(self, count):
+        return self.today + datetime.timedelta(days=count)
+
+    def vaccinate(self, vaccine, valid_for):
+        with self.captureOnCommitCallbacks(execute=True):
+            return VaccinationRecord.objects.create(pet=self.pet, vaccine=vaccine, valid_until=self.days(valid_for))
+
+    def test_new_pet_gets_a_summary(self):
+        summary = PetHealthSummary.objects.get(pet=self.pet)
+
+        self.assertEqual(summary.valid_vaccines, 0)
+        self.assertIsNone(summary.next_vaccine_due)
+        self.assertEqual(summary.computed_on, self.today)
+
+    def test_record_changes_refresh_the_summary(self):
+        self.vaccinate(self.core, 300)
+        optional = self.vaccinate(self.optional, 30)
+        self.vaccinate(self.rabies, -1)
+        with self.captureOnCommitCallbacks(execute=True):
+            MedicationRecord.objects.create(pet=self.pet, medication=self.drug, valid_until=self.days(10))
+            MedicalExaminationRecord.objects.create(
+                pet=self.pet, clinic=self.clinic, doctor='Dr. Test', reason_for_visit='Checkup',
+                treatment_performed='None', date_of_entry=self.days(-3),
+            )
+
+        summary = PetHealthSummary.objects.get(pet=self.pet)
+        self.assertEqual(summary.valid_vaccines, 2)
+        self.assertEqual(summary.next_vaccine_due, self.days(30))
+        self.assertEqual(summary.next_treatment_due, self.days(10))
+        self.assertEqual(summary.last_exam_date, self.days(-3))
+        # the rabies vaccination expired
+        self.assertEqual(summary.core_vaccines_missing, 1)
+        self.assertFalse(summary.core_vaccines_covered)
+
+        self.vaccinate(self.rabies, 365)
+        with self.captureOnCommitCallbacks(execute=True):
+            optional.delete()
+
+        summary.refresh_from_db()
+        self.assertTrue(summary.core_vaccines_covered)
+        self.assertEqual(summary.next_vaccine_due, self.days(300))
+
+    def test_partial_saves_do_not_refresh(self):
+        record = self.vaccinate(self.core, 300)
+
+        record.is_wrong = True
+        with self.captureOnCommitCallbacks() as callbacks:
+            record.save(update_fields=['is_wrong'])
+
+        self.assertEqual(callbacks, [])
+
+    def test_deleting_a_pet_with_records(self):
+        self.vaccinate(self.core, 300)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pet.delete()
+
+        self.assertFalse(PetHealthSummary.objects.exists())
+
+    def test_refresh_costs_fixed_queries(self):
+        pets = [self.create_pet(f'Dog {i}') for i in range(10)]
+        for pet in pets:
+            VaccinationRecord.objects.create(pet=pet, vaccine=self.core, valid_until=self.days(100))
+
+        # pets, core vaccines, vaccinations, treatments, examinations and the upsert
+        with self.assertNumQueries(6):
+            refresh_health_summaries([pet.pk for pet in pets[:2]])
+        with self.assertNumQueries(6):
+            stored = refresh_health_summaries([pet.pk for pet in pets])
+
+        self.assertEqual(stored, 10)
+        self.assertEqual(PetHealthSummary.objects.filter(valid_vaccines=1).count(), 10)
+
+    def test_nightly_reconcile_applies_expirations(self):
+        record = self.vaccinate(self.core, 300)
+        # moved without signals, like a record expiring overnight
+        VaccinationRecord.objects.filter(pk=record.pk).update(valid_until=self.days(-1))
+
+        self.create_pet('Dog without summary')
+
+        # run the chord in process, one shard per pet
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', always_eager)
+        with self.settings(DAILY_JOB_SHARD_SIZE=1):
+            result = reconcile_health_summaries()
+
+        self.assertEqual(result, 'Dispatched 2 health summary shards')
+        summary = PetHealthSummary.objects.get(pet=self.pet)
+        self.assertEqual(summary.valid_vaccines, 0)
+        self.assertEqual(PetHealthSummary.objects.count(), 2)
+
+    def test_dashboard_reads_one_row_per_pet(self):
+        self.vaccinate(self.core, 30)
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertContains(response, self.days(30).strftime('%d.%m.%Y'))
+        self.assertContains(response, '1 core vaccine missing')
+
+    def test_clinic_dashboard_queries_do_not_grow_with_pets(self):
+        for pet in (self.pet, self.create_pet('Other Test Dog')):
+            VetPetAccess.objects.create(
+                vet=self.clinic, pet=pet, expires_at=timezone.now() + datetime.timedelta(minutes=40), granted_by='code'
+            )
+        self.client.force_login(self.clinic)
+        self.client.get(reverse('clinic-dashboard'))
+
+        with CaptureQueriesContext(connection) as two_pets:
+            response = self.client.get(reverse('clinic-dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            third = self.create_pet('Third Test Dog')
+        VetPetAccess.objects.create(
+            vet=self.clinic, pet=third, expires_at=timezone.now() + datetime.timedelta(minutes=40), granted_by='code'
+        )
+        with CaptureQueriesContext(connection) as three_pets:
+            self.client.get(reverse('clinic-dashboard'))
+
+        self.assertEqual(len(response.context['accessible_pets']), 2)
+        self.assertEqual(len(three_pets), len(two_pets))
+
+    def test_pet_details_skips_empty_record_lists(self):
+        self.vaccinate(self.core, 30)
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse('pet-details', kwargs={'pk': self.pet.pk}))
+
+        self.assertEqual(response.context['health_summary'].valid_vaccines, 1)
+        self.assertEqual(len(response.context['valid_vaccinations']), 1)
+        self.assertEqual(response.context['valid_treatments'].query.is_empty(), True)
+        self.assertEqual(response.context['last_examinations'].query.is_empty(), True)
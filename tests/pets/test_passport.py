@@ -0,0 +1,165 @@
+import datetime
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.pets.models import Pet, PetPassport, Transponder
+from pet_mvp.pets.passport import generate_passport, passport_context, passport_markings, passport_owners, \
+    render_pdf, stored_passport
+from pet_mvp.records.models import VaccinationRecord
+
+UserModel = get_user_model()
+
+
+class PetPassportTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.addCleanup(self.media.cleanup)
+
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.stranger = UserModel.objects.create_owner(
+            email='stranger@test.com',
+            password='1234',
+            first_name='Other',
+            last_name='Owner',
+        )
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+        self.pet.owners.add(self.owner)
+        Transponder.objects.create(pet=self.pet, code='123456789012345', location='Neck')
+
+        self.vaccine = Vaccine.objects.create(name='Passport Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.record = self.vaccinate('LOT-1')
+
+    def vaccinate(self, batch_number):
+        today = datetime.date.today()
+        return VaccinationRecord.objects.create(
+            pet=self.pet, vaccine=self.vaccine, date_of_vaccination=today,
+            valid_until=today + datetime.timedelta(days=365), batch_number=batch_number,
+        )
+
+    def test_html_passport_is_stored_once(self):
+        passport = generate_passport(self.pet.pk, 'html', 'en')
+
+        content = default_storage.open(passport.file.name).read().decode()
+        self.assertIn('Some Test Dog', content)
+        self.assertIn('123456789012345', content)
+        self.assertIn('LOT-1', content)
+        self.assertIn(passport.version, PetPassport.objects.values_list('version', flat=True))
+
+        # up to date, so nothing is rendered again
+        with patch('pet_mvp.pets.passport.render_html') as render_html:
+            self.assertEqual(generate_passport(self.pet.pk, 'html', 'en').file.name, passport.file.name)
+        render_html.assert_not_called()
+
+    def test_changed_record_renders_a_new_version(self):
+        first = generate_passport(self.pet.pk, 'html', 'en')
+
+        self.vaccinate('LOT-2')
+        second = generate_passport(self.pet.pk, 'html', 'en')
+
+        self.assertNotEqual(second.version, first.version)
+        self.assertNotEqual(second.file.name, first.file.name)
+        self.assertEqual(PetPassport.objects.count(), 1)
+        # the replaced file is deleted
+        self.assertFalse(default_storage.exists(first.file.name))
+        self.assertTrue(default_storage.exists(second.file.name))
+
+    def test_unchanged_content_keeps_its_file(self):
+        first = generate_passport(self.pet.pk, 'html', 'en')
+
+        # saved without changes: a new version, rendered to the same content
+        self.record.save()
+        second = generate_passport(self.pet.pk, 'html', 'en')
+
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertTrue(default_storage.exists(second.file.name))
+
+    def test_deleting_the_pet_deletes_its_files(self):
+        html = generate_passport(self.pet.pk, 'html', 'en')
+        pdf = generate_passport(self.pet.pk, 'pdf', 'en')
+
+        self.pet.delete()
+
+        self.assertFalse(PetPassport.objects.exists())
+        self.assertFalse(default_storage.exists(html.file.name))
+        self.assertFalse(default_storage.exists(pdf.file.name))
+
+    def test_pdf_is_reproducible(self):
+        context = passport_context(self.pet, passport_markings(self.pet), passport_owners(self.pet))
+
+        content = render_pdf(context)
+
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertEqual(render_pdf(context), content)
+
+    def test_bulgarian_pdf_embeds_the_unicode_font(self):
+        self.pet.name = 'Шаро'
+        self.pet.save()
+
+        passport = generate_passport(self.pet.pk, 'pdf', 'bg')
+
+        content = default_storage.open(passport.file.name).read()
+        self.assertTrue(content.startswith(b'%PDF'))
+        # the Cyrillic text is set in the bundled TrueType font, the built-in ones have no Cyrillic
+        self.assertIn(b'+DejaVuSans', content)
+
+    def test_view_queues_the_render_then_serves_from_storage(self):
+        self.client.force_login(self.owner)
+        url = reverse('pet-passport', kwargs={'pk': self.pet.pk, 'file_format': 'pdf'})
+
+        with patch('pet_mvp.pets.views.render_pet_passport.delay') as delay:
+            response = self.client.get(url)
+            self.client.get(url)
+
+        self.assertEqual(response.status_code, 202)
+        # polling does not queue the render again
+        delay.assert_called_once_with(self.pet.pk, 'pdf', 'en')
+
+        generate_passport(self.pet.pk, 'pdf', 'en')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_version_lookup_is_cheap(self):
+        generate_passport(self.pet.pk, 'html', 'en')
+
+        # markings, owners, one aggregate per record type and the stored passport
+        with self.assertNumQueries(7):
+            passport, _ = stored_passport(self.pet, 'html', 'en')
+        self.assertIsNotNone(passport)
+
+    def test_access_and_format(self):
+        self.client.force_login(self.stranger)
+        self.assertEqual(
+            self.client.get(reverse('pet-passport', kwargs={'pk': self.pet.pk, 'file_format': 'html'})).status_code,
+            403,
+        )
+        self.assertEqual(
+            self.client.get(reverse('pet-passport', kwargs={'pk': self.pet.pk, 'file_format': 'doc'})).status_code,
+            404,
+        )
@@ -0,0 +1,148 @@
+import os
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from pet_mvp.pets.models import Pet
+from pet_mvp.pets.photos import PHOTO_RENDITIONS, PHOTO_FORMATS, photo_url
+from pet_mvp.pets.tasks import process_pet_photo
+
+UserModel = get_user_model()
+
+
+def jpeg_upload(name='photo.jpg', size=(3000, 2000), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color=color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class PetPhotoRenditionsTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        # the pet photo is moved with the media root imported from the settings module
+        for target in ('pet_mvp.pets.models.MEDIA_ROOT', 'pet_mvp.settings.MEDIA_ROOT'):
+            patcher = patch(target, self.media.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+
+    def create_pet(self, photo):
+        with patch('pet_mvp.pets.tasks.process_pet_photo.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                pet = Pet.objects.create(
+                    name='Photo Dog',
+                    species='dog',
+                    breed='Shepherd',
+                    color='Tan',
+                    date_of_birth='2020-01-01',
+                    sex='male',
+                    current_weight='28',
+                    photo=photo,
+                )
+        pet.owners.add(self.owner)
+        delay.assert_called_with(pet.pk)
+        return pet
+
+    def test_upload_is_processed_in_the_background(self):
+        pet = self.create_pet(jpeg_upload())
+
+        # the request only queues the task, the upload is kept as it is
+        self.assertEqual(pet.photo_renditions, {})
+        with Image.open(pet.photo.path) as original:
+            self.assertEqual(original.size, (3000, 2000))
+
+        process_pet_photo(pet.pk)
+
+        pet.refresh_from_db()
+        for rendition, size in PHOTO_RENDITIONS.items():
+            self.assertEqual(pet.photo_renditions[rendition]['width'], size)
+            for file_format in PHOTO_FORMATS:
+                with default_storage.open(pet.photo_renditions[rendition][file_format]) as file:
+                    with Image.open(file) as image:
+                        self.assertEqual(image.format, file_format.upper())
+                        self.assertEqual(image.size, (size, size * 2 // 3))
+
+    def test_new_upload_replaces_the_renditions(self):
+        pet = self.create_pet(jpeg_upload())
+        process_pet_photo(pet.pk)
+        pet.refresh_from_db()
+        old_thumbnail = pet.photo_renditions['thumbnail']['webp']
+
+        # the same upload is not processed again
+        self.assertIn('up to date', str(process_pet_photo(pet.pk)))
+
+        pet.photo = jpeg_upload(color='blue')
+        with patch('pet_mvp.pets.tasks.process_pet_photo.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                pet.save()
+        delay.assert_called_once_with(pet.pk)
+        process_pet_photo(pet.pk)
+
+        pet.refresh_from_db()
+        self.assertNotEqual(pet.photo_renditions['thumbnail']['webp'], old_thumbnail)
+        self.assertFalse(default_storage.exists(old_thumbnail))
+
+    def test_saves_keeping_the_photo_are_not_processed(self):
+        pet = self.create_pet(jpeg_upload())
+
+        with patch('pet_mvp.pets.tasks.process_pet_photo.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                pet.name = 'Renamed Dog'
+                pet.save()
+                Pet.objects.get(pk=pet.pk).save()
+                pet.save(update_fields=['color'])
+        delay.assert_not_called()
+
+        with patch('pet_mvp.pets.tasks.process_pet_photo.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                pet.save(update_fields=['photo'])
+        delay.assert_called_once_with(pet.pk)
+
+    def test_broken_upload_keeps_the_original(self):
+        pet = self.create_pet(SimpleUploadedFile('photo.jpg', b'not an image', content_type='image/jpeg'))
+
+        self.assertIn('Could not process', str(process_pet_photo(pet.pk)))
+
+        pet.refresh_from_db()
+        self.assertEqual(pet.photo_renditions, {})
+        self.assertEqual(photo_url(pet, 'thumbnail'), pet.photo.url)
+
+    def test_dashboard_uses_the_thumbnail_srcset(self):
+        pet = self.create_pet(jpeg_upload())
+        process_pet_photo(pet.pk)
+        pet.refresh_from_db()
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse('dashboard'))
+
+        thumbnail = default_storage.url(pet.photo_renditions['thumbnail']['webp'])
+        self.assertContains(response, f'{thumbnail} 128w')
+        self.assertContains(response, 'sizes="48px"')
+        self.assertNotContains(response, pet.photo.url)
+
+    def test_deleting_the_pet_deletes_the_renditions(self):
+        pet = self.create_pet(jpeg_upload())
+        process_pet_photo(pet.pk)
+        pet.refresh_from_db()
+        names = [pet.photo_renditions[rendition]['jpeg'] for rendition in PHOTO_RENDITIONS]
+
+        pet.delete()
+
+        self.assertFalse(any(os.path.exists(os.path.join(self.media.name, name)) for name in names))
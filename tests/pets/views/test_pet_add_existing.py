@@ -54,11 +54,14 @@ class AddExistingPetTests(TestCase):
         url = reverse('pet-add-existing')
         data = {'passport_number': 'BG01VP112233'}
 
-        response = self.client_pending.post(url, data)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_pending.post(url, data)
 
         self.assertRedirects(response, reverse('dashboard'))
         self.assertIn(self.pending_owner, self.pet.pending_owners.all())
-        mock_send_request.assert_called_once()
+        mock_send_request.delay.assert_called_once()
+        self.assertEqual(mock_send_request.delay.call_args.kwargs['pet_id'], self.pet.pk)
+        self.assertEqual(mock_send_request.delay.call_args.kwargs['new_owner_id'], self.pending_owner.pk)
 
     def test_add_existing_pet_invalid_passport(self):
         self.client_pending.force_login(self.pending_owner)
@@ -0,0 +1,57 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord
+
+UserModel = get_user_model()
+
+
+class RecordImportAdminTest(TestCase):
+    def setUp(self):
+        self.admin = UserModel.objects.create_superuser(
+            email='admin@test.com', password='1234', first_name='Test', last_name='Admin')
+        self.pet = Pet.objects.create(
+            name='Import Dog', species='dog', breed='Mixed', color='Tan', date_of_birth='2020-01-01',
+            sex='male', current_weight='20', passport_number='BG01VP000001',
+        )
+        Vaccine.objects.create(name='Test Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:records_vaccinationrecord_import')
+
+    def upload(self, content):
+        return self.client.post(self.url, {'file': SimpleUploadedFile('vaccines.csv', content.encode())})
+
+    def test_changelist_links_to_import(self):
+        response = self.client.get(reverse('admin:records_vaccinationrecord_changelist'))
+
+        self.assertContains(response, self.url)
+
+    def test_valid_export_redirects_to_changelist(self):
+        valid_until = datetime.date.today() + datetime.timedelta(days=100)
+
+        response = self.upload(
+            'passport_number,vaccine,date_of_vaccination,valid_until\n'
+            f'BG01VP000001,Test Vaccine,2024-01-01,{valid_until}\n'
+        )
+
+        self.assertRedirects(response, reverse('admin:records_vaccinationrecord_changelist'))
+        self.assertEqual(VaccinationRecord.objects.get().pet, self.pet)
+
+    def test_failed_rows_are_returned_as_report(self):
+        response = self.upload(
+            'passport_number,vaccine,date_of_vaccination,valid_until\n'
+            'BG01VP000001,Test Vaccine,2024-01-01,2025-01-01\n'
+            'BG01VP000001,Missing Vaccine,2024-01-01,2025-01-01\n'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        report = b''.join(response.streaming_content).decode()
+        self.assertIn('3,vaccine,"Unknown vaccine ""Missing Vaccine"""', report)
+        self.assertEqual(VaccinationRecord.objects.count(), 1)
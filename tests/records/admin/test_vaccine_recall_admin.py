@@ -0,0 +1,60 @@
+import datetime
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import VaccinationRecord
+
+UserModel = get_user_model()
+
+
+class VaccineRecallAdminTest(TestCase):
+    def setUp(self):
+        self.admin = UserModel.objects.create_superuser(
+            email='admin@test.com', password='1234', first_name='Test', last_name='Admin')
+        owner = UserModel.objects.create_owner(
+            email='owner@test.com', password='1234', first_name='Test', last_name='Owner')
+        vaccine = Vaccine.objects.create(name='Test Vaccine', suitable_for='dog', notes='Test vaccine')
+        today = datetime.date.today()
+
+        self.records = []
+        for i, batch_number in enumerate(['LOT-1', 'lot-1', 'LOT-2']):
+            pet = Pet.objects.create(
+                name=f'Recall Dog {i}', species='dog', breed='Mixed', color='Tan', date_of_birth='2020-01-01',
+                sex='male', current_weight='20', passport_number=f'BG01VP{i:06d}',
+            )
+            pet.owners.add(owner)
+            self.records.append(VaccinationRecord.objects.create(
+                pet=pet, vaccine=vaccine, date_of_vaccination=today,
+                valid_until=today + datetime.timedelta(days=365), batch_number=batch_number, manufacturer='Vetco',
+            ))
+
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:records_vaccinationrecord_changelist')
+
+    def run_action(self, action, records):
+        return self.client.post(self.url, {
+            'action': action,
+            '_selected_action': [record.pk for record in records],
+        })
+
+    def test_report_covers_the_whole_lot(self):
+        response = self.run_action('download_recall_report', self.records[:1])
+
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        # the header and both records of the lot, whatever the case of the batch number
+        self.assertEqual(len(lines), 3)
+
+    def test_notify_queues_one_job_for_the_selected_lots(self):
+        with patch('pet_mvp.records.admin.send_vaccine_recall_notifications.delay') as delay:
+            response = self.run_action('notify_recall_owners', [self.records[0], self.records[2]])
+
+        self.assertRedirects(response, self.url)
+        delay.assert_called_once()
+        self.assertEqual(
+            sorted(batch_number for batch_number, _ in delay.call_args.args[0]), ['LOT-1', 'LOT-2'])
@@ -0,0 +1,34 @@
+"""
+Test cases for the form construction benchmark.
+
+This module contains tests for the benchmark_forms management command.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class BenchmarkFormsTestCase(TestCase):
+    """Test cases for the benchmark_forms command."""
+
+    def setUp(self):
+        handle, self.output = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, self.output)
+
+    def test_benchmark_writes_results(self):
+        """Test that each form class is measured and written as JSON."""
+        call_command(
+            'benchmark_forms', '--iterations', '3', '--repeat', '2', '--output', self.output, stdout=StringIO()
+        )
+
+        with open(self.output) as output:
+            results = json.load(output)
+
+        self.assertEqual(results['benchmark'], 'forms')
+        self.assertIn('FecalTestForm', [run['form'] for run in results['runs']])
+        self.assertTrue(all(run['microseconds_per_form'] > 0 for run in results['runs']))
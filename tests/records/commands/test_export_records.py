@@ -0,0 +1,71 @@
+"""
+Test cases for the streaming record export.
+
+This module contains tests for the export_records management command.
+"""
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord
+
+UserModel = get_user_model()
+
+
+class ExportRecordsTestCase(TestCase):
+    """Test cases for the export_records command."""
+
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com', password='1234', first_name='Test', last_name='Owner')
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com', password='1234', name='Test Clinic', address='123 Some Address',
+            is_owner=False, phone_number='0887142536', city='Varna', country='Bulgaria',
+        )
+        pet = Pet.objects.create(
+            name='Some Test Dog', species='dog', breed='Shepherd', color='Tan', date_of_birth='2020-01-01',
+            sex='male', current_weight='28',
+        )
+        pet.owners.add(self.owner)
+        for _ in range(3):
+            MedicalExaminationRecord.objects.create(
+                pet=pet, clinic=self.clinic, doctor='Dr. Test', reason_for_visit='Checkup',
+                treatment_performed='None',
+            )
+
+    def test_clinic_export_is_written_to_file(self):
+        """Test that the examinations of a clinic are written as CSV in small chunks."""
+        handle, output = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.addCleanup(os.remove, output)
+
+        call_command(
+            'export_records', '--clinic', 'test-clinic@test.com', '--chunk-size', '2', '--output', output,
+            stderr=StringIO(),
+        )
+
+        with open(output, newline='') as export:
+            rows = list(csv.DictReader(export))
+        self.assertEqual([row['doctor'] for row in rows], ['Dr. Test'] * 3)
+
+    def test_owner_export_is_written_to_stdout(self):
+        """Test that the records of an owner's pets are written as NDJSON to stdout."""
+        stdout = StringIO()
+
+        call_command('export_records', '--owner', 'owner@test.com', '--format', 'ndjson', stdout=stdout)
+
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([row['type'] for row in rows], ['examination'] * 3)
+
+    def test_clinic_scope_requires_a_clinic(self):
+        """Test that an owner cannot be exported as a clinic."""
+        with self.assertRaises(CommandError):
+            call_command('export_records', '--clinic', 'owner@test.com', stdout=StringIO())
@@ -0,0 +1,146 @@
+"""
+Test cases for the bulk import of historical records.
+
+This module contains tests for the import_records management command and the
+streaming readers it is built on.
+"""
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.notifications.models import ReminderSchedule
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.imports import read_json, import_records
+from pet_mvp.records.models import VaccinationRecord, MedicationRecord
+
+
+class ImportRecordsTestCase(TestCase):
+    """Test cases for the import_records command."""
+
+    def setUp(self):
+        self.dog = Pet.objects.create(
+            name='Import Dog', species='dog', breed='Mixed', color='Tan', date_of_birth='2020-01-01',
+            sex='male', current_weight='20', passport_number='BG01VP000001',
+        )
+        self.cat = Pet.objects.create(
+            name='Import Cat', species='cat', breed='Mixed', color='Grey', date_of_birth='2020-01-01',
+            sex='female', current_weight='4', passport_number='BG01VP000002',
+        )
+        self.rabies = Vaccine.objects.create(name='Rabies Dog', suitable_for='dog', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Dog Drug', suitable_for='dog', notes='Test drug')
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.errors = os.path.join(self.directory.name, 'errors.csv')
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', newline='') as export:
+            export.write(content)
+        return path
+
+    def call(self, path, *args):
+        stdout = StringIO()
+        call_command('import_records', path, *args, '--errors', self.errors, stdout=stdout)
+        return stdout.getvalue()
+
+    def error_report(self):
+        with open(self.errors) as report:
+            return report.read().splitlines()
+
+    def test_csv_rows_are_imported_and_failures_reported(self):
+        """Test that valid rows are imported in batches and each invalid row lands in the report."""
+        valid_until = datetime.date.today() + datetime.timedelta(days=200)
+        path = self.write('vaccines.csv', (
+            'passport_number,vaccine,date_of_vaccination,valid_until,batch_number\n'
+            f'BG01VP000001,rabies dog,2024-05-01,{valid_until},A1\n'
+            f'BG01VP000001,{self.rabies.pk},2023-05-01,2024-05-01,A0\n'
+            'BG01VP000002,Rabies Dog,2024-05-01,2025-05-01,B1\n'
+            'BG01VP999999,Unknown,,not-a-date,C1\n'
+            f'BG01VP000001,Rabies Dog,2022-05-01,2023-05-01,A\n'
+        ))
+
+        output = self.call(path, '--type', 'vaccination', '--batch-size', '2')
+
+        self.assertIn('Imported 3 records', output)
+        self.assertIn('2 rows failed', output)
+        records = VaccinationRecord.objects.filter(pet=self.dog).order_by('date_of_vaccination')
+        self.assertEqual([record.batch_number for record in records], ['A', 'A0', 'A1'])
+        # rabies vaccines are valid 21 days after the vaccination
+        self.assertEqual(records[2].valid_from, datetime.date(2024, 5, 22))
+        # bulk_create skips the signal, the import schedules the reminders itself
+        self.assertTrue(ReminderSchedule.objects.filter(vaccination_record=records[2]).exists())
+        self.assertFalse(ReminderSchedule.objects.filter(vaccination_record=records[0]).exists())
+
+        report = self.error_report()
+        self.assertEqual(report[0], 'row,column,error')
+        self.assertIn('4,vaccine,"""Rabies Dog"" is not suitable for a cat"', report)
+        self.assertEqual({line.split(',')[:2][1] for line in report if line.startswith('5,')}, {
+            'date_of_vaccination', 'valid_until', 'passport_number', 'vaccine',
+        })
+
+    def test_json_array_is_imported(self):
+        """Test that a JSON array export is streamed item by item."""
+        path = self.write('treatments.json', json.dumps([
+            {'passport_number': 'BG01VP000001', 'medication': 'Dog Drug', 'date': '2024-01-10',
+             'valid_until': '2024-02-10', 'dosage': '1 tablet'},
+            {'passport_number': 'BG01VP000001', 'medication': 'Dog Drug', 'date': 20240110,
+             'valid_until': '2024-02-10'},
+            'not a record',
+        ], indent=2))
+
+        output = self.call(path, '--type', 'medication')
+
+        self.assertIn('Imported 1 records', output)
+        self.assertEqual(MedicationRecord.objects.get().dosage, '1 tablet')
+        self.assertEqual([line.split(',')[:2] for line in self.error_report()[1:]], [['2', 'date'], ['3', '']])
+
+    def test_query_count_per_chunk_does_not_grow_with_rows(self):
+        """Test that a chunk costs the same queries however many rows it has."""
+        valid_until = datetime.date.today() + datetime.timedelta(days=30)
+
+        def export(count):
+            return StringIO('passport_number,medication,date,valid_until\n' + ''.join(
+                f'BG01VP000001,Dog Drug,2024-01-{day % 28 + 1:02d},{valid_until}\n' for day in range(count)
+            ))
+
+        # the catalog, then per chunk the pets, the savepoint, the records, the reminder schedule
+        # and the health summaries of the pets
+        with self.assertNumQueries(13):
+            import_records(export(3), 'medication')
+        with self.assertNumQueries(13):
+            result = import_records(export(20), 'medication')
+
+        self.assertEqual(result.created, 20)
+
+    def test_read_json_decodes_items_split_across_reads(self):
+        """Test that the JSON reader joins items split across reads."""
+        items = [{'id': i, 'note': 'x' * i} for i in range(20)]
+
+        self.assertEqual(
+            [item for _, item in read_json(StringIO(json.dumps(items)), read_size=7)],
+            items,
+        )
+
+    def test_read_json_stops_at_a_malformed_item(self):
+        """Test that a malformed item fails at once instead of the rest of the file being read."""
+        items = ',\n'.join(json.dumps({'id': i, 'note': 'x' * 20}) for i in range(100))
+        stream = StringIO('[{"id": 0,, "note": "broken"},\n' + items + ']')
+
+        with self.assertRaisesMessage(ValueError, 'Invalid record 1 of the JSON file'):
+            list(read_json(stream, read_size=64))
+        self.assertEqual(stream.tell(), 64)
+
+    def test_malformed_export_raises_command_error(self):
+        """Test that a file which is not a JSON array stops the import."""
+        path = self.write('broken.json', '{"passport_number": "BG01VP000001"}')
+
+        with self.assertRaises(CommandError):
+            self.call(path, '--type', 'vaccination')
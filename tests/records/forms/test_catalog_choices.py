@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from pet_mvp.drugs.catalog import clear_catalog, bump_catalog_version
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.forms import VaccineFormSet, VaccinationRecordAddForm
+from pet_mvp.records.models import VaccinationRecord
+
+UserModel = get_user_model()
+
+
+class CatalogChoicesTest(TestCase):
+    def setUp(self):
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+
+        self.vaccine = Vaccine.objects.create(name='Dog Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.cat_vaccine = Vaccine.objects.create(name='Cat Vaccine', suitable_for='cat', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Dog Drug', suitable_for='dog', notes='Test drug')
+
+        # rolled back rows of other tests do not fire post_delete
+        clear_catalog()
+        self.addCleanup(clear_catalog)
+
+    def catalog_queries(self, queries):
+        return [
+            query['sql'] for query in queries
+            if any(table in query['sql'] for table in ('drugs_vaccine', 'drugs_drug', 'drugs_catalogversion'))
+        ]
+
+    def test_warm_exam_page_runs_no_catalog_queries(self):
+        self.client.force_login(self.clinic)
+        url = f"{reverse('exam-add')}?id={self.pet.pk}"
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.catalog_queries(queries), [])
+        # the options are built by the page from the JSON catalog
+        self.assertNotContains(response, 'Dog Vaccine')
+        self.assertContains(response, response.context['catalog_url'])
+
+    def test_formset_forms_share_one_choice_list(self):
+        data = {
+            'vaccines-TOTAL_FORMS': '3',
+            'vaccines-INITIAL_FORMS': '0',
+            'vaccines-MIN_NUM_FORMS': '0',
+            'vaccines-MAX_NUM_FORMS': '1000',
+        }
+        formset = VaccineFormSet(data, prefix='vaccines', queryset=VaccinationRecord.objects.none(), pet=self.pet)
+
+        with CaptureQueriesContext(connection) as queries:
+            catalogs = [form.catalog for form in formset.forms] + [formset.empty_form.catalog]
+            [str(form['vaccine']) for form in formset.forms]
+
+        # one comparison to the shared version and one read of the vaccines
+        self.assertEqual(len(self.catalog_queries(queries)), 2)
+        self.assertTrue(all(catalog is catalogs[0] for catalog in catalogs))
+        self.assertEqual([entry.name for entry in catalogs[0]], ['Dog Vaccine'])
+
+    def test_catalog_changes_drop_the_cache(self):
+        VaccinationRecordAddForm(pet=self.pet)
+
+        new_vaccine = Vaccine.objects.create(name='New Dog Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.assertEqual(
+            [entry.pk for entry in VaccinationRecordAddForm(pet=self.pet).catalog],
+            [self.vaccine.pk, new_vaccine.pk],
+        )
+
+        self.vaccine.delete()
+        self.assertEqual([entry.pk for entry in VaccinationRecordAddForm(pet=self.pet).catalog], [new_vaccine.pk])
+
+    @override_settings(RECORD_CATALOG_SYNC_INTERVAL=0)
+    def test_changes_made_by_another_process_drop_the_cache(self):
+        VaccinationRecordAddForm(pet=self.pet)
+
+        # a queryset update sends no signal, as if another worker had changed the catalog
+        Vaccine.objects.filter(pk=self.vaccine.pk).update(name='Renamed Dog Vaccine')
+        self.assertEqual([entry.name for entry in VaccinationRecordAddForm(pet=self.pet).catalog], ['Dog Vaccine'])
+
+        bump_catalog_version()
+        self.assertEqual(
+            [entry.name for entry in VaccinationRecordAddForm(pet=self.pet).catalog],
+            ['Renamed Dog Vaccine'],
+        )
+
+    def test_choice_is_validated_against_the_species(self):
+        form = VaccinationRecordAddForm(pet=self.pet, data={
+            'vaccine': self.cat_vaccine.pk,
+            'valid_until': '2030-01-01',
+        })
+
+        self.assertFalse(form.is_valid())
+        self.assertIn('vaccine', form.errors)
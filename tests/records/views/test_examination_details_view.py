@@ -0,0 +1,108 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine, Drug, BloodTest
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
+from pet_mvp.records.reports import load_exam_report
+
+UserModel = get_user_model()
+
+
+class ExaminationDetailsViewTest(TestCase):
+    def setUp(self):
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+
+        self.owners = []
+        for i in range(2):
+            owner = UserModel.objects.create_owner(
+                email=f'owner{i}@test.com',
+                password='1234',
+                first_name=f'Owner{i}',
+                last_name='Test',
+            )
+            self.pet.owners.add(owner)
+            self.owners.append(owner)
+
+        self.exam = MedicalExaminationRecord.objects.create(
+            doctor='Dr. Test',
+            clinic=self.clinic,
+            pet=self.pet,
+            reason_for_visit='Annual checkup',
+            treatment_performed='General examination',
+            blood_test=BloodTest.objects.create(result='Normal'),
+        )
+
+    def add_records(self, count):
+        today = datetime.date.today()
+        start = Vaccine.objects.count()
+        for i in range(start, start + count):
+            vaccine = Vaccine.objects.create(name=f'Vaccine {i}', suitable_for='dog', notes='Test vaccine')
+            drug = Drug.objects.create(name=f'Drug {i}', suitable_for='dog', notes='Test drug')
+            self.exam.vaccinations.add(VaccinationRecord.objects.create(
+                pet=self.pet, vaccine=vaccine, valid_until=today + datetime.timedelta(days=365)))
+            self.exam.medications.add(MedicationRecord.objects.create(
+                pet=self.pet, medication=drug, valid_until=today + datetime.timedelta(days=30)))
+
+    def test_report_is_loaded_in_fixed_number_of_queries(self):
+        """Test that the report costs the same queries regardless of how many records the exam has"""
+        self.add_records(1)
+        # exam with pet, clinic and lab tests, owners, vaccinations, medications
+        with self.assertNumQueries(4):
+            report = load_exam_report(self.exam.pk)
+            [(record.vaccine.name, record.pk) for record in report.vaccinations]
+            [(record.medication.name, record.pk) for record in report.medications]
+
+        self.add_records(5)
+        with self.assertNumQueries(4):
+            report = load_exam_report(self.exam.pk)
+            [(record.vaccine.name, record.pk) for record in report.vaccinations]
+            [(record.medication.name, record.pk) for record in report.medications]
+
+        self.assertEqual(len(report.vaccinations), 6)
+        self.assertEqual(len(report.medications), 6)
+        self.assertEqual({owner.email for owner in report.owners}, {'owner0@test.com', 'owner1@test.com'})
+        self.assertEqual(report.clinic.name, 'Test Clinic')
+        self.assertEqual(report.blood_test.result, 'Normal')
+
+    def test_details_page_shows_report(self):
+        self.add_records(2)
+        self.client.force_login(self.clinic)
+
+        response = self.client.get(reverse('exam-details', kwargs={'pk': self.exam.pk}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Test Clinic, 123 Some Address, Varna')
+        self.assertContains(response, 'Vaccine 1')
+        self.assertContains(response, 'Drug 1')
+        self.assertEqual(response.context['report'].exam, self.exam)
+
+    def test_missing_exam_returns_404(self):
+        self.client.force_login(self.clinic)
+
+        response = self.client.get(reverse('exam-details', kwargs={'pk': self.exam.pk + 1}))
+
+        self.assertEqual(response.status_code, 404)
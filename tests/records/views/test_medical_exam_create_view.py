@@ -4,9 +4,12 @@ from django.contrib.auth import get_user_model
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.test import TestCase, RequestFactory
 from django.urls import reverse
+from unittest.mock import patch
 
 from pet_mvp.access_codes.utils import generate_access_code
+from pet_mvp.drugs.catalog import clear_catalog
 from pet_mvp.drugs.models import Vaccine, Drug, UrineTest
+from pet_mvp.notifications.models import ReminderSchedule
 from pet_mvp.pets.models import Pet
 from pet_mvp.records.forms import MedicalExaminationRecordForm, UrineTestForm
 from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
@@ -129,6 +132,47 @@ class MedicalExaminationReportCreateViewTest(TestCase):
         self.assertEqual(record.doctor, 'Dr. Test')
         self.assertEqual(record.exam_type, 'primary')
 
+    @patch('pet_mvp.records.views.send_medical_record_email')
+    def test_report_email_queued_on_commit(self, mock_send_email):
+        """Test that the report email is handed to celery with the exam id once the exam is saved"""
+        url = reverse('exam-add')
+        post_data = {
+            'id': self.pet.id,
+            'exam_type': 'primary',
+            'date_of_entry': datetime.date.today().strftime('%Y-%m-%d'),
+            'doctor': 'Dr. Test',
+            'reason_for_visit': 'Annual checkup',
+            'treatment_performed': 'General examination',
+            'vaccines-TOTAL_FORMS': '0',
+            'vaccines-INITIAL_FORMS': '0',
+            'vaccines-MIN_NUM_FORMS': '0',
+            'vaccines-MAX_NUM_FORMS': '1000',
+            'treatments-TOTAL_FORMS': '0',
+            'treatments-INITIAL_FORMS': '0',
+            'treatments-MIN_NUM_FORMS': '0',
+            'treatments-MAX_NUM_FORMS': '1000',
+        }
+
+        request = self.factory.post(f"{url}", data=post_data)
+        request = self.setup_request(request)
+
+        view = MedicalExaminationReportCreateView()
+        view.request = request
+        view.kwargs = {}
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            view.form_valid(MedicalExaminationRecordForm(post_data))
+
+        # nothing is sent from the request itself
+        mock_send_email.assert_not_called()
+        mock_send_email.delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        record = MedicalExaminationRecord.objects.get()
+        mock_send_email.delay.assert_called_once_with(record.pk, 'en')
+
     def test_form_valid_with_vaccines(self):
         url = reverse('exam-add')
         post_data = {
@@ -372,4 +416,86 @@ class MedicalExaminationReportCreateViewTest(TestCase):
         response = MedicalExaminationReportCreateView.as_view()(request)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Vaccine information contains errors.")
-        self.assertEqual(MedicalExaminationRecord.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(MedicalExaminationRecord.objects.count(), 0)
+
+    def exam_post_data(self, count):
+        today = datetime.date.today()
+        post_data = {
+            'id': self.pet.id,
+            'exam_type': 'primary',
+            'date_of_entry': today.strftime('%Y-%m-%d'),
+            'doctor': 'Dr. Test',
+            'reason_for_visit': 'Annual checkup',
+            'treatment_performed': 'General examination',
+            'vaccines-TOTAL_FORMS': str(count),
+            'vaccines-INITIAL_FORMS': '0',
+            'vaccines-MIN_NUM_FORMS': '0',
+            'vaccines-MAX_NUM_FORMS': '1000',
+            'treatments-TOTAL_FORMS': str(count),
+            'treatments-INITIAL_FORMS': '0',
+            'treatments-MIN_NUM_FORMS': '0',
+            'treatments-MAX_NUM_FORMS': '1000',
+            'has_blood_test': 'True',
+            'date_conducted': today.strftime('%Y-%m-%d'),
+            'result': 'Normal',
+        }
+        for i in range(count):
+            post_data.update({
+                f'vaccines-{i}-vaccine': self.vaccine.id,
+                f'vaccines-{i}-batch_number': f'BATCH{i}',
+                f'vaccines-{i}-date_of_vaccination': today.strftime('%Y-%m-%d'),
+                f'vaccines-{i}-valid_from': today.strftime('%Y-%m-%d'),
+                f'vaccines-{i}-valid_until': (today + datetime.timedelta(days=365)).strftime('%Y-%m-%d'),
+                f'treatments-{i}-medication': self.drug.id,
+                f'treatments-{i}-date': today.strftime('%Y-%m-%d'),
+                f'treatments-{i}-valid_until': (today + datetime.timedelta(days=30)).strftime('%Y-%m-%d'),
+            })
+        return post_data
+
+    def save_exam(self, post_data):
+        request = self.setup_request(self.factory.post(reverse('exam-add'), data=post_data))
+        view = MedicalExaminationReportCreateView()
+        view.request = request
+        view.kwargs = {}
+        form = MedicalExaminationRecordForm(post_data)
+        self.assertTrue(form.is_valid())
+        # the count does not depend on the catalog cached by earlier tests
+        clear_catalog()
+
+        # pet, catalog version, the vaccine and drug catalogs and the chosen items of both formsets,
+        # then in a savepoint the blood test, exam, vaccinations, treatments, both links
+        # and the rebuilt reminder schedules
+        with self.assertNumQueries(18) as queries:
+            response = view.form_valid(form)
+
+        self.assertEqual(response.status_code, 302)
+        return [query['sql'] for query in queries]
+
+    def test_records_are_saved_in_fixed_number_of_statements(self):
+        """Test that the exam runs the same statements whether it has one or several records"""
+        single = self.save_exam(self.exam_post_data(1))
+        several = self.save_exam(self.exam_post_data(3))
+
+        # blood test, exam, vaccinations, treatments, both links and both reminder schedules
+        self.assertEqual(len([sql for sql in single if sql.startswith('INSERT')]), 8)
+        self.assertEqual(len([sql for sql in several if sql.startswith('INSERT')]), 8)
+
+        record = MedicalExaminationRecord.objects.latest('pk')
+        self.assertEqual(record.vaccinations.count(), 3)
+        self.assertEqual(record.medications.count(), 3)
+        self.assertEqual(record.blood_test.result, 'Normal')
+        self.assertEqual(
+            ReminderSchedule.objects.filter(vaccination_record__in=record.vaccinations.all()).values(
+                'vaccination_record').distinct().count(),
+            3,
+        )
+
+    def test_rabies_validity_is_shifted(self):
+        self.vaccine.name = 'Rabies'
+        self.vaccine.save()
+
+        self.save_exam(self.exam_post_data(2))
+
+        # 21 days set by the form and the week added on saving
+        for record in VaccinationRecord.objects.all():
+            self.assertEqual(record.valid_from, datetime.date.today() + datetime.timedelta(days=28))
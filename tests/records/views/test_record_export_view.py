@@ -0,0 +1,137 @@
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+
+class RecordExportViewTest(TestCase):
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+        self.pet.owners.add(self.owner)
+        self.other_pet = Pet.objects.create(
+            name='Other Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Black',
+            date_of_birth='2020-01-01',
+            sex='female',
+            current_weight='25',
+        )
+
+        self.vaccine = Vaccine.objects.create(name='Test Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Test Drug', suitable_for='dog', notes='Test drug')
+
+    def add_history(self, count):
+        today = datetime.date.today()
+        for i in range(count):
+            for pet in (self.pet, self.other_pet):
+                VaccinationRecord.objects.create(
+                    pet=pet, vaccine=self.vaccine, date_of_vaccination=today - datetime.timedelta(days=i),
+                    valid_until=today)
+                MedicationRecord.objects.create(pet=pet, medication=self.drug, valid_until=today)
+                MedicalExaminationRecord.objects.create(
+                    pet=pet,
+                    clinic=self.clinic,
+                    doctor='Dr. Test',
+                    reason_for_visit='Checkup',
+                    treatment_performed='None',
+                    temperature='38.50',
+                    date_of_entry=today - datetime.timedelta(days=i),
+                )
+
+    def export(self, scope, file_format):
+        response = self.client.get(reverse('record-export', kwargs={'scope': scope, 'file_format': file_format}))
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_clinic_exports_its_examinations_as_csv(self):
+        self.add_history(3)
+        self.client.force_login(self.clinic)
+
+        response, content = self.export('clinic', 'csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="clinic_records_', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row['type'] for row in rows}, {'examination'})
+        self.assertEqual(rows[0]['clinic'], 'Test Clinic')
+        self.assertEqual(float(rows[0]['temperature']), 38.5)
+        # oldest first
+        self.assertEqual([row['date'] for row in rows], sorted(row['date'] for row in rows))
+
+    def test_owner_exports_records_of_their_pets_as_ndjson(self):
+        self.add_history(2)
+        self.client.force_login(self.owner)
+
+        response, content = self.export('owner', 'ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['type'] for row in rows], ['vaccination'] * 2 + ['treatment'] * 2 + ['examination'] * 2)
+        self.assertEqual({row['pet'] for row in rows}, {'Some Test Dog'})
+        self.assertEqual(rows[0]['name'], 'Test Vaccine')
+        self.assertEqual(rows[0]['passport_number'], 'BG01VP123456')
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.client.force_login(self.owner)
+        self.add_history(2)
+        # session, user and one streamed query per record type
+        with self.assertNumQueries(5):
+            self.export('owner', 'csv')
+
+        self.add_history(30)
+        with self.assertNumQueries(5):
+            _, content = self.export('owner', 'csv')
+
+        self.assertEqual(len(content.splitlines()), 1 + 32 * 3)
+
+    def test_owner_cannot_export_clinic_scope(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse('record-export', kwargs={'scope': 'clinic', 'file_format': 'csv'}))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_format_returns_404(self):
+        self.client.force_login(self.owner)
+
+        response = self.client.get(reverse('record-export', kwargs={'scope': 'owner', 'file_format': 'xlsx'}))
+
+        self.assertEqual(response.status_code, 404)
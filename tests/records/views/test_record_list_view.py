@@ -0,0 +1,126 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pet_mvp.common.utils import encode_cursor
+from pet_mvp.drugs.models import Vaccine, Drug
+from pet_mvp.pets.models import Pet
+from pet_mvp.records.models import MedicalExaminationRecord, VaccinationRecord, MedicationRecord
+
+UserModel = get_user_model()
+
+
+@override_settings(RECORD_LIST_PAGE_SIZE=3)
+class RecordListViewTest(TestCase):
+    def setUp(self):
+        self.owner = UserModel.objects.create_owner(
+            email='owner@test.com',
+            password='1234',
+            first_name='Test',
+            last_name='Owner',
+        )
+        self.clinic = UserModel.objects.create_clinic(
+            email='test-clinic@test.com',
+            password='1234',
+            name='Test Clinic',
+            address='123 Some Address',
+            is_owner=False,
+            phone_number='0887142536',
+            city='Varna',
+            country='Bulgaria',
+        )
+
+        self.pet = Pet.objects.create(
+            name='Some Test Dog',
+            species='dog',
+            breed='Shepherd',
+            color='Tan',
+            date_of_birth='2020-01-01',
+            sex='male',
+            current_weight='28',
+            passport_number='BG01VP123456',
+        )
+        self.pet.owners.add(self.owner)
+
+        self.vaccine = Vaccine.objects.create(name='Test Vaccine', suitable_for='dog', notes='Test vaccine')
+        self.drug = Drug.objects.create(name='Test Drug', suitable_for='dog', notes='Test drug')
+        self.client.force_login(self.owner)
+
+    def add_history(self, count):
+        today = datetime.date.today()
+        for i in range(count):
+            # two records share each date, so the pk breaks the ties
+            valid_until = today - datetime.timedelta(days=i // 2)
+            VaccinationRecord.objects.create(pet=self.pet, vaccine=self.vaccine, valid_until=valid_until)
+            MedicationRecord.objects.create(pet=self.pet, medication=self.drug, valid_until=valid_until)
+            MedicalExaminationRecord.objects.create(
+                pet=self.pet,
+                clinic=self.clinic,
+                doctor='Dr. Test',
+                reason_for_visit='Checkup',
+                treatment_performed='None',
+                date_of_entry=valid_until,
+            )
+
+    def get_page(self, query=''):
+        return self.client.get(f"{reverse('record-list')}?pk={self.pet.pk}&{query}")
+
+    def test_query_count_does_not_grow_with_history(self):
+        # session, user, the pet, one page per record type and the clinic profile check of the base template
+        self.add_history(4)
+        with self.assertNumQueries(7):
+            self.get_page()
+
+        self.add_history(20)
+        with self.assertNumQueries(7):
+            response = self.get_page()
+
+        self.assertEqual(len(response.context['vaccines']), 3)
+        self.assertEqual(len(response.context['treatments']), 3)
+        self.assertEqual(len(response.context['examinations']), 3)
+
+    def test_pages_cover_history_in_order(self):
+        self.add_history(7)
+        expected = list(VaccinationRecord.objects.order_by('-valid_until', '-pk').values_list('pk', flat=True))
+
+        seen = []
+        response = self.get_page()
+        while True:
+            seen += [record.pk for record in response.context['vaccines']]
+            if not response.context['vaccines_older']:
+                break
+            response = self.client.get(f"{reverse('record-list')}?{response.context['vaccines_older']}")
+
+        self.assertEqual(seen, expected)
+        # the other record types stay on their first page
+        self.assertEqual(response.context['treatments_newest'], '')
+        self.assertTrue(response.context['vaccines_newest'])
+
+    def test_malformed_cursor_shows_first_page(self):
+        self.add_history(4)
+
+        response = self.get_page('vaccines_after=not-a-cursor')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [record.pk for record in response.context['vaccines']],
+            list(VaccinationRecord.objects.order_by('-valid_until', '-pk').values_list('pk', flat=True)[:3]),
+        )
+
+    def test_mistyped_cursor_shows_first_page(self):
+        self.add_history(4)
+
+        response = self.get_page(f"vaccines_after={encode_cursor(['x', 'y'])}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [record.pk for record in response.context['vaccines']],
+            list(VaccinationRecord.objects.order_by('-valid_until', '-pk').values_list('pk', flat=True)[:3]),
+        )
+
+    def test_missing_pet_returns_404(self):
+        response = self.client.get(f"{reverse('record-list')}?pk={self.pet.pk + 1}")
+
+        self.assertEqual(response.status_code, 404)